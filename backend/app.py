@@ -8,7 +8,8 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Import config and blueprints
-from config import SECRET_KEY
+from config import SECRET_KEY, PREWARM_MODELS
+from services.model_registry import prewarm_models
 from routes.auth import auth_bp
 from routes.upload import uploads_bp
 from routes.profile import profile_bp
@@ -36,6 +37,9 @@ app.register_blueprint(auth_bp, url_prefix='/api/auth')
 app.register_blueprint(uploads_bp, url_prefix='/api/uploads')
 app.register_blueprint(profile_bp, url_prefix='/api/profile')
 
+# Models load lazily on first use; optionally warm some up without blocking startup
+prewarm_models(PREWARM_MODELS)
+
 # --- REACT APP SERVING ---
 # Serves the main index.html file for any route not caught by the API
 @app.route('/', defaults={'path': ''})
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+MINDMAP LAYOUT BENCHMARK - fixed-radius two-level layout vs layout_mindmap
+Usage: python benchmark_mindmap_layout.py [topics:subtopics[:depth3] ...]
+       (default: 10:6 30:35 20:10:4 - reports time and overlapping node pairs)
+"""
+
+import sys
+import math
+import time
+from collections import defaultdict
+
+from services.mindmap_layout import layout_mindmap, estimate_node_size
+
+def legacy_layout(nodes, edges, canvas_width=5000, canvas_height=4000):
+    """The previous calculate_node_positions (levels 0-2, O(L1 x L2 x E))"""
+    center_x = canvas_width / 2
+    center_y = canvas_height / 2
+    level0 = [n for n in nodes if n['level'] == 0]
+    level1 = [n for n in nodes if n['level'] == 1]
+    level2 = [n for n in nodes if n['level'] == 2]
+    for node in level0:
+        node['x'] = center_x
+        node['y'] = center_y
+    for i, node in enumerate(level1):
+        angle = (2 * math.pi * i / len(level1))
+        node['x'] = center_x + 1000 * math.cos(angle)
+        node['y'] = center_y + 1000 * math.sin(angle)
+    for parent in level1:
+        children = []
+        for node in level2:
+            for edge in edges:
+                if edge['to'] == node['id'] and edge['from'] == parent['id']:
+                    children.append(node)
+                    break
+        if not children:
+            continue
+        parent_angle = math.atan2(parent['y'] - center_y, parent['x'] - center_x)
+        for i, child in enumerate(children):
+            offset = 0 if len(children) == 1 else (i - (len(children) - 1) / 2) * ((math.pi / 3) / (len(children) - 1))
+            child['x'] = parent['x'] + 800 * math.cos(parent_angle + offset)
+            child['y'] = parent['y'] + 800 * math.sin(parent_angle + offset)
+    return nodes, canvas_width, canvas_height
+
+def make_mindmap(topics, subtopics, leaves=0):
+    nodes = [{'id': 'central', 'label': 'Central Concept', 'level': 0, 'shape': 'circle', 'size': 40}]
+    edges = []
+    count = 0
+    for i in range(topics):
+        topic_id = f'topic_{i}'
+        nodes.append({'id': topic_id, 'label': f'Main Topic Number {i}', 'level': 1, 'shape': 'box'})
+        edges.append({'from': 'central', 'to': topic_id})
+        for _ in range(subtopics):
+            count += 1
+            sub_id = f'node_{count}'
+            nodes.append({'id': sub_id, 'label': f'Subtopic Label {count}', 'level': 2, 'shape': 'ellipse'})
+            edges.append({'from': topic_id, 'to': sub_id})
+            for _ in range(leaves):
+                count += 1
+                leaf_id = f'node_{count}'
+                nodes.append({'id': leaf_id, 'label': f'Detail {count}', 'level': 3, 'shape': 'ellipse'})
+                edges.append({'from': sub_id, 'to': leaf_id})
+    return nodes, edges
+
+def count_overlaps(nodes):
+    """Overlapping node pairs (spatial hash, unplaced nodes ignored)"""
+    placed = [n for n in nodes if 'x' in n]
+    sizes = {n['id']: estimate_node_size(n) for n in placed}
+    cell = max(max(size) for size in sizes.values())
+    grid = defaultdict(list)
+    for n in placed:
+        grid[(int(n['x'] // cell), int(n['y'] // cell))].append(n)
+    overlaps = 0
+    for (cx, cy), members in grid.items():
+        for n in members:
+            w, h = sizes[n['id']]
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    for other in grid.get((cx + dx, cy + dy), ()):
+                        if other['id'] <= n['id']:
+                            continue
+                        ow, oh = sizes[other['id']]
+                        if abs(n['x'] - other['x']) < (w + ow) / 2 and abs(n['y'] - other['y']) < (h + oh) / 2:
+                            overlaps += 1
+    return overlaps
+
+def main():
+    shapes = sys.argv[1:] or ['10:6', '30:35', '20:10:4']
+    for shape in shapes:
+        parts = [int(p) for p in shape.split(':')]
+        for name, layout in (('legacy', legacy_layout), ('layout_mindmap', layout_mindmap)):
+            nodes, edges = make_mindmap(*parts)
+            start = time.perf_counter()
+            nodes, width, height = layout(nodes, edges)
+            elapsed = (time.perf_counter() - start) * 1000
+            unplaced = sum(1 for n in nodes if 'x' not in n)
+            print(f"{shape:>10} {len(nodes):5d} nodes  {name:<15} {elapsed:9.1f} ms  "
+                  f"canvas {width}x{height}  overlaps {count_overlaps(nodes)}  unplaced {unplaced}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+SPACY PROFILE BENCHMARK - full pipeline vs per-use-case profiles
+Usage: python benchmark_nlp_profiles.py [document.txt ...]
+       (without arguments, a synthetic study-notes document is generated)
+"""
+
+import sys
+import time
+import random
+
+from services.chunking import split_into_chunks
+from services.nlp_profiles import parse, parse_many
+
+SAMPLE_LINES = [
+    "Photosynthesis is the process by which green plants convert light energy into chemical energy.",
+    "The mitochondria is the powerhouse of the cell and produces ATP through cellular respiration.",
+    "Newton's second law states that force equals mass times acceleration.",
+    "Blockchain is a distributed ledger that records transactions across many computers.",
+    "The French Revolution began in 1789 in Paris and ended in 1799 under Napoleon Bonaparte.",
+    "First, collect the raw data from the sensors and then validate every record.",
+    "If the checksum does not match, the packet is discarded and retransmitted.",
+    "Marie Curie won the Nobel Prize in Physics in 1903 and in Chemistry in 1911.",
+]
+
+# (label, model, profile, how the service calls it)
+CASES = [
+    ('summary sentences', 'sm', 'sents_only', 'many'),
+    ('quiz fallback facts', 'sm', 'sents_ents', 'many'),
+    ('quiz document analysis', 'sm', 'ents_chunks', 'one'),
+    ('mindmap noun chunks', 'md', 'chunks', 'one'),
+    ('flowchart steps', 'md', 'sents_pos', 'one'),
+]
+
+def synthetic_document(sentences=600):
+    random.seed(0)
+    return ' '.join(random.choice(SAMPLE_LINES) for _ in range(sentences))
+
+def timed(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def run_case(text, model, profile, mode):
+    if mode == 'many':
+        chunks = split_into_chunks(text, 12000)
+        full = timed(lambda: parse_many(chunks, 'full', model=model))
+        fast = timed(lambda: parse_many(chunks, profile, model=model))
+    else:
+        head = text[:12000]
+        full = timed(lambda: parse(head, 'full', model=model))
+        fast = timed(lambda: parse(head, profile, model=model))
+    return full, fast
+
+if __name__ == '__main__':
+    print("=" * 72)
+    print("SPACY PROFILE BENCHMARK")
+    print("=" * 72)
+
+    if len(sys.argv) > 1:
+        documents = [open(path, encoding='utf-8').read() for path in sys.argv[1:]]
+    else:
+        documents = [synthetic_document()]
+    print(f"{len(documents)} document(s), {sum(len(d) for d in documents)} chars\n")
+
+    # Load both models before timing anything
+    parse('warm up', 'full', model='sm')
+    parse('warm up', 'full', model='md')
+
+    print(f"{'use case':<24} {'profile':<12} {'full ms/doc':>12} {'profile ms/doc':>15} {'speedup':>8}")
+    for label, model, profile, mode in CASES:
+        full_total = fast_total = 0.0
+        for text in documents:
+            full, fast = run_case(text, model, profile, mode)
+            full_total += full
+            fast_total += fast
+        n = len(documents)
+        print(f"{label:<24} {profile:<12} {full_total / n * 1000:12.1f} "
+              f"{fast_total / n * 1000:15.1f} {full_total / fast_total:7.2f}x")
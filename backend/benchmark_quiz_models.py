@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+QUIZ MODEL BACKEND BENCHMARK - fp32 PyTorch vs int8 quantized vs ONNX Runtime
+Usage: python benchmark_quiz_models.py [backend ...]
+       (default: pytorch quantized onnx; pytorch is always the reference)
+       Exits with an error if a backend falls back to pytorch when loading.
+"""
+
+import re
+import sys
+import time
+from collections import Counter
+
+from services.model_registry import QUIZ_BACKENDS, build_quiz_pipeline
+from services.quiz_service import generate_questions_ml, extract_answers_ml
+
+# Fixed fact set so every run and every backend sees the same inputs
+FACTS = [
+    "Photosynthesis is the process by which green plants convert light energy into chemical energy stored in glucose.",
+    "The mitochondria is the organelle that produces most of the cell's supply of adenosine triphosphate.",
+    "Newton's second law states that the force acting on an object equals its mass times its acceleration.",
+    "A blockchain is a distributed ledger that records transactions across many computers in linked blocks.",
+    "The French Revolution began in 1789 with the storming of the Bastille and ended in 1799.",
+    "Osmosis is the movement of water molecules through a semipermeable membrane from low to high solute concentration.",
+    "The Treaty of Versailles was signed in 1919 and formally ended the First World War.",
+    "Binary search finds an item in a sorted array by repeatedly halving the search interval, in O(log n) time.",
+    "The speed of light in a vacuum is approximately 299,792 kilometres per second.",
+    "DNA replication is semi-conservative because each new double helix keeps one strand of the original molecule.",
+    "Inflation is a general increase in prices that reduces the purchasing power of money over time.",
+    "The Pacific Ocean is the largest and deepest of Earth's five oceanic divisions.",
+    "TCP is a connection-oriented protocol that guarantees ordered, reliable delivery of a byte stream.",
+    "Marie Curie was the first person to win Nobel Prizes in two different sciences, physics and chemistry.",
+    "Supply and demand determine the market price at which the quantity supplied equals the quantity demanded.",
+    "The Krebs cycle is a series of chemical reactions that releases stored energy through the oxidation of acetyl-CoA.",
+]
+
+def tokens(text):
+    return re.findall(r'\w+', (text or '').lower())
+
+def token_f1(prediction, reference):
+    """SQuAD-style token F1 between two strings"""
+    pred, ref = tokens(prediction), tokens(reference)
+    if not pred or not ref:
+        return float(pred == ref)
+    common = sum((Counter(pred) & Counter(ref)).values())
+    if common == 0:
+        return 0.0
+    precision, recall = common / len(pred), common / len(ref)
+    return 2 * precision * recall / (precision + recall)
+
+def run(backend):
+    load_start = time.perf_counter()
+    qg, qg_backend = build_quiz_pipeline('question_generator', backend)
+    qa, qa_backend = build_quiz_pipeline('answer_extractor', backend)
+    load_seconds = time.perf_counter() - load_start
+
+    # A fallback would report fp32 numbers under this backend's name
+    if {qg_backend, qa_backend} != {backend}:
+        sys.exit(f"Requested backend '{backend}' but loaded question_generator={qg_backend}, "
+                 f"answer_extractor={qa_backend} - check the warnings above")
+    print(f"  loaded: question_generator={qg_backend}, answer_extractor={qa_backend}")
+
+    start = time.perf_counter()
+    questions = generate_questions_ml(FACTS, qg_pipeline=qg)
+    qg_seconds = time.perf_counter() - start
+
+    return {'qg': qg, 'qa': qa, 'load': load_seconds, 'qg_seconds': qg_seconds, 'questions': questions}
+
+def answer(result, questions):
+    """QA over the reference questions, so every backend answers the same inputs"""
+    pairs = [(fact, q) for fact, q in zip(FACTS, questions) if q]
+    start = time.perf_counter()
+    answers = extract_answers_ml(pairs, qa_pipeline=result['qa'])
+    result['qa_seconds'] = time.perf_counter() - start
+    return answers
+
+def mean(values):
+    values = list(values)
+    return sum(values) / len(values) if values else 0.0
+
+if __name__ == '__main__':
+    backends = sys.argv[1:] or list(QUIZ_BACKENDS)
+    unknown = [b for b in backends if b not in QUIZ_BACKENDS]
+    if unknown:
+        sys.exit(f"Unknown backend(s): {', '.join(unknown)} (choose from {', '.join(QUIZ_BACKENDS)})")
+    if 'pytorch' not in backends:
+        backends.insert(0, 'pytorch')
+
+    print("=" * 70)
+    print("QUIZ MODEL BACKEND BENCHMARK")
+    print("=" * 70)
+    print(f"{len(FACTS)} facts\n")
+
+    results = {}
+    for backend in backends:
+        print(f"Loading {backend}...")
+        results[backend] = run(backend)
+
+    reference = results['pytorch']
+    reference_answers = answer(reference, reference['questions'])
+
+    print(f"\n{'backend':<10} {'load s':>7} {'QG facts/s':>11} {'QA pairs/s':>11} "
+          f"{'valid Qs':>9} {'Q F1':>6} {'A exact':>8} {'A F1':>6}")
+    for backend, result in results.items():
+        answers = reference_answers if result is reference else answer(result, reference['questions'])
+        valid = sum(1 for q in result['questions'] if q)
+        question_f1 = mean(
+            token_f1(q, ref) for q, ref in zip(result['questions'], reference['questions']) if ref
+        )
+        pairs = [(a, ref) for a, ref in zip(answers, reference_answers) if ref]
+        exact = mean(float(a == ref) for a, ref in pairs)
+        answer_f1 = mean(token_f1(a, ref) for a, ref in pairs)
+        print(f"{backend:<10} {result['load']:7.1f} {len(FACTS) / result['qg_seconds']:11.2f} "
+              f"{len(answers) / result['qa_seconds']:11.2f} {valid:>5}/{len(FACTS):<3} "
+              f"{question_f1:6.2f} {exact:8.2f} {answer_f1:6.2f}")
+
+    print("\nF1 / exact match are measured against the fp32 pytorch outputs.")
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+SENTENCE SCORING BENCHMARK - previous regex loop vs current scorer
+Usage: python benchmark_sentence_scoring.py [sizes ...]
+       (default: 1000 10000 100000 sentences; outputs must be identical,
+       test_sentence_scoring.py checks the same equivalence)
+"""
+
+import sys
+import time
+import random
+
+from services.sentence_scoring import score_sentences_enhanced
+from test_sentence_scoring import legacy_score_sentences, synthetic_sentences
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+
+    print("=" * 64)
+    print("SENTENCE SCORING BENCHMARK")
+    print("=" * 64)
+    print(f"{'sentences':>10} {'previous s':>11} {'current s':>10} {'speedup':>8}  identical")
+
+    random.seed(0)
+    failed = False
+    for size in sizes:
+        sentences = synthetic_sentences(size)
+        text = ' '.join(sentences)
+        expected, before = timed(legacy_score_sentences, sentences, text)
+        actual, after = timed(score_sentences_enhanced, sentences, text)
+        identical = actual == expected
+        failed = failed or not identical
+        print(f"{size:>10} {before:11.3f} {after:10.3f} {before / after:7.2f}x  {'yes' if identical else 'NO'}")
+
+    sys.exit(1 if failed else 0)
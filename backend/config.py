@@ -22,6 +22,71 @@ MONGO_URI = os.environ.get('MONGO_URI',
 # ✅ GEMINI API KEY (CRITICAL FOR AI ENHANCEMENTS)
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', None)
 
+# Background jobs for document actions ('process' pool or 'inline' for tests)
+JOB_EXECUTOR = os.environ.get('JOB_EXECUTOR', 'process')
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+
+# Models to pre-warm in the background, e.g. "spacy_sm,keybert"
+# (names: spacy_sm, spacy_md, question_generator, answer_extractor, keybert)
+PREWARM_MODELS = [m.strip() for m in os.environ.get('PREWARM_MODELS', '').split(',') if m.strip()]
+JOB_PREWARM_MODELS = [m.strip() for m in os.environ.get('JOB_PREWARM_MODELS', 'spacy_sm').split(',') if m.strip()]
+
+# Cache of generated summaries/quizzes/mindmaps keyed by text hash + parameters
+RESULT_CACHE_SIZE = int(os.environ.get('RESULT_CACHE_SIZE', 256))        # in-memory LRU entries
+RESULT_CACHE_STORED = int(os.environ.get('RESULT_CACHE_STORED', 5000))   # Mongo entries
+RESULT_CACHE_TTL = int(os.environ.get('RESULT_CACHE_TTL', 7 * 24 * 3600))  # seconds
+
+# Upload progress records expire this long after their last update
+UPLOAD_PROGRESS_TTL = int(os.environ.get('UPLOAD_PROGRESS_TTL', 24 * 3600))  # seconds
+
+# Disk cache of Gemini preprocessing responses (shared by all job workers)
+GEMINI_CACHE_PATH = os.environ.get('GEMINI_CACHE_PATH', os.path.join(CACHE_DIR, 'gemini_responses.sqlite3'))
+GEMINI_CACHE_MAX_MB = int(os.environ.get('GEMINI_CACHE_MAX_MB', 50))
+# Opt-in: one Gemini request fills summary/quiz/mindmap/flowchart preprocessing
+# together - pays off only when most documents use several features
+GEMINI_COMBINED_MODE = os.environ.get('GEMINI_COMBINED_MODE', 'false').lower() == 'true'
+# Documents over 12k chars are preprocessed in chunks (map-reduce)
+GEMINI_CHUNK_WORKERS = int(os.environ.get('GEMINI_CHUNK_WORKERS', 4))
+GEMINI_MAX_CHUNKS = int(os.environ.get('GEMINI_MAX_CHUNKS', 24))
+
+# Page-parallel PDF extraction (PDFs with fewer pages are read serially)
+PDF_WORKERS = int(os.environ.get('PDF_WORKERS', os.cpu_count() or 2))
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get('PDF_PARALLEL_MIN_PAGES', 16))
+# Pages with less text than this that contain images are rasterized and OCR'd
+PDF_OCR_DPI = int(os.environ.get('PDF_OCR_DPI', 300))
+PDF_OCR_MIN_CHARS = int(os.environ.get('PDF_OCR_MIN_CHARS', 20))
+# Image OCR runs a second pass only below this mean Tesseract confidence (0-100)
+OCR_CONFIDENCE_THRESHOLD = float(os.environ.get('OCR_CONFIDENCE_THRESHOLD', 60))
+
+# spaCy nlp.pipe settings for multi-text calls (services/nlp_profiles.py)
+NLP_BATCH_SIZE = int(os.environ.get('NLP_BATCH_SIZE', 64))
+NLP_PROCESSES = int(os.environ.get('NLP_PROCESSES', 1))
+
+# Phrase embeddings kept in memory by the mindmap keyphrase engine (LRU entries)
+KEYPHRASE_CACHE_SIZE = int(os.environ.get('KEYPHRASE_CACHE_SIZE', 20000))
+
+# Topic-tree mindmaps (requested max_depth, or max_nodes over the 40-node flat map):
+# sentence embeddings are clustered recursively, MINDMAP_VISIBLE_DEPTH levels are
+# returned expanded and deeper levels as collapsed subtrees
+MINDMAP_MAX_DEPTH = int(os.environ.get('MINDMAP_MAX_DEPTH', 4))
+MINDMAP_BRANCHING = int(os.environ.get('MINDMAP_BRANCHING', 6))
+MINDMAP_MAX_NODES = int(os.environ.get('MINDMAP_MAX_NODES', 400))
+MINDMAP_VISIBLE_DEPTH = int(os.environ.get('MINDMAP_VISIBLE_DEPTH', 2))
+MINDMAP_MIN_CLUSTER = int(os.environ.get('MINDMAP_MIN_CLUSTER', 3))
+MINDMAP_MAX_SENTENCES = int(os.environ.get('MINDMAP_MAX_SENTENCES', 2000))
+
+# Quiz generation runs T5 / RoBERTa over candidate facts in mini-batches
+QG_BATCH_SIZE = int(os.environ.get('QG_BATCH_SIZE', 8))
+QA_BATCH_SIZE = int(os.environ.get('QA_BATCH_SIZE', 16))
+# Cap on T5 + RoBERTa time per quiz; past it remaining facts use rule-based questions
+QUIZ_MODEL_BUDGET_SECONDS = float(os.environ.get('QUIZ_MODEL_BUDGET_SECONDS', 45))
+# Default decoding mode when a create_quiz request names none: fast, balanced or quality
+QUIZ_DEFAULT_MODE = os.environ.get('QUIZ_DEFAULT_MODE', 'balanced').lower()
+# Quiz model inference: 'pytorch' (fp32), 'quantized' (int8 dynamic) or 'onnx'
+# (needs optimum[onnxruntime]); falls back to pytorch if the backend fails to load
+QUIZ_MODEL_BACKEND = os.environ.get('QUIZ_MODEL_BACKEND', 'pytorch').lower()
+ONNX_EXPORT_DIR = os.environ.get('ONNX_EXPORT_DIR', os.path.join(CACHE_DIR, 'onnx'))
+
 # Debug output
 print("\n" + "="*60)
 print("🔧 CONFIGURATION")
@@ -30,6 +95,7 @@ print(f"Using MongoDB: {'Atlas (Cloud)' if 'mongodb+srv' in MONGO_URI else 'Loca
 print(f"Connection: {MONGO_URI[:50]}...")
 print(f"🔑 Secret Key: {'✅ Set' if SECRET_KEY else '❌ Missing'}")
 print(f"🤖 Gemini API: {'✅ Available' if GEMINI_API_KEY else '⚠️  Not configured (optional)'}")
+print(f"⚙️  Job Workers: {JOB_WORKERS} ({JOB_EXECUTOR})")
 print("="*60 + "\n")
 
 # Initialize the database connection
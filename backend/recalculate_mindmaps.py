@@ -7,82 +7,14 @@ Usage: python recalculate_mindmaps.py
 import os
 import sys
 from pymongo import MongoClient
-import math
+
+from services.mindmap_layout import layout_mindmap
 
 # MongoDB connection
 MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/prepify')
 client = MongoClient(MONGO_URI)
 db = client.get_database()
 
-def calculate_node_positions_fixed(nodes, edges, canvas_width=5000, canvas_height=4000):
-    """
-    ACTUAL FIXED LAYOUT - ORGANIC RADIAL
-    """
-    center_x = canvas_width / 2
-    center_y = canvas_height / 2
-    
-    # Separate by levels
-    level0 = [n for n in nodes if n.get('level') == 0]
-    level1 = [n for n in nodes if n.get('level') == 1]
-    level2 = [n for n in nodes if n.get('level') == 2]
-    
-    # Place center
-    for node in level0:
-        node['x'] = center_x
-        node['y'] = center_y
-    
-    if not level1:
-        return nodes
-    
-    # LEVEL 1: Full circle around center
-    num_main = len(level1)
-    radius_main = 1000  # Large radius
-    
-    print(f"  Placing {num_main} main nodes in circle (radius={radius_main})")
-    
-    for i, node in enumerate(level1):
-        angle = (2 * math.pi * i / num_main)  # Full 360 degrees
-        node['x'] = center_x + radius_main * math.cos(angle)
-        node['y'] = center_y + radius_main * math.sin(angle)
-    
-    # LEVEL 2: Around each parent in its own arc
-    radius_sub = 800  # Distance from parent
-    
-    for parent in level1:
-        # Find children
-        children = []
-        for node in level2:
-            # Find edge connecting to this parent
-            for edge in edges:
-                if edge['to'] == node['id'] and edge['from'] == parent['id']:
-                    children.append(node)
-                    break
-        
-        if not children:
-            continue
-        
-        print(f"  Placing {len(children)} children around {parent['id']}")
-        
-        # Parent's angle from center
-        parent_angle = math.atan2(parent['y'] - center_y, parent['x'] - center_x)
-        
-        num_children = len(children)
-        
-        # Spread children in arc around parent
-        arc_spread = math.pi / 3  # 60 degrees total
-        
-        for i, child in enumerate(children):
-            if num_children == 1:
-                offset = 0
-            else:
-                offset = (i - (num_children - 1) / 2) * (arc_spread / (num_children - 1))
-            
-            child_angle = parent_angle + offset
-            child['x'] = parent['x'] + radius_sub * math.cos(child_angle)
-            child['y'] = parent['y'] + radius_sub * math.sin(child_angle)
-    
-    return nodes
-
 def calculate_flowchart_positions_fixed(nodes, edges, canvas_width=1800):
     """
     FIXED FLOWCHART - NO OVERLAPS
@@ -138,6 +70,7 @@ def recalculate_all_mindmaps():
     Recalculate positions for all mindmaps in database
     """
     mindmaps_collection = db['mindmaps']
+    subtrees_collection = db['mindmap_subtrees']
     
     # Get all mindmaps
     mindmaps = list(mindmaps_collection.find({}))
@@ -167,9 +100,14 @@ def recalculate_all_mindmaps():
             canvas_width = 1800
             nodes, canvas_height = calculate_flowchart_positions_fixed(nodes, edges, canvas_width)
         else:
-            canvas_width = 5000
-            canvas_height = 4000
-            nodes = calculate_node_positions_fixed(nodes, edges, canvas_width, canvas_height)
+            # Collapsed subtrees are laid out with the visible levels, as when generated
+            subtrees = list(subtrees_collection.find({'mindmap_id': str(mindmap_id)}))
+            all_nodes = nodes + [node for subtree in subtrees for node in subtree['nodes']]
+            all_edges = edges + [edge for subtree in subtrees for edge in subtree['edges']]
+            _, canvas_width, canvas_height = layout_mindmap(all_nodes, all_edges)
+            for subtree in subtrees:
+                subtrees_collection.update_one({'_id': subtree['_id']}, {'$set': {'nodes': subtree['nodes']}})
+            print(f"  Laid out {len(all_nodes)} nodes on a {canvas_width}x{canvas_height} canvas")
         
         # Update in database
         result = mindmaps_collection.update_one(
@@ -1,20 +1,34 @@
 import os
+import json
 import math
-from flask import Blueprint, request, jsonify
+import queue
+import time
+from functools import partial
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from werkzeug.utils import secure_filename
 import logging
 from datetime import datetime
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 
 # Import the database object and authentication
-from config import db
+from config import (
+    db, JOB_EXECUTOR, JOB_WORKERS, JOB_PREWARM_MODELS, MINDMAP_MAX_NODES,
+    RESULT_CACHE_SIZE, RESULT_CACHE_STORED, RESULT_CACHE_TTL, UPLOAD_PROGRESS_TTL
+)
 from routes.auth import token_required
 
 # Import ML services
 from services.text_extractor import extract_text
-from services.summarization_service import generate_summary
-from services.quiz_service import generate_quiz
-from services.mindmap_service import generate_mindmap, generate_flowchart
+from services.job_queue import (
+    JobQueue, MongoJobStore, MemoryJobStore, create_executor,
+    ACTIONS, JOB_QUEUED, JOB_COMPLETED, JOB_FAILED, JOB_FINISHED_EVENT
+)
+from services.result_cache import ResultCache
+from services.summarization_service import SUMMARY_CONFIGS, summary_from_ranking
+from services.gemini_preprocessor import get_preprocessing_stats
+from services.model_registry import model_stats
+from services.quiz_service import QUIZ_MODES, QUIZ_DEFAULT_MODE, is_quiz_mode
 
 # Configure logging
 logging.basicConfig(
@@ -32,6 +46,7 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg'}
 MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
+MAX_UPLOAD_ID_LENGTH = 64
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -73,6 +88,18 @@ def upload_file(current_user):
         
         if file_size > MAX_FILE_SIZE:
             return jsonify({'error': 'File size exceeds 16MB limit'}), 400
+        
+        # Optional client-chosen id for polling /upload-progress/<upload_id>;
+        # ids are single-use so one user can't take over another's record
+        upload_id = request.form.get('upload_id')
+        progress = None
+        if upload_id:
+            if len(upload_id) > MAX_UPLOAD_ID_LENGTH:
+                return jsonify({'error': f'upload_id must be at most {MAX_UPLOAD_ID_LENGTH} characters'}), 400
+            try:
+                progress = make_progress_reporter(current_user['_id'], upload_id)
+            except DuplicateKeyError:
+                return jsonify({'error': 'upload_id is already in use'}), 409
             
         # Save the file to the server
         original_filename = file.filename
@@ -85,10 +112,11 @@ def upload_file(current_user):
         file_type = original_filename.rsplit('.', 1)[1].lower()
         extracted_text = ""
         extraction_error = None
+        extraction_failed = False
         
         try:
             logger.info(f"🔍 Starting text extraction for {file_type} file...")
-            extracted_text = extract_text(file_path, file_type)
+            extracted_text = extract_text(file_path, file_type, progress=progress)
             logger.info(f"✅ Extracted {len(extracted_text)} characters of text")
             
             # Check if extraction returned an error message
@@ -106,6 +134,9 @@ def upload_file(current_user):
             logger.error(f"❌ Text extraction failed: {str(e)}")
             extraction_error = str(e)
             extracted_text = ""
+            extraction_failed = True
+            if upload_id:
+                set_upload_progress(current_user['_id'], upload_id, status='failed', error=extraction_error)
 
         # Create a document to insert into MongoDB
         document_data = {
@@ -125,6 +156,11 @@ def upload_file(current_user):
         # Insert into MongoDB 'documents' collection
         result = db.documents.insert_one(document_data)
         document_id = str(result.inserted_id)
+        
+        if upload_id:
+            # A failed extraction stays 'failed'; the (empty) document is still linked
+            set_upload_progress(current_user['_id'], upload_id,
+                                status='failed' if extraction_failed else 'done', document_id=document_id)
         logger.info(f"✅ File metadata saved to MongoDB with ID: {document_id}")
         logger.info("="*60)
 
@@ -157,6 +193,55 @@ def upload_file(current_user):
         traceback.print_exc()
         return jsonify({'error': f'An unexpected error occurred during upload: {str(e)}'}), 500
 
+def set_upload_progress(user_id, upload_id, **fields):
+    """Update the user's own progress record for an upload"""
+    fields['updated_at'] = datetime.utcnow()
+    db.upload_progress.update_one({'_id': upload_id, 'user_id': user_id}, {'$set': fields})
+
+def make_progress_reporter(user_id, upload_id, min_interval=0.5):
+    """Record per-page extraction progress for an upload (throttled writes)
+    
+    Raises DuplicateKeyError if a record with this upload_id already exists.
+    """
+    db.upload_progress.insert_one({
+        '_id': upload_id, 'user_id': user_id, 'status': 'extracting',
+        'pages_done': 0, 'page_count': None, 'updated_at': datetime.utcnow()
+    })
+    last_write = [0.0]
+    
+    def report(pages_done, page_count):
+        now = time.monotonic()
+        if pages_done < page_count and now - last_write[0] < min_interval:
+            return
+        last_write[0] = now
+        set_upload_progress(user_id, upload_id, pages_done=pages_done, page_count=page_count)
+    
+    return report
+
+@uploads_bp.route('/upload-progress/<upload_id>', methods=['GET'])
+@token_required
+def get_upload_progress(current_user, upload_id):
+    """Get text extraction progress for an upload still in flight"""
+    try:
+        record = db.upload_progress.find_one({'_id': upload_id, 'user_id': current_user['_id']})
+        if not record:
+            return jsonify({'error': 'Upload not found'}), 404
+        
+        page_count = record.get('page_count')
+        return jsonify({
+            'success': True,
+            'upload_id': upload_id,
+            'status': record['status'],
+            'pages_done': record.get('pages_done', 0),
+            'page_count': page_count,
+            'percent': round(record.get('pages_done', 0) / page_count * 100, 1) if page_count else 0,
+            'document_id': record.get('document_id'),
+            'error': record.get('error')
+        }), 200
+    except Exception as e:
+        logger.error(f"Error fetching upload progress: {str(e)}")
+        return jsonify({'error': 'Failed to fetch upload progress'}), 500
+
 @uploads_bp.route('/user-notes', methods=['GET'])
 @token_required
 def get_user_notes(current_user):
@@ -222,7 +307,7 @@ def delete_document(current_user, document_id):
 @uploads_bp.route('/action/<document_id>/<action>', methods=['POST'])
 @token_required
 def perform_action(current_user, document_id, action):
-    """Perform an action on a document"""
+    """Queue an action on a document and return a job id"""
     logger.info("="*60)
     logger.info(f"ACTION REQUEST: {action} on document {document_id}")
     logger.info("="*60)
@@ -242,253 +327,464 @@ def perform_action(current_user, document_id, action):
             logger.error(f"❌ Document not found or access denied")
             return jsonify({'error': 'Document not found or access denied'}), 404
 
-        # Get extracted text
-        extracted_text = document.get('extracted_text', '')
-        
         logger.info(f"📝 Document: {document.get('original_filename')}")
-        logger.info(f"📝 Text length: {len(extracted_text)} characters")
-        
-        # Enhanced text validation
-        if not extracted_text or len(extracted_text.strip()) < 50:
-            logger.error(f"❌ Insufficient text: {len(extracted_text)} characters")
-            
-            # Check if there was an extraction error
-            extraction_error = document.get('extraction_error', '')
-            if extraction_error:
-                error_message = f"Cannot process document due to text extraction issues:\n\n{extraction_error}"
-            else:
-                error_message = 'Insufficient text extracted from document. The document may be:\n• Image-based PDF without OCR\n• Encrypted or protected\n• Handwritten notes\n• Very low quality scan\n\nPlease:\n1. Try a text-based PDF\n2. Use a higher quality scan\n3. Ensure Tesseract OCR is installed'
-            
-            return jsonify({'error': error_message}), 400
+        logger.info(f"📝 Text length: {len(document.get('extracted_text', ''))} characters")
         
-        # Additional check: if text looks like an error message
-        if any(phrase in extracted_text for phrase in ["OCR not available", "Tesseract", "Install", "pip install"]):
-            logger.error(f"❌ OCR error detected in extracted text")
-            return jsonify({'error': 'Text extraction failed. Please ensure Tesseract OCR is properly installed on the server.'}), 400
+        text_error = document_text_error(document)
+        if text_error:
+            return jsonify({'error': text_error}), 400
 
-        # Perform the requested action
-        if action == 'summarize':
-            logger.info("📄 Calling summarization handler...")
-            return handle_summarize(current_user, document, extracted_text)
-        
-        elif action == 'create_quiz':
-            logger.info("📄 Calling quiz creation handler...")
-            return handle_create_quiz(current_user, document, extracted_text)
-        
-        elif action == 'create_mindmap':
-            logger.info("📄 Calling mindmap creation handler...")
-            return handle_create_mindmap(current_user, document, extracted_text)
-        
-        elif action == 'create_flowchart':
-            logger.info("📄 Calling flowchart creation handler...")
-            return handle_create_flowchart(current_user, document, extracted_text)
-        
-        else:
+        if action not in ACTIONS:
             logger.error(f"❌ Unknown action: {action}")
             return jsonify({'error': f'Unknown action: {action}'}), 400
 
+        # Queue the action - the generators run in a worker, not in this request
+        params = get_action_params(action)
+        logger.info(f"📊 Action parameters: {params}")
+
+        if action == 'create_quiz' and not is_quiz_mode(params['mode']):
+            return jsonify({'error': f"Unknown quiz mode: {params['mode']}. Choose from: {', '.join(QUIZ_MODES)}"}), 400
+        if action == 'summarize':
+            length_error = summary_length_error(params)
+            if length_error:
+                return jsonify({'error': length_error}), 400
+        if action == 'create_mindmap':
+            size_error = mindmap_size_error(params)
+            if size_error:
+                return jsonify({'error': size_error}), 400
+
+        job_id = job_queue.enqueue(current_user['_id'], document, action, params)
+        logger.info("="*60)
+
+        return jsonify({
+            'success': True,
+            'message': 'Action queued',
+            'job_id': job_id,
+            'status': JOB_QUEUED,
+            'status_url': f'/api/uploads/jobs/{job_id}',
+            'result_url': f'/api/uploads/jobs/{job_id}/result'
+        }), 202
+
     except Exception as e:
         logger.error(f"❌ Error performing action: {str(e)}")
         import traceback
         traceback.print_exc()
         return jsonify({'error': f'An unexpected error occurred: {str(e)}'}), 500
 
-def handle_summarize(current_user, document, text):
-    """Handle summarization action"""
-    try:
-        logger.info(f"🔍 Starting summarization...")
-        
-        # Get summary type from request or use default
-        summary_type = request.json.get('summary_type', 'medium') if request.is_json else 'medium'
-        logger.info(f"📊 Summary type: {summary_type}")
-        
-        # Generate summary
-        logger.info(f"🤖 Generating summary with AI model...")
-        summary_data = generate_summary(text, summary_type=summary_type)
-        logger.info(f"✅ Summary generated: {len(summary_data['summary'])} characters")
-        
-        # Save to database
-        summary_record = {
-            'user_id': current_user['_id'],
-            'document_id': str(document['_id']),
-            'document_name': document['original_filename'],
+def document_text_error(document):
+    """Why the document's extracted text cannot be processed, or None"""
+    extracted_text = document.get('extracted_text', '')
+    
+    # Enhanced text validation
+    if not extracted_text or len(extracted_text.strip()) < 50:
+        logger.error(f"❌ Insufficient text: {len(extracted_text)} characters")
+        
+        # Check if there was an extraction error
+        extraction_error = document.get('extraction_error', '')
+        if extraction_error:
+            return f"Cannot process document due to text extraction issues:\n\n{extraction_error}"
+        return 'Insufficient text extracted from document. The document may be:\n• Image-based PDF without OCR\n• Encrypted or protected\n• Handwritten notes\n• Very low quality scan\n\nPlease:\n1. Try a text-based PDF\n2. Use a higher quality scan\n3. Ensure Tesseract OCR is installed'
+    
+    # Additional check: if text looks like an error message
+    if any(phrase in extracted_text for phrase in ["OCR not available", "Tesseract", "Install", "pip install"]):
+        logger.error(f"❌ OCR error detected in extracted text")
+        return 'Text extraction failed. Please ensure Tesseract OCR is properly installed on the server.'
+    
+    return None
+
+def get_action_params(action):
+    """Read generator parameters for an action from the request body"""
+    body = request.get_json(silent=True) or {}
+
+    if action == 'summarize':
+        return summary_length_params(body)
+    if action == 'create_quiz':
+        return {
+            'num_questions': body.get('num_questions', 10),
+            'difficulty': body.get('difficulty', 'medium'),
+            'mode': body.get('mode', QUIZ_DEFAULT_MODE)
+        }
+    if action == 'create_mindmap':
+        return {
+            'max_nodes': body.get('max_nodes', 40),
+            'max_depth': body.get('max_depth'),
+            'branching': body.get('branching')
+        }
+    return {}
+
+def summary_length_params(values):
+    """summary_type plus the optional max_sentences / max_chars budgets"""
+    return {
+        'summary_type': values.get('summary_type', 'medium'),
+        'max_sentences': values.get('max_sentences'),
+        'max_chars': values.get('max_chars')
+    }
+
+def summary_length_error(params):
+    """Validate summary_length_params (converting budgets to int); None if valid"""
+    if params['summary_type'] not in SUMMARY_CONFIGS:
+        return f"Unknown summary type: {params['summary_type']}. Choose from: {', '.join(SUMMARY_CONFIGS)}"
+    for name in ('max_sentences', 'max_chars'):
+        if params[name] is None:
+            continue
+        try:
+            params[name] = int(params[name])
+        except (TypeError, ValueError):
+            return f"{name} must be a positive integer"
+        if params[name] < 1:
+            return f"{name} must be a positive integer"
+    return None
+
+def mindmap_size_error(params):
+    """Validate mindmap size parameters (converting them to int); None if valid"""
+    # A map needs the central node and at least two topics; a split needs two branches
+    limits = {'max_nodes': (3, MINDMAP_MAX_NODES), 'max_depth': (1, 8), 'branching': (2, 12)}
+    for name, (low, high) in limits.items():
+        if params[name] is None:
+            continue
+        try:
+            params[name] = int(params[name])
+        except (TypeError, ValueError):
+            return f"{name} must be an integer between {low} and {high}"
+        if not low <= params[name] <= high:
+            return f"{name} must be an integer between {low} and {high}"
+    return None
+
+def save_action_result(job, data):
+    """Persist a finished job's output and return the response payload"""
+    savers = {
+        'summarize': save_summary,
+        'create_quiz': save_quiz,
+        'create_mindmap': save_mindmap,
+        'create_flowchart': save_flowchart
+    }
+    return savers[job['action']](job, data)
+
+def save_summary(job, ranked):
+    """Select the requested length from a summary ranking and save it"""
+    summary_data = summary_from_ranking(ranked, **summary_length_params(job['params']))
+    logger.info(f"✅ Summary generated: {len(summary_data['summary'])} characters")
+
+    summary_record = {
+        'user_id': job['user_id'],
+        'document_id': job['document_id'],
+        'document_name': job['document_name'],
+        'summary': summary_data['summary'],
+        'key_points': summary_data['key_points'],
+        'summary_type': summary_data['summary_type'],
+        'original_length': summary_data['original_length'],
+        'summary_length': summary_data['summary_length'],
+        'max_sentences': summary_data['max_sentences'],
+        'max_chars': summary_data['max_chars'],
+        # Kept so any other length can be served without re-summarizing
+        'ranking': ranked['ranking'],
+        'preprocessed_with_gemini': ranked['preprocessed_with_gemini'],
+        'created_at': datetime.utcnow()
+    }
+
+    result = db.summaries.insert_one(summary_record)
+    summary_id = str(result.inserted_id)
+    logger.info(f"✅ Summary saved to database with ID: {summary_id}")
+
+    return {
+        'success': True,
+        'message': 'Summary generated successfully!',
+        'summary_id': summary_id,
+        'data': {
             'summary': summary_data['summary'],
             'key_points': summary_data['key_points'],
             'summary_type': summary_data['summary_type'],
-            'original_length': summary_data['original_length'],
-            'summary_length': summary_data['summary_length'],
-            'created_at': datetime.utcnow()
-        }
-        
-        result = db.summaries.insert_one(summary_record)
-        summary_id = str(result.inserted_id)
-        
-        logger.info(f"✅ Summary saved to database with ID: {summary_id}")
-        logger.info("="*60)
-        
-        return jsonify({
-            'success': True,
-            'message': 'Summary generated successfully!',
-            'summary_id': summary_id,
-            'data': {
-                'summary': summary_data['summary'],
-                'key_points': summary_data['key_points'],
-                'summary_type': summary_data['summary_type'],
-                'stats': {
-                    'original_length': summary_data['original_length'],
-                    'summary_length': summary_data['summary_length'],
-                    'reduction': round((1 - summary_data['summary_length'] / summary_data['original_length']) * 100, 1)
-                }
+            'preprocessed_with_gemini': ranked['preprocessed_with_gemini'],
+            'stats': {
+                'original_length': summary_data['original_length'],
+                'summary_length': summary_data['summary_length'],
+                'reduction': round((1 - summary_data['summary_length'] / summary_data['original_length']) * 100, 1)
             }
-        }), 200
-        
-    except Exception as e:
-        logger.error(f"❌ Summarization error: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        logger.info("="*60)
-        return jsonify({'error': f'Failed to generate summary: {str(e)}'}), 500
+        }
+    }
 
-def handle_create_quiz(current_user, document, text):
-    """Handle quiz creation action"""
-    try:
-        logger.info(f"🎯 Starting quiz creation...")
-        
-        # Get parameters from request or use defaults
-        num_questions = request.json.get('num_questions', 10) if request.is_json else 10
-        difficulty = request.json.get('difficulty', 'medium') if request.is_json else 'medium'
-        
-        logger.info(f"📊 Quiz parameters: {num_questions} questions, {difficulty} difficulty")
-        
-        # Generate quiz
-        logger.info(f"🤖 Generating quiz with AI model...")
-        quiz_data = generate_quiz(text, num_questions=num_questions, difficulty=difficulty)
-        logger.info(f"✅ Quiz generated: {quiz_data['total_questions']} questions")
-        
-        # Save to database
-        quiz_record = {
-            'user_id': current_user['_id'],
-            'document_id': str(document['_id']),
-            'document_name': document['original_filename'],
-            'questions': quiz_data['questions'],
+def save_quiz(job, quiz_data):
+    """Save a generated quiz"""
+    logger.info(f"✅ Quiz generated: {quiz_data['total_questions']} questions")
+
+    quiz_record = {
+        'user_id': job['user_id'],
+        'document_id': job['document_id'],
+        'document_name': job['document_name'],
+        'questions': quiz_data['questions'],
+        'total_questions': quiz_data['total_questions'],
+        'difficulty': quiz_data['difficulty'],
+        'mode': quiz_data.get('mode'),
+        'time_limit': quiz_data['time_limit'],
+        'created_at': datetime.utcnow(),
+        'status': 'not_started',
+        'attempts': [],
+        'best_score': None
+    }
+
+    result = db.quizzes.insert_one(quiz_record)
+    quiz_id = str(result.inserted_id)
+    logger.info(f"✅ Quiz saved to database with ID: {quiz_id}")
+
+    return {
+        'success': True,
+        'message': 'Quiz generated successfully!',
+        'quiz_id': quiz_id,
+        'data': {
             'total_questions': quiz_data['total_questions'],
             'difficulty': quiz_data['difficulty'],
-            'time_limit': quiz_data['time_limit'],
-            'created_at': datetime.utcnow(),
-            'status': 'not_started',
-            'attempts': [],
-            'best_score': None
+            'mode': quiz_data.get('mode'),
+            'time_limit': quiz_data['time_limit']
         }
-        
-        result = db.quizzes.insert_one(quiz_record)
-        quiz_id = str(result.inserted_id)
-        
-        logger.info(f"✅ Quiz saved to database with ID: {quiz_id}")
-        logger.info("="*60)
-        
-        return jsonify({
-            'success': True,
-            'message': 'Quiz generated successfully!',
-            'quiz_id': quiz_id,
-            'data': {
-                'total_questions': quiz_data['total_questions'],
-                'difficulty': quiz_data['difficulty'],
-                'time_limit': quiz_data['time_limit']
-            }
-        }), 200
-        
+    }
+
+def save_mindmap(job, mindmap_data):
+    """
+    Save a generated mind map: the visible levels go in the mindmaps document,
+    each collapsed subtree in its own mindmap_subtrees record
+    """
+    logger.info(f"✅ Mindmap generated: {len(mindmap_data['nodes'])} nodes, {len(mindmap_data['edges'])} edges")
+    subtrees = mindmap_data.get('subtrees', {})
+    edge_count = len(mindmap_data['edges']) + sum(len(subtree['edges']) for subtree in subtrees.values())
+
+    mindmap_record = {
+        'user_id': job['user_id'],
+        'document_id': job['document_id'],
+        'document_name': job['document_name'],
+        'title': mindmap_data['title'],
+        'nodes': mindmap_data['nodes'],
+        'edges': mindmap_data['edges'],
+        'node_count': mindmap_data.get('node_count', len(mindmap_data['nodes'])),
+        'edge_count': edge_count,
+        'subtree_count': len(subtrees),
+        'canvas_width': mindmap_data.get('canvas_width'),
+        'canvas_height': mindmap_data.get('canvas_height'),
+        'type': 'mindmap',
+        'created_at': datetime.utcnow()
+    }
+
+    result = db.mindmaps.insert_one(mindmap_record)
+    mindmap_id = str(result.inserted_id)
+    if subtrees:
+        db.mindmap_subtrees.insert_many([{
+            'mindmap_id': mindmap_id,
+            'user_id': job['user_id'],
+            'node_id': node_id,
+            'nodes': subtree['nodes'],
+            'edges': subtree['edges']
+        } for node_id, subtree in subtrees.items()])
+    logger.info(f"✅ Mindmap saved to database with ID: {mindmap_id} ({len(subtrees)} subtrees)")
+
+    return {
+        'success': True,
+        'message': 'Mind map generated successfully!',
+        'mindmap_id': mindmap_id,
+        # Subtrees are fetched one at a time from /mindmap/<id>/subtree/<node_id>
+        'data': {key: value for key, value in mindmap_data.items() if key != 'subtrees'}
+    }
+
+def save_flowchart(job, flowchart_data):
+    """Save a generated flowchart (mindmaps collection with type='flowchart')"""
+    logger.info(f"✅ Flowchart generated: {len(flowchart_data['nodes'])} nodes, {len(flowchart_data['edges'])} edges")
+
+    flowchart_record = {
+        'user_id': job['user_id'],
+        'document_id': job['document_id'],
+        'document_name': job['document_name'],
+        'title': flowchart_data['title'],
+        'nodes': flowchart_data['nodes'],
+        'edges': flowchart_data['edges'],
+        'node_count': len(flowchart_data['nodes']),
+        'edge_count': len(flowchart_data['edges']),
+        'canvas_width': flowchart_data.get('canvas_width'),
+        'canvas_height': flowchart_data.get('canvas_height'),
+        'type': 'flowchart',
+        'created_at': datetime.utcnow()
+    }
+
+    result = db.mindmaps.insert_one(flowchart_record)
+    flowchart_id = str(result.inserted_id)
+    logger.info(f"✅ Flowchart saved to database with ID: {flowchart_id}")
+
+    return {
+        'success': True,
+        'message': 'Flowchart generated successfully!',
+        'mindmap_id': flowchart_id,
+        'data': flowchart_data
+    }
+
+result_cache = ResultCache(
+    collection=db.result_cache if db is not None else None,
+    max_entries=RESULT_CACHE_SIZE,
+    max_stored=RESULT_CACHE_STORED,
+    ttl_seconds=RESULT_CACHE_TTL
+)
+
+job_queue = JobQueue(
+    store=MongoJobStore(db.jobs) if db is not None else MemoryJobStore(),
+    executor_factory=partial(create_executor, JOB_EXECUTOR, max_workers=JOB_WORKERS, prewarm=JOB_PREWARM_MODELS),
+    on_complete=save_action_result,
+    cache=result_cache
+)
+
+if db is not None:
+    try:
+        db.mindmap_subtrees.create_index([('mindmap_id', 1), ('node_id', 1)], unique=True)
     except Exception as e:
-        logger.error(f"❌ Quiz generation error: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        logger.info("="*60)
-        return jsonify({'error': f'Failed to generate quiz: {str(e)}'}), 500
+        logger.warning(f"⚠️ Mindmap subtree index not created: {e}")
+    try:
+        db.upload_progress.create_index('updated_at', expireAfterSeconds=UPLOAD_PROGRESS_TTL)
+    except Exception as e:
+        logger.warning(f"⚠️ Upload progress TTL index not created: {e}")
+
+# ==================== JOB ROUTES ====================
 
-def handle_create_mindmap(current_user, document, text):
-    """Handle mind map creation action"""
+@uploads_bp.route('/jobs/<job_id>', methods=['GET'])
+@token_required
+def get_job_status(current_user, job_id):
+    """Get the status of a queued action"""
     try:
-        logger.info(f"🧠 Starting mindmap creation...")
-        
-        # Generate mind map
-        title = document['original_filename'].rsplit('.', 1)[0]
-        logger.info(f"🤖 Generating mindmap with AI model...")
-        mindmap_data = generate_mindmap(text, title=title)
-        logger.info(f"✅ Mindmap generated: {len(mindmap_data['nodes'])} nodes, {len(mindmap_data['edges'])} edges")
-        
-        # Save to database
-        mindmap_record = {
-            'user_id': current_user['_id'],
-            'document_id': str(document['_id']),
-            'document_name': document['original_filename'],
-            'title': mindmap_data['title'],
-            'nodes': mindmap_data['nodes'],
-            'edges': mindmap_data['edges'],
-            'type': 'mindmap',
-            'created_at': datetime.utcnow()
-        }
-        
-        result = db.mindmaps.insert_one(mindmap_record)
-        mindmap_id = str(result.inserted_id)
-        
-        logger.info(f"✅ Mindmap saved to database with ID: {mindmap_id}")
-        logger.info("="*60)
-        
+        job = job_queue.get(job_id, current_user['_id'])
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+
         return jsonify({
             'success': True,
-            'message': 'Mind map generated successfully!',
-            'mindmap_id': mindmap_id,
-            'data': mindmap_data
+            'job_id': job_id,
+            'action': job['action'],
+            'document_id': job['document_id'],
+            'status': job['status'],
+            'error': job.get('error'),
+            'created_at': job['created_at'].isoformat(),
+            'finished_at': job['finished_at'].isoformat() if job.get('finished_at') else None
         }), 200
-        
     except Exception as e:
-        logger.error(f"❌ Mind map generation error: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        logger.info("="*60)
-        return jsonify({'error': f'Failed to generate mind map: {str(e)}'}), 500
+        logger.error(f"Error fetching job: {str(e)}")
+        return jsonify({'error': 'Failed to fetch job'}), 500
 
-def handle_create_flowchart(current_user, document, text):
-    """Handle flowchart creation action"""
+@uploads_bp.route('/jobs/<job_id>/result', methods=['GET'])
+@token_required
+def get_job_result(current_user, job_id):
+    """Get the result of a finished action (202 while still pending)"""
     try:
-        logger.info(f"📊 Starting flowchart creation...")
-        
-        # Generate flowchart
-        title = document['original_filename'].rsplit('.', 1)[0]
-        logger.info(f"🤖 Generating flowchart with AI model...")
-        flowchart_data = generate_flowchart(text, title=title)
-        logger.info(f"✅ Flowchart generated: {len(flowchart_data['nodes'])} nodes, {len(flowchart_data['edges'])} edges")
-        
-        # Save to database (using mindmaps collection with type='flowchart')
-        flowchart_record = {
-            'user_id': current_user['_id'],
-            'document_id': str(document['_id']),
-            'document_name': document['original_filename'],
-            'title': flowchart_data['title'],
-            'nodes': flowchart_data['nodes'],
-            'edges': flowchart_data['edges'],
-            'type': 'flowchart',
-            'created_at': datetime.utcnow()
-        }
-        
-        result = db.mindmaps.insert_one(flowchart_record)
-        flowchart_id = str(result.inserted_id)
-        
-        logger.info(f"✅ Flowchart saved to database with ID: {flowchart_id}")
-        logger.info("="*60)
-        
-        return jsonify({
-            'success': True,
-            'message': 'Flowchart generated successfully!',
-            'mindmap_id': flowchart_id,
-            'data': flowchart_data
-        }), 200
-        
+        job = job_queue.get(job_id, current_user['_id'])
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+
+        if job['status'] == JOB_COMPLETED:
+            return jsonify(job['result']), 200
+        if job['status'] == JOB_FAILED:
+            return jsonify({'error': f"Failed to perform {job['action']}: {job['error']}"}), 500
+
+        return jsonify({'success': True, 'job_id': job_id, 'status': job['status']}), 202
     except Exception as e:
-        logger.error(f"❌ Flowchart generation error: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        logger.info("="*60)
-        return jsonify({'error': f'Failed to generate flowchart: {str(e)}'}), 500
+        logger.error(f"Error fetching job result: {str(e)}")
+        return jsonify({'error': 'Failed to fetch job result'}), 500
+
+@uploads_bp.route('/cache/stats', methods=['GET'])
+@token_required
+def get_cache_stats(current_user):
+    """Hit/miss counters for the artifact and Gemini response caches"""
+    return jsonify({
+        'success': True,
+        'result_cache': result_cache.stats(),
+        'gemini': get_preprocessing_stats()
+    }), 200
+
+@uploads_bp.route('/models/stats', methods=['GET'])
+@token_required
+def get_model_stats(current_user):
+    """
+    Load time and resident memory per model for this process, and the stats
+    each job worker reported with its latest finished job (never queues work)
+    """
+    return jsonify({
+        'success': True,
+        'web': model_stats(),
+        'workers': job_queue.reported_worker_stats()
+    }), 200
+
+# ==================== STREAMING SUMMARY ====================
+
+# Comment lines keep proxies from closing a stream while the job is queued
+STREAM_KEEPALIVE_SECONDS = 15
+
+def sse_event(event, data):
+    """One server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@uploads_bp.route('/summary/stream/<document_id>', methods=['POST'])
+@token_required
+def stream_summary(current_user, document_id):
+    """
+    Queue a summarize job and relay its progress as server-sent events:
+    draft (raw-text summary), summary (after preprocessing), key_points,
+    then done with the saved summary - the same payload as the job result.
+    The models run in the job worker; this request only waits on the events.
+    """
+    if db is None:
+        return jsonify({'error': 'Database connection failed'}), 500
+
+    try:
+        document = db.documents.find_one({
+            '_id': ObjectId(document_id),
+            'user_id': current_user['_id']
+        })
+    except Exception:
+        document = None
+    if not document:
+        return jsonify({'error': 'Document not found or access denied'}), 404
+
+    text_error = document_text_error(document)
+    if text_error:
+        return jsonify({'error': text_error}), 400
+
+    params = get_action_params('summarize')
+    length_error = summary_length_error(params)
+    if length_error:
+        return jsonify({'error': length_error}), 400
+
+    user_id = current_user['_id']
+    events = job_queue.event_queue()
+    job_id = job_queue.enqueue(user_id, document, 'summarize', params, events=events)
+
+    def stream():
+        try:
+            streamed = set()
+            while True:
+                try:
+                    event, data = events.get(timeout=STREAM_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                if event == JOB_FINISHED_EVENT:
+                    break
+                streamed.add(event)
+                yield sse_event(event, data)
+
+            job = job_queue.get(job_id, user_id)
+            if job['status'] != JOB_COMPLETED:
+                yield sse_event('error', {'error': f"Failed to summarize: {job.get('error')}"})
+                return
+
+            # A cached ranking finishes without progress events
+            result = job['result']
+            if 'summary' not in streamed:
+                yield sse_event('summary', {
+                    'summary': result['data']['summary'],
+                    'summary_length': result['data']['stats']['summary_length'],
+                    'preprocessed_with_gemini': result['data']['preprocessed_with_gemini']
+                })
+                yield sse_event('key_points', {'key_points': result['data']['key_points']})
+            yield sse_event('done', result)
+        except Exception as e:
+            logger.error(f"❌ Streaming summary failed: {e}")
+            yield sse_event('error', {'error': f'Failed to summarize: {e}'})
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # keep reverse proxies from buffering the stream
+    })
 
 # ==================== FETCH ROUTES ====================
 
@@ -498,7 +794,8 @@ def get_summaries(current_user):
     """Get all summaries for the current user"""
     try:
         summaries = list(db.summaries.find(
-            {'user_id': current_user['_id']}
+            {'user_id': current_user['_id']},
+            {'ranking': 0}
         ).sort('created_at', -1))
         
         for summary in summaries:
@@ -522,7 +819,7 @@ def get_summary(current_user, summary_id):
         summary = db.summaries.find_one({
             '_id': ObjectId(summary_id),
             'user_id': current_user['_id']
-        })
+        }, {'ranking': 0})
         
         if not summary:
             logger.error(f"❌ Summary not found: {summary_id}")
@@ -539,6 +836,50 @@ def get_summary(current_user, summary_id):
         logger.error(f"Error fetching summary: {str(e)}")
         return jsonify({'error': 'Failed to fetch summary'}), 500
 
+@uploads_bp.route('/summary/<summary_id>/length', methods=['GET'])
+@token_required
+def get_summary_length(current_user, summary_id):
+    """
+    Another length of a saved summary, selected from its stored ranking
+    (?summary_type=short|medium|long, max_sentences=N, max_chars=N)
+    """
+    params = summary_length_params(request.args)
+    length_error = summary_length_error(params)
+    if length_error:
+        return jsonify({'error': length_error}), 400
+
+    try:
+        summary = db.summaries.find_one({
+            '_id': ObjectId(summary_id),
+            'user_id': current_user['_id']
+        })
+        
+        if not summary:
+            return jsonify({'error': 'Summary not found'}), 404
+        if not summary.get('ranking'):
+            return jsonify({'error': 'This summary was saved without a ranking - generate it again to change its length'}), 409
+        
+        summary_data = summary_from_ranking(summary, **params)
+        return jsonify({
+            'success': True,
+            'summary_id': summary_id,
+            'data': {
+                'summary': summary_data['summary'],
+                'key_points': summary_data['key_points'],
+                'summary_type': summary_data['summary_type'],
+                'max_sentences': summary_data['max_sentences'],
+                'max_chars': summary_data['max_chars'],
+                'stats': {
+                    'original_length': summary_data['original_length'],
+                    'summary_length': summary_data['summary_length'],
+                    'reduction': summary_data['compression_ratio']
+                }
+            }
+        }), 200
+    except Exception as e:
+        logger.error(f"Error selecting summary length: {str(e)}")
+        return jsonify({'error': 'Failed to select summary length'}), 500
+
 @uploads_bp.route('/quizzes', methods=['GET'])
 @token_required
 def get_quizzes(current_user):
@@ -660,13 +1001,22 @@ def submit_quiz(current_user, quiz_id):
         traceback.print_exc()
         return jsonify({'error': 'Failed to submit quiz'}), 500
 
+# List view: metadata and counts only (maps saved before node_count/edge_count are counted by Mongo)
+MINDMAP_LIST_PROJECTION = {
+    'user_id': 1, 'document_id': 1, 'document_name': 1, 'title': 1, 'type': 1, 'created_at': 1,
+    'canvas_width': 1, 'canvas_height': 1, 'subtree_count': 1,
+    'node_count': {'$ifNull': ['$node_count', {'$size': {'$ifNull': ['$nodes', []]}}]},
+    'edge_count': {'$ifNull': ['$edge_count', {'$size': {'$ifNull': ['$edges', []]}}]}
+}
+
 @uploads_bp.route('/mindmaps', methods=['GET'])
 @token_required
 def get_mindmaps(current_user):
-    """Get all mindmaps and flowcharts for the current user"""
+    """Get metadata of all mindmaps and flowcharts for the current user"""
     try:
         mindmaps = list(db.mindmaps.find(
-            {'user_id': current_user['_id']}
+            {'user_id': current_user['_id']},
+            MINDMAP_LIST_PROJECTION
         ).sort('created_at', -1))
         
         for item in mindmaps:
@@ -684,7 +1034,7 @@ def get_mindmaps(current_user):
 @uploads_bp.route('/mindmap/<mindmap_id>', methods=['GET'])
 @token_required
 def get_mindmap(current_user, mindmap_id):
-    """Get a specific mindmap or flowchart"""
+    """Get a specific mindmap or flowchart (collapsed subtrees are fetched separately)"""
     try:
         logger.info(f"🧠 Fetching mindmap: {mindmap_id}")
         mindmap = db.mindmaps.find_one({
@@ -707,6 +1057,27 @@ def get_mindmap(current_user, mindmap_id):
         logger.error(f"Error fetching mindmap: {str(e)}")
         return jsonify({'error': 'Failed to fetch mindmap'}), 500
 
+@uploads_bp.route('/mindmap/<mindmap_id>/subtree/<node_id>', methods=['GET'])
+@token_required
+def get_mindmap_subtree(current_user, mindmap_id, node_id):
+    """Get the children of a collapsed mindmap node, already positioned"""
+    try:
+        subtree = db.mindmap_subtrees.find_one(
+            {'mindmap_id': mindmap_id, 'node_id': node_id, 'user_id': current_user['_id']},
+            {'_id': 0, 'node_id': 1, 'nodes': 1, 'edges': 1}
+        )
+
+        if not subtree:
+            return jsonify({'error': 'Subtree not found'}), 404
+
+        return jsonify({
+            'success': True,
+            'subtree': subtree
+        }), 200
+    except Exception as e:
+        logger.error(f"Error fetching mindmap subtree: {str(e)}")
+        return jsonify({'error': 'Failed to fetch mindmap subtree'}), 500
+
 # Delete routes for content
 @uploads_bp.route('/summary/<summary_id>', methods=['DELETE'])
 @token_required
@@ -755,6 +1126,7 @@ def delete_mindmap(current_user, mindmap_id):
         })
         
         if result.deleted_count == 1:
+            db.mindmap_subtrees.delete_many({'mindmap_id': mindmap_id})
             logger.info(f"✅ Mindmap deleted: {mindmap_id}")
             return jsonify({'success': True, 'message': 'Mindmap deleted'}), 200
         return jsonify({'error': 'Mindmap not found'}), 404
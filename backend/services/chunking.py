@@ -0,0 +1,164 @@
+# services/chunking.py - Split large documents and merge per-chunk preprocessing
+import re
+from collections import Counter, OrderedDict
+
+MARKER_PATTERN = re.compile(r'\[(KEY|FACT|DEF|DATA|CAUSE|EFFECT|LIST|COMPARE):([^\]]*)\]')
+SECTION_BREAK = re.compile(r'\n\s*\n|\n(?=#{1,3}\s)|\n(?=[A-Z][A-Z0-9 ,:&-]{4,}\n)')
+SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+')
+
+def split_into_chunks(text, max_chars=12000):
+    """
+    Split on page/section boundaries (blank lines, markdown headers, ALL-CAPS
+    heading lines) and pack the pieces into chunks of at most max_chars.
+    Oversized pieces are split on sentence boundaries, then hard-cut.
+    """
+    if len(text) <= max_chars:
+        return [text]
+
+    pieces = []
+    for block in SECTION_BREAK.split(text):
+        block = block.strip()
+        if not block:
+            continue
+        if len(block) <= max_chars:
+            pieces.append(block)
+            continue
+        for sentence in SENTENCE_BREAK.split(block):
+            while len(sentence) > max_chars:
+                pieces.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            if sentence:
+                pieces.append(sentence)
+
+    chunks = []
+    current = []
+    current_len = 0
+    for piece in pieces:
+        if current and current_len + len(piece) + 2 > max_chars:
+            chunks.append('\n\n'.join(current))
+            current = []
+            current_len = 0
+        current.append(piece)
+        current_len += len(piece) + 2
+    if current:
+        chunks.append('\n\n'.join(current))
+
+    return chunks
+
+def _marker_key(marker_type, content):
+    content = content.strip().lower()
+    # Definitions of the same term from different chunks count as duplicates
+    if marker_type == 'DEF' and '=' in content:
+        content = content.split('=', 1)[0].strip()
+    return marker_type, re.sub(r'\s+', ' ', content)
+
+def merge_marked_text(outputs):
+    """Concatenate summary/quiz chunk outputs, dropping repeated markers and headers"""
+    seen_markers = set()
+    seen_headers = set()
+    lines = []
+
+    for output in outputs:
+        for line in output.split('\n'):
+            stripped = line.strip()
+
+            if stripped.startswith('#'):
+                header = re.sub(r'^#+\s*', '', stripped).lower()
+                if header in seen_headers:
+                    continue
+                seen_headers.add(header)
+                lines.append(stripped)
+                continue
+
+            markers = MARKER_PATTERN.findall(stripped)
+            if markers and not MARKER_PATTERN.sub('', stripped).strip():
+                # Marker-only line: keep the markers not seen in earlier chunks
+                fresh = []
+                for marker_type, content in markers:
+                    key = _marker_key(marker_type, content)
+                    if key not in seen_markers:
+                        seen_markers.add(key)
+                        fresh.append(f'[{marker_type}: {content.strip()}]')
+                if fresh:
+                    lines.append(' '.join(fresh))
+                continue
+
+            for marker_type, content in markers:
+                seen_markers.add(_marker_key(marker_type, content))
+            lines.append(line)
+        lines.append('')
+
+    merged = '\n'.join(lines)
+    return re.sub(r'\n{3,}', '\n\n', merged).strip()
+
+def merge_mindmap_structures(outputs):
+    """Merge per-chunk CENTRAL/MAIN/SUB outlines into one renumbered outline"""
+    centrals = Counter()
+    mains = OrderedDict()
+
+    for output in outputs:
+        current = None
+        for line in output.split('\n'):
+            line = line.strip()
+            central = re.match(r'#\s*CENTRAL[:\s]+(.+)', line, re.I)
+            if central:
+                centrals[central.group(1).strip()] += 1
+                continue
+            main = re.match(r'##\s*(?:MAIN\s*\d+[:\s]+)?(.+)', line, re.I)
+            if main and not line.startswith('###'):
+                label = main.group(1).strip()
+                current = label.lower()
+                if current not in mains:
+                    mains[current] = (label, [])
+                continue
+            sub = re.match(r'###\s*(?:SUB\s*[\d.]+[:\s]+)?(.+)', line, re.I)
+            if sub and current:
+                label = sub.group(1).strip()
+                subs = mains[current][1]
+                if label.lower() not in (s.lower() for s in subs):
+                    subs.append(label)
+
+    if not centrals and not mains:
+        return '\n\n'.join(outputs)
+
+    lines = []
+    if centrals:
+        lines.append(f"# CENTRAL: {centrals.most_common(1)[0][0]}")
+        lines.append('')
+    for i, (label, subs) in enumerate(mains.values(), 1):
+        lines.append(f"## MAIN {i}: {label}")
+        for j, sub in enumerate(subs, 1):
+            lines.append(f"### SUB {i}.{j}: {sub}")
+        lines.append('')
+    return '\n'.join(lines).strip()
+
+def merge_flowchart_structures(outputs):
+    """Concatenate per-chunk STEP/DECISION lists in order, renumbered"""
+    lines = []
+    step_no = 0
+    decision_no = 0
+
+    for output in outputs:
+        for line in output.split('\n'):
+            line = line.strip()
+            step = re.match(r'##\s*STEP\s*\d+[:\s]+(.+)', line, re.I)
+            if step:
+                step_no += 1
+                lines.append(f"## STEP {step_no}: {step.group(1).strip()}")
+                continue
+            decision = re.match(r'##\s*DECISION\s*\d*[:\s]+(.+)', line, re.I)
+            if decision:
+                decision_no += 1
+                lines.append(f"## DECISION {decision_no}: {decision.group(1).strip()}")
+
+    if not lines:
+        return '\n\n'.join(outputs)
+    return '\n\n'.join(lines)
+
+def merge_chunk_outputs(feature_type, outputs):
+    """Reduce step: one document-level representation per feature"""
+    if feature_type == 'mindmap':
+        return merge_mindmap_structures(outputs)
+    if feature_type == 'flowchart':
+        return merge_flowchart_structures(outputs)
+    return merge_marked_text(outputs)
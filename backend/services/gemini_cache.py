@@ -0,0 +1,191 @@
+# services/gemini_cache.py - Disk-backed cache of Gemini preprocessing responses
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ('hits', 'rejected_hits', 'misses', 'stores', 'evictions')
+
+def make_gemini_key(feature_type, prompt_version, text):
+    """Key for one preprocessing request: feature, prompt version, input hash"""
+    text_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    return f"{feature_type}:v{prompt_version}:{text_hash}"
+
+class GeminiResponseCache:
+    """
+    SQLite file shared by every worker process. Stores the accepted output
+    or the rejection verdict, so a known-bad response is never re-requested.
+    """
+
+    def __init__(self, path, max_bytes=50 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.available = True
+
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with self._connect() as conn:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS responses (
+                        key TEXT PRIMARY KEY,
+                        feature_type TEXT,
+                        accepted INTEGER,
+                        output TEXT,
+                        reason TEXT,
+                        size INTEGER,
+                        created_at REAL,
+                        last_used REAL
+                    )""")
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_last_used ON responses (last_used)')
+                conn.execute('CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)')
+                conn.execute('CREATE TABLE IF NOT EXISTS claims (key TEXT PRIMARY KEY, expires_at REAL)')
+                conn.executemany(
+                    'INSERT OR IGNORE INTO counters (name, value) VALUES (?, 0)',
+                    [(name,) for name in COUNTERS]
+                )
+            logger.info(f"✅ Gemini response cache: {path}")
+        except Exception as e:
+            logger.warning(f"⚠️ Gemini response cache disabled: {e}")
+            self.available = False
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call keeps this safe across forked workers
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _bump(self, conn, name, amount=1):
+        conn.execute('UPDATE counters SET value = value + ? WHERE name = ?', (amount, name))
+
+    def get(self, key):
+        """Return (accepted, output, reason) or None on a miss"""
+        if not self.available:
+            return None
+
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    'SELECT accepted, output, reason FROM responses WHERE key = ?', (key,)
+                ).fetchone()
+                if row is None:
+                    self._bump(conn, 'misses')
+                    return None
+
+                conn.execute('UPDATE responses SET last_used = ? WHERE key = ?', (time.time(), key))
+                self._bump(conn, 'hits' if row[0] else 'rejected_hits')
+                return bool(row[0]), row[1], row[2]
+        except Exception as e:
+            logger.warning(f"⚠️ Gemini cache lookup failed: {e}")
+            return None
+
+    def has(self, key):
+        """True if a response or verdict is stored (does not touch counters)"""
+        if not self.available:
+            return False
+
+        try:
+            with self._connect() as conn:
+                return conn.execute('SELECT 1 FROM responses WHERE key = ?', (key,)).fetchone() is not None
+        except Exception as e:
+            logger.warning(f"⚠️ Gemini cache lookup failed: {e}")
+            return False
+
+    def claim(self, key, ttl=120):
+        """Mark a request as in flight - False if another worker already holds it"""
+        if not self.available:
+            return True
+
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute('DELETE FROM claims WHERE key = ? AND expires_at < ?', (key, now))
+                cursor = conn.execute(
+                    'INSERT OR IGNORE INTO claims (key, expires_at) VALUES (?, ?)', (key, now + ttl)
+                )
+                return cursor.rowcount == 1
+        except Exception as e:
+            logger.warning(f"⚠️ Gemini cache claim failed: {e}")
+            return True
+
+    def release(self, key):
+        if not self.available:
+            return
+
+        try:
+            with self._connect() as conn:
+                conn.execute('DELETE FROM claims WHERE key = ?', (key,))
+        except Exception as e:
+            logger.warning(f"⚠️ Gemini cache release failed: {e}")
+
+    def put(self, key, feature_type, accepted, output, reason):
+        if not self.available:
+            return
+
+        output = output if accepted else None
+        size = len(output.encode('utf-8')) if output else 0
+        now = time.time()
+
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO responses '
+                    '(key, feature_type, accepted, output, reason, size, created_at, last_used) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (key, feature_type, int(accepted), output, reason, size, now, now)
+                )
+                self._bump(conn, 'stores')
+                self._evict(conn)
+        except Exception as e:
+            logger.warning(f"⚠️ Gemini cache store failed: {e}")
+
+    def _evict(self, conn):
+        """Drop least recently used responses until under max_bytes"""
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = []
+        for key, size in conn.execute('SELECT key, size FROM responses ORDER BY last_used ASC'):
+            evicted.append((key,))
+            total -= size
+            if total <= self.max_bytes * 0.9:
+                break
+
+        conn.executemany('DELETE FROM responses WHERE key = ?', evicted)
+        self._bump(conn, 'evictions', len(evicted))
+        logger.info(f"🧹 Gemini cache evicted {len(evicted)} responses")
+
+    def stats(self):
+        if not self.available:
+            return {'available': False}
+
+        try:
+            with self._connect() as conn:
+                counters = dict(conn.execute('SELECT name, value FROM counters').fetchall())
+                entries, accepted, size = conn.execute(
+                    'SELECT COUNT(*), COALESCE(SUM(accepted), 0), COALESCE(SUM(size), 0) FROM responses'
+                ).fetchone()
+        except Exception as e:
+            logger.warning(f"⚠️ Gemini cache stats failed: {e}")
+            return {'available': False}
+
+        lookups = counters['hits'] + counters['rejected_hits'] + counters['misses']
+        return {
+            'available': True,
+            'entries': entries,
+            'accepted': accepted,
+            'rejected': entries - accepted,
+            'size_bytes': size,
+            'max_bytes': self.max_bytes,
+            'hit_rate': round((counters['hits'] + counters['rejected_hits']) / lookups, 3) if lookups else 0.0,
+            **counters
+        }
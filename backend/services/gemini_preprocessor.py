@@ -1,10 +1,27 @@
 # services/gemini_preprocessor.py - ULTRA FIXED: Complete sentence validation + aggressive rejection
 import logging
 import re
-from config import GEMINI_API_KEY
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import (
+    GEMINI_API_KEY, GEMINI_CACHE_PATH, GEMINI_CACHE_MAX_MB, GEMINI_COMBINED_MODE,
+    GEMINI_CHUNK_WORKERS, GEMINI_MAX_CHUNKS
+)
+from services.gemini_cache import GeminiResponseCache, make_gemini_key
+from services.chunking import split_into_chunks, merge_chunk_outputs
+from services.text_normalization import (
+    MARKER_OPEN_RE, SENTENCE_SPLIT_RE, clean_broken_pdf_text, clean_preprocessing_markers,
+    extract_marker_content, sentence_flags
+)
 
 logger = logging.getLogger(__name__)
 
+# Bump a feature's version whenever its prompt template changes
+PROMPT_VERSIONS = {'summary': 1, 'quiz': 1, 'mindmap': 1, 'flowchart': 1}
+GEMINI_INPUT_CHARS = 12000
+
+response_cache = GeminiResponseCache(GEMINI_CACHE_PATH, max_bytes=GEMINI_CACHE_MAX_MB * 1024 * 1024)
+
 gemini_model = None
 GEMINI_AVAILABLE = False
 
@@ -21,52 +38,33 @@ try:
 except Exception as e:
     logger.warning(f"⚠️ Gemini AI not available: {e}")
 
-def clean_broken_pdf_text(text):
-    """Fix common PDF extraction issues - ENHANCED"""
-    text = re.sub(r'\s+', ' ', text)
-    text = re.sub(r'\b(is|are|was|were)\s+a\s*,\s*', r'\1 a distributed ledger technology, ', text)
-    text = re.sub(r'\b(is|are|was|were)\s*,\s*', r'\1 ', text)
-    text = re.sub(r'\s+,\s+', ', ', text)
-    text = re.sub(r'\s+\.\s+', '. ', text)
-    text = re.sub(r'\s+([,;.!?])', r'\1', text)
-    text = re.sub(r'^##\s+', '', text, flags=re.MULTILINE)
-    text = re.sub(r'\.{2,}', '.', text)
-    text = re.sub(r'([.!?])([A-Z])', r'\1 \2', text)
-    return text.strip()
-
 def validate_sentence_completeness(text):
     """🔥 CRITICAL: Ultra-strict validation - reject ANY incomplete patterns"""
     if not text or len(text) < 20:
         return False, "Text too short"
     
-    sentences = re.split(r'[.!?]+', text)
+    sentences = SENTENCE_SPLIT_RE.split(text)
     incomplete_count = 0
     broken_patterns = []
     
+    # Each check counts once per sentence; all of them come from one sentence_flags call
+    checks = [
+        ('dangling_definition', 'Incomplete definition'),  # "is a ," or "are a ," - ABSOLUTE REJECTION
+        ('spaced_comma', 'Orphan comma'),                  # Orphan commas in middle
+        ('article_ending', 'Incomplete end'),              # Sentence ends with article
+        ('lowercase_start', 'No capital'),                 # Starts with lowercase
+    ]
+    
     for sent in sentences:
         sent = sent.strip()
         if len(sent) < 10:
             continue
         
-        # Pattern 1: "is a ," or "are a ," - ABSOLUTE REJECTION
-        if re.search(r'\b(is|are|was|were)\s+a\s*[,.]?\s*$', sent):
-            incomplete_count += 1
-            broken_patterns.append(f"Incomplete definition: '{sent[:60]}'")
-        
-        # Pattern 2: Orphan commas in middle
-        if re.search(r'\s+,\s+\w', sent):
-            incomplete_count += 1
-            broken_patterns.append(f"Orphan comma: '{sent[:60]}'")
-        
-        # Pattern 3: Sentence ends with article
-        if re.match(r'.+\b(a|an|the)\s*$', sent, re.I):
-            incomplete_count += 1
-            broken_patterns.append(f"Incomplete end: '{sent[:60]}'")
-        
-        # Pattern 4: Starts with lowercase (except after colon)
-        if sent and sent[0].islower():
-            incomplete_count += 1
-            broken_patterns.append(f"No capital: '{sent[:60]}'")
+        flags = sentence_flags(sent)
+        for flag, label in checks:
+            if flag in flags:
+                incomplete_count += 1
+                broken_patterns.append(f"{label}: '{sent[:60]}'")
     
     total_sentences = len([s for s in sentences if len(s.strip()) > 10])
     if total_sentences == 0:
@@ -91,7 +89,7 @@ def validate_gemini_output(text, original_text):
         return False, f"Output too short: {len(text)} vs {len(original_text)}"
     
     # Check 2: Markers (for structured tasks)
-    marker_count = len(re.findall(r'\[(?:KEY|FACT|DEF|DATA):', text))
+    marker_count = len(MARKER_OPEN_RE.findall(text))
     if marker_count < 3:
         logger.warning(f"⚠️ Few markers: {marker_count}")
     
@@ -113,32 +111,233 @@ def validate_gemini_output(text, original_text):
     logger.info(f"✅ Gemini output validated: {msg}")
     return True, "All checks passed"
 
-def clean_preprocessing_markers(text):
-    """Remove ALL Gemini preprocessing markers"""
-    text = re.sub(r'\[KEY:[^\]]*\]', '', text)
-    text = re.sub(r'\[FACT:[^\]]*\]', '', text)
-    text = re.sub(r'\[DEF:[^\]]*\]', '', text)
-    text = re.sub(r'\[DATA:[^\]]*\]', '', text)
-    text = re.sub(r'\[CAUSE:[^\]]*\]', '', text)
-    text = re.sub(r'\[EFFECT:[^\]]*\]', '', text)
-    text = re.sub(r'\[LIST:[^\]]*\]', '', text)
-    text = re.sub(r'\[COMPARE:[^\]]*\]', '', text)
-    text = re.sub(r'##\s*MAIN TOPIC\s*\d+:', '', text)
-    text = re.sub(r'###\s*Subtopic\s*[\d.]+:', '', text)
-    text = re.sub(r'#\s*CENTRAL CONCEPT:', '', text)
-    text = re.sub(r'##\s*STEP\s*\d+:', '', text)
-    text = re.sub(r'##\s*DECISION:', '', text)
-    text = re.sub(r'\?\?\?+', '', text)
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    text = re.sub(r' {2,}', ' ', text)
-    text = re.sub(r'^\s*[-=*]+\s*$', '', text, flags=re.MULTILINE)
-    return text.strip()
-
-def extract_marker_content(text, marker_type):
-    """Extract content from specific markers"""
-    pattern = rf'\[{marker_type}:([^\]]+)\]'
-    matches = re.findall(pattern, text)
-    return [m.strip() for m in matches]
+def validate_mindmap_output(text):
+    """Reject mindmap structures with garbage labels"""
+    garbage_count = 0
+    garbage_count += text.lower().count('blockchain sub')
+    garbage_count += text.lower().count('technology main')
+    garbage_count += text.lower().count('sub technology')
+    garbage_count += text.lower().count('main future')
+    
+    if garbage_count > 2:
+        return False, f"{garbage_count} garbage patterns"
+    
+    if len(text) < 100:
+        return False, "Output too short"
+    
+    return True, "OK"
+
+def validate_flowchart_output(text):
+    """Reject empty flowchart structures"""
+    if len(text) < 100:
+        return False, "Output too short"
+    return True, "OK"
+
+# Each feature's output is validated on its own, whichever request produced it
+FEATURE_VALIDATORS = {
+    'summary': lambda output, text: validate_gemini_output(output, text),
+    'quiz': lambda output, text: validate_gemini_output(output, text),
+    'mindmap': lambda output, text: validate_mindmap_output(output),
+    'flowchart': lambda output, text: validate_flowchart_output(output)
+}
+
+def feature_cache_key(feature_type, text, combined=False):
+    """Key of a feature's single-prompt response, or of its section of a combined response"""
+    version = PROMPT_VERSIONS[feature_type]
+    if combined:
+        version = f"{version}-combined{COMBINED_PROMPT_VERSION}"
+    return make_gemini_key(feature_type, version, text[:GEMINI_INPUT_CHARS])
+
+def is_truncated(response):
+    """True when Gemini stopped at max_output_tokens"""
+    try:
+        reason = response.candidates[0].finish_reason
+    except (AttributeError, IndexError):
+        return False
+    return getattr(reason, 'name', reason) in ('MAX_TOKENS', 2)
+
+def generate_cached(feature_type, text, prompt, generation_config):
+    """Ask Gemini (or the response cache) - returns the accepted output or None"""
+    key = feature_cache_key(feature_type, text)
+    
+    cached = response_cache.get(key)
+    if cached is None:
+        if GEMINI_COMBINED_MODE:
+            # One request for every feature still missing; fills the cache for all of them
+            request_combined(text)
+        # A combined section is used only if it was accepted; otherwise the single prompt runs
+        combined = response_cache.get(feature_cache_key(feature_type, text, combined=True))
+        if combined is not None and combined[0]:
+            cached = combined
+    
+    if cached is not None:
+        accepted, output, reason = cached
+        if accepted:
+            logger.info(f"⚡ Gemini cache hit: {feature_type}")
+            return output
+        logger.warning(f"⚡ Gemini cache: known-bad {feature_type} response ({reason}) - not re-requested")
+        return None
+    
+    response = gemini_model.generate_content(prompt, generation_config=generation_config)
+    structured = response.text.strip()
+    truncated = is_truncated(response)
+    logger.info(f"🤖 Gemini output: {len(structured)} chars{' (truncated)' if truncated else ''}")
+    
+    is_valid, reason = FEATURE_VALIDATORS[feature_type](structured, text)
+    if truncated:
+        # Cut off at the token limit: usable this time, never cached
+        logger.warning(f"⚠️ Gemini {feature_type} output hit max_output_tokens - not cached")
+    else:
+        response_cache.put(key, feature_type, is_valid, structured, reason)
+    
+    if not is_valid:
+        logger.error(f"❌ GEMINI OUTPUT REJECTED ({feature_type}): {reason}")
+        return None
+    
+    return structured
+
+# ==================== COMBINED PREPROCESSING ====================
+
+COMBINED_PROMPT_VERSION = 2
+COMBINED_WAIT_SECONDS = 90
+COMBINED_MAX_OUTPUT_TOKENS = 8192   # gemini-2.0-flash output limit
+COMBINED_END_MARKER = "===== END ====="
+
+# Output budget of each section; a combined request only takes the sections that fit
+COMBINED_SECTION_TOKENS = {'summary': 3200, 'quiz': 2600, 'mindmap': 1000, 'flowchart': 1000}
+
+COMBINED_SECTION_RULES = {
+    'summary': """Restructure the text for summarization.
+- EVERY sentence must be complete: subject + verb + object (never "X is a ,")
+- Remove noise (headers, footers, page numbers)
+- Create clear sections with ## headers
+- Mark key concepts: [KEY: concept]
+- Mark definitions: [DEF: term = complete definition]
+- Mark facts: [FACT: complete statement]""",
+    'quiz': """Extract complete, testable facts.
+- Start with "## KEY DEFINITIONS" then "## FACTUAL CONTENT"
+- Definitions: [DEF: Term = Complete definition in one clear sentence]
+- Facts: [FACT: Complete factual statement with full details]
+- Data: [DATA: Specific number with full context]
+- ONLY include facts you can state COMPLETELY""",
+    'mindmap': """Create a clean hierarchy for a mind map, 2-4 word labels only.
+# CENTRAL: <central concept>
+## MAIN 1: <main topic>
+### SUB 1.1: <subtopic>
+- NO "sub", NO "main" inside labels, NO generic or repeated words""",
+    'flowchart': """Extract the process with clear decision points.
+## STEP 1: <action, max 10 words, starts with a verb>
+## DECISION 1: <yes/no question, max 12 words, ends with ?>
+- Find 6-10 decision points, COMPLETE sentences only"""
+}
+
+def section_delimiter(feature_type):
+    return f"===== {feature_type.upper()} ====="
+
+def build_combined_prompt(text, feature_types):
+    sections = '\n\n'.join(
+        f"{section_delimiter(feature)}\n{COMBINED_SECTION_RULES[feature]}\n"
+        f"- At most {COMBINED_SECTION_TOKENS[feature] * 2 // 3} words"
+        for feature in feature_types
+    )
+    return f"""Prepare this text for several study tools in ONE response.
+
+TEXT:
+{text[:GEMINI_INPUT_CHARS]}
+
+Produce one section per tool below. Start each section with its delimiter line
+EXACTLY as written (e.g. "{section_delimiter(feature_types[0])}") and follow that section's rules.
+
+{sections}
+
+End the response with the line "{COMBINED_END_MARKER}".
+
+🔥 CRITICAL: Return ONLY the delimited sections. NO incomplete sentences. NO commentary."""
+
+def parse_combined_response(response_text, feature_types, truncated=False):
+    """
+    Split a combined response into {feature_type: section text}. Without the
+    end marker (or when truncated) the last section may be cut off, so it is dropped.
+    """
+    end = re.search(rf'^\s*{re.escape(COMBINED_END_MARKER)}\s*$', response_text, flags=re.MULTILINE)
+    complete = end is not None and not truncated
+    if end is not None:
+        response_text = response_text[:end.start()]
+    
+    delimiters = '|'.join(re.escape(section_delimiter(feature)) for feature in feature_types)
+    parts = re.split(rf'^\s*({delimiters})\s*$', response_text, flags=re.MULTILINE)
+    
+    sections = {}
+    # parts = [preamble, delimiter, body, delimiter, body, ...]
+    pairs = list(zip(parts[1::2], parts[2::2]))
+    if not complete:
+        pairs = pairs[:-1]
+    for delimiter, body in pairs:
+        feature = delimiter.strip('= ').lower()
+        body = body.strip()
+        if feature in feature_types and body and feature not in sections:
+            sections[feature] = body
+    return sections
+
+def has_response(feature_type, text):
+    """A single-prompt response or a combined section is cached for this feature"""
+    return (response_cache.has(feature_cache_key(feature_type, text))
+            or response_cache.has(feature_cache_key(feature_type, text, combined=True)))
+
+def fit_sections(feature_types):
+    """The features, in order, whose section budgets fit in one response"""
+    chosen, budget = [], 0
+    for feature in feature_types:
+        if budget + COMBINED_SECTION_TOKENS[feature] <= COMBINED_MAX_OUTPUT_TOKENS:
+            chosen.append(feature)
+            budget += COMBINED_SECTION_TOKENS[feature]
+    return chosen, budget
+
+def request_combined(text, feature_types=None):
+    """
+    Preprocess several features with one Gemini call. Sections are validated
+    independently and cached under per-feature combined keys; truncated
+    sections are not cached. Returns True if the cache may now hold them.
+    """
+    feature_types = feature_types or list(PROMPT_VERSIONS)
+    missing, max_tokens = fit_sections([f for f in feature_types if not has_response(f, text)])
+    if len(missing) < 2:
+        return False
+    
+    claim_key = make_gemini_key('combined', COMBINED_PROMPT_VERSION, text[:GEMINI_INPUT_CHARS])
+    if not response_cache.claim(claim_key, ttl=COMBINED_WAIT_SECONDS):
+        # Another worker is already making this request - wait for its results
+        logger.info("⏳ Combined Gemini request in flight - waiting")
+        deadline = time.time() + COMBINED_WAIT_SECONDS
+        while time.time() < deadline:
+            if all(has_response(f, text) for f in missing):
+                return True
+            time.sleep(0.5)
+        return False
+    
+    try:
+        logger.info(f"🤖 Combined Gemini request for: {', '.join(missing)}")
+        response = gemini_model.generate_content(
+            build_combined_prompt(text, missing),
+            generation_config={'temperature': 0.1, 'max_output_tokens': max_tokens}
+        )
+        sections = parse_combined_response(response.text.strip(), missing, truncated=is_truncated(response))
+        
+        for feature, output in sections.items():
+            is_valid, reason = FEATURE_VALIDATORS[feature](output, text)
+            response_cache.put(feature_cache_key(feature, text, combined=True), feature, is_valid, output, reason)
+            logger.info(f"{'✅' if is_valid else '❌'} Combined section {feature}: {len(output)} chars ({reason})")
+        
+        # Missing or cut-off sections are left uncached and requested individually
+        for feature in missing:
+            if feature not in sections:
+                logger.warning(f"⚠️ Combined response had no complete {feature} section")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Combined preprocessing failed: {e}")
+        return False
+    finally:
+        response_cache.release(claim_key)
 
 def preprocess_for_summary(text):
     """🔥 CRITICAL: Preprocess for summarization with STRICT validation"""
@@ -158,7 +357,7 @@ def preprocess_for_summary(text):
         prompt = f"""Fix and restructure this text for AI summarization. CRITICAL: Every sentence MUST be complete.
 
 TEXT:
-{text[:12000]}
+{text[:GEMINI_INPUT_CHARS]}
 
 🔥 ABSOLUTE REQUIREMENTS:
 1. EVERY sentence must have subject + verb + object
@@ -194,23 +393,17 @@ Blockchain technology is a distributed ledger system that records transactions i
 
 🔥 CRITICAL: Return ONLY restructured text. NO incomplete sentences. NO commentary."""
 
-        response = gemini_model.generate_content(
-            prompt,
-            generation_config={'temperature': 0.1, 'max_output_tokens': 8000}
+        # STEP 3: 🔥 CRITICAL - STRICT VALIDATION (verdict is cached with the output)
+        structured = generate_cached(
+            'summary', text, prompt,
+            {'temperature': 0.1, 'max_output_tokens': 8000}
         )
         
-        structured = response.text.strip()
-        logger.info(f"🤖 Gemini output: {len(structured)} chars")
-        
-        # STEP 3: 🔥 CRITICAL - STRICT VALIDATION
-        is_valid, validation_msg = validate_gemini_output(structured, text)
-        
-        if not is_valid:
-            logger.error(f"❌ GEMINI OUTPUT REJECTED: {validation_msg}")
+        if structured is None:
             logger.error(f"❌ FALLBACK TO ORIGINAL TEXT")
             return text
         
-        logger.info(f"✅ Gemini output ACCEPTED: {validation_msg}")
+        logger.info(f"✅ Gemini output ACCEPTED")
         return structured
         
     except Exception as e:
@@ -228,7 +421,7 @@ def preprocess_for_quiz(text):
         prompt = f"""Extract COMPLETE, CLEAR testable facts from this text.
 
 TEXT:
-{text[:12000]}
+{text[:GEMINI_INPUT_CHARS]}
 
 🔥 CRITICAL RULES:
 1. Every sentence must be COMPLETE: subject + verb + object
@@ -251,18 +444,13 @@ FORMAT:
 
 Return ONLY complete facts. NO incomplete sentences."""
 
-        response = gemini_model.generate_content(
-            prompt,
-            generation_config={'temperature': 0.1, 'max_output_tokens': 8000}
+        structured = generate_cached(
+            'quiz', text, prompt,
+            {'temperature': 0.1, 'max_output_tokens': 8000}
         )
         
-        structured = response.text.strip()
-        
-        # Validate
-        is_valid, validation_msg = validate_gemini_output(structured, text)
-        
-        if not is_valid:
-            logger.error(f"❌ Quiz preprocessing REJECTED: {validation_msg}")
+        if structured is None:
+            logger.error(f"❌ Quiz preprocessing REJECTED")
             return text
         
         logger.info(f"✅ Quiz preprocessing: {len(text)} → {len(structured)} chars")
@@ -283,7 +471,7 @@ def preprocess_for_mindmap(text):
         prompt = f"""Create a CLEAN hierarchical structure for mind mapping.
 
 TEXT:
-{text[:12000]}
+{text[:GEMINI_INPUT_CHARS]}
 
 RULES:
 1. Central concept: 2-4 words, MEANINGFUL (e.g., "Blockchain Technology")
@@ -315,26 +503,12 @@ FORMAT:
 
 Use ONLY clear, specific 2-4 word phrases."""
 
-        response = gemini_model.generate_content(
-            prompt,
-            generation_config={'temperature': 0.2, 'max_output_tokens': 6000}
+        structured = generate_cached(
+            'mindmap', text, prompt,
+            {'temperature': 0.2, 'max_output_tokens': 6000}
         )
         
-        structured = response.text.strip()
-        
-        # Validate for garbage
-        garbage_count = 0
-        garbage_count += structured.lower().count('blockchain sub')
-        garbage_count += structured.lower().count('technology main')
-        garbage_count += structured.lower().count('sub technology')
-        garbage_count += structured.lower().count('main future')
-        
-        if garbage_count > 2:
-            logger.error(f"❌ Gemini output has {garbage_count} garbage patterns - REJECTED")
-            return text
-        
-        if len(structured) < 100:
-            logger.warning("⚠️ Output too short")
+        if structured is None:
             return text
         
         logger.info(f"✅ Mindmap preprocessing: {len(text)} → {len(structured)} chars")
@@ -355,7 +529,7 @@ def preprocess_for_flowchart(text):
         prompt = f"""Extract process with CLEAR decision points for flowchart.
 
 TEXT:
-{text[:12000]}
+{text[:GEMINI_INPUT_CHARS]}
 
 TASK:
 1. Find 6-10 decision points (yes/no questions)
@@ -374,14 +548,12 @@ FORMAT:
 
 Return ONLY structured process."""
 
-        response = gemini_model.generate_content(
-            prompt,
-            generation_config={'temperature': 0.2, 'max_output_tokens': 6000}
+        structured = generate_cached(
+            'flowchart', text, prompt,
+            {'temperature': 0.2, 'max_output_tokens': 6000}
         )
         
-        structured = response.text.strip()
-        
-        if len(structured) < 100:
+        if structured is None:
             return text
         
         logger.info(f"✅ Flowchart preprocessing: {len(text)} → {len(structured)} chars")
@@ -400,6 +572,18 @@ def preprocess_text(text, feature_type):
         logger.warning("⚠️ Text too short for preprocessing")
         return text
     
+    if feature_type not in PREPROCESSORS:
+        logger.warning(f"⚠️ Unknown feature type: {feature_type}")
+        return text
+    
+    # Larger than one Gemini request: map over chunks instead of truncating
+    if GEMINI_AVAILABLE and len(text) > GEMINI_INPUT_CHARS:
+        return preprocess_chunked(text, feature_type)
+    
+    return preprocess_single(text, feature_type)
+
+def preprocess_single(text, feature_type):
+    """Preprocess text that fits in one Gemini request"""
     # Check if text is broken BEFORE preprocessing
     broken_indicators = text.count(' , ') + text.count(' . ') + text.count('  ')
     if broken_indicators > 10:
@@ -407,20 +591,8 @@ def preprocess_text(text, feature_type):
         text = clean_broken_pdf_text(text)
         logger.info(f"✅ After cleaning: {len(text)} chars")
     
-    preprocessors = {
-        'summary': preprocess_for_summary,
-        'quiz': preprocess_for_quiz,
-        'mindmap': preprocess_for_mindmap,
-        'flowchart': preprocess_for_flowchart
-    }
-    
-    preprocessor = preprocessors.get(feature_type)
-    if not preprocessor:
-        logger.warning(f"⚠️ Unknown feature type: {feature_type}")
-        return text
-    
     try:
-        result = preprocessor(text)
+        result = PREPROCESSORS[feature_type](text)
         logger.info(f"✅ Output: {len(result)} chars")
         
         # Final validation for summary
@@ -437,6 +609,30 @@ def preprocess_text(text, feature_type):
         logger.error(f"❌ Preprocessing failed: {e}")
         return text
 
+def preprocess_chunked(text, feature_type):
+    """Map-reduce: preprocess chunks concurrently, then merge into one document"""
+    chunks = split_into_chunks(text, GEMINI_INPUT_CHARS)
+    mapped = chunks[:GEMINI_MAX_CHUNKS]
+    logger.info(f"🧩 Chunked preprocessing: {len(chunks)} chunks, {len(mapped)} sent to Gemini "
+                f"({min(GEMINI_CHUNK_WORKERS, len(mapped))} concurrent)")
+    
+    with ThreadPoolExecutor(max_workers=min(GEMINI_CHUNK_WORKERS, len(mapped))) as pool:
+        outputs = list(pool.map(lambda chunk: preprocess_single(chunk, feature_type), mapped))
+    
+    # Chunks past the cap keep their (cleaned) original text
+    outputs += [clean_broken_pdf_text(chunk) for chunk in chunks[GEMINI_MAX_CHUNKS:]]
+    
+    merged = merge_chunk_outputs(feature_type, outputs)
+    logger.info(f"✅ Merged output: {len(merged)} chars")
+    return merged
+
+PREPROCESSORS = {
+    'summary': preprocess_for_summary,
+    'quiz': preprocess_for_quiz,
+    'mindmap': preprocess_for_mindmap,
+    'flowchart': preprocess_for_flowchart
+}
+
 def is_gemini_available():
     return GEMINI_AVAILABLE
 
@@ -444,5 +640,8 @@ def get_preprocessing_stats():
     return {
         'gemini_available': GEMINI_AVAILABLE,
         'api_key_configured': GEMINI_API_KEY is not None,
-        'model': 'gemini-2.0-flash' if GEMINI_AVAILABLE else None
+        'model': 'gemini-2.0-flash' if GEMINI_AVAILABLE else None,
+        'prompt_versions': PROMPT_VERSIONS,
+        'combined_mode': GEMINI_COMBINED_MODE,
+        'response_cache': response_cache.stats()
     }
\ No newline at end of file
@@ -0,0 +1,307 @@
+# services/job_queue.py - Background jobs for document actions
+import logging
+import multiprocessing
+import os
+import queue
+import socket
+import threading
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from services.summarization_service import rank_summary, generate_summary_stream
+from services.quiz_service import generate_quiz
+from services.mindmap_service import generate_mindmap, generate_flowchart
+from services.result_cache import make_cache_key
+from services.model_registry import prewarm_models, model_stats
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+
+# Put on a job's event queue (by the web process) once the job is saved or has failed
+JOB_FINISHED_EVENT = 'finished'
+
+ACTIONS = ('summarize', 'create_quiz', 'create_mindmap', 'create_flowchart')
+
+def process_owner():
+    """Identifies the web process that runs a job: 'host:pid'"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def owner_alive(owner):
+    """False when owner is missing or is a process on this host that no longer exists"""
+    host, _, pid = (owner or '').rpartition(':')
+    if host != socket.gethostname():
+        # Another host's jobs cannot be checked from here
+        return bool(host)
+    try:
+        os.kill(int(pid), 0)
+    except (ProcessLookupError, ValueError):
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def run_action(action, text, title, params, events=None):
+    """
+    Run one generator and return its raw output (executes inside a worker).
+    With an events queue, summaries also put (event, data) progress on it.
+    """
+    if action == 'summarize':
+        # The ranking serves every length; save_summary selects the requested one
+        if events is None:
+            return rank_summary(text)
+        # Same ranking, with draft / summary / key_points for the requested length on the way
+        for event, data in generate_summary_stream(text, **params):
+            if event == 'complete':
+                return data
+            events.put((event, data))
+    if action == 'create_quiz':
+        return generate_quiz(
+            text,
+            num_questions=params.get('num_questions', 10),
+            difficulty=params.get('difficulty', 'medium'),
+            mode=params.get('mode')
+        )
+    if action == 'create_mindmap':
+        return generate_mindmap(
+            text,
+            title=title,
+            max_nodes=params.get('max_nodes', 40),
+            max_depth=params.get('max_depth'),
+            branching=params.get('branching')
+        )
+    if action == 'create_flowchart':
+        return generate_flowchart(text, title=title)
+    raise ValueError(f"Unknown action: {action}")
+
+def run_job(action, text, title, params, events=None):
+    """Worker entry point: the action's output and this worker's model stats"""
+    return run_action(action, text, title, params, events), model_stats()
+
+# ==================== JOB STORES ====================
+
+class MongoJobStore:
+    """Job state persisted in the `jobs` collection"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def create(self, job):
+        self.collection.insert_one(job)
+
+    def update(self, job_id, fields):
+        self.collection.update_one({'_id': job_id}, {'$set': fields})
+
+    def get(self, job_id):
+        return self.collection.find_one({'_id': job_id})
+
+    def unfinished(self):
+        return list(self.collection.find(
+            {'status': {'$in': [JOB_QUEUED, JOB_RUNNING]}},
+            {'_id': 1, 'owner': 1}
+        ))
+
+class MemoryJobStore:
+    """In-process stand-in for MongoJobStore (tests / local debugging)"""
+
+    def __init__(self):
+        self.jobs = {}
+
+    def create(self, job):
+        self.jobs[job['_id']] = dict(job)
+
+    def update(self, job_id, fields):
+        if job_id in self.jobs:
+            self.jobs[job_id].update(fields)
+
+    def get(self, job_id):
+        job = self.jobs.get(job_id)
+        return dict(job) if job else None
+
+    def unfinished(self):
+        return [dict(job) for job in self.jobs.values() if job['status'] in (JOB_QUEUED, JOB_RUNNING)]
+
+# ==================== EXECUTORS ====================
+
+class InlineExecutor:
+    """Runs each job synchronously in the calling process"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+def create_executor(kind='process', max_workers=2, prewarm=()):
+    """Build the executor used to run jobs; each worker pre-warms `prewarm` models"""
+    if kind == 'inline':
+        logger.info("⚙️ Job executor: inline")
+        prewarm_models(list(prewarm))
+        return InlineExecutor()
+    logger.info(f"⚙️ Job executor: process pool ({max_workers} workers)")
+    return ProcessPoolExecutor(max_workers=max_workers, initializer=prewarm_models, initargs=(list(prewarm),))
+
+# ==================== QUEUE ====================
+
+class JobQueue:
+    """Enqueue document actions and track them until their result is saved"""
+
+    def __init__(self, store, executor_factory, on_complete, cache=None):
+        self.store = store
+        self.executor_factory = executor_factory
+        self.executor = executor_factory()
+        self.executor_lock = threading.Lock()
+        self.on_complete = on_complete
+        self.cache = cache
+        self.futures = {}
+        self.worker_stats = {}
+        self.manager = None
+        self.owner = process_owner()
+        self.fail_orphaned()
+
+    def fail_orphaned(self):
+        """Fail jobs left queued/running by a web process that has exited"""
+        try:
+            orphaned = [job['_id'] for job in self.store.unfinished() if not owner_alive(job.get('owner'))]
+        except Exception as e:
+            logger.warning(f"⚠️ Orphaned job check failed: {e}")
+            return 0
+        for job_id in orphaned:
+            self.store.update(job_id, {
+                'status': JOB_FAILED,
+                'error': 'Interrupted by a server restart - please try again',
+                'finished_at': datetime.utcnow()
+            })
+        if orphaned:
+            logger.warning(f"⚠️ Marked {len(orphaned)} orphaned jobs as failed")
+        return len(orphaned)
+
+    def submit(self, *args):
+        """Submit to the executor, replacing a process pool broken by a crashed worker"""
+        executor = self.executor
+        try:
+            return executor.submit(*args)
+        except BrokenProcessPool:
+            with self.executor_lock:
+                if self.executor is executor:
+                    logger.warning("⚠️ Job process pool is broken - starting a new one")
+                    executor.shutdown(wait=False)
+                    self.executor = self.executor_factory()
+                    self.worker_stats.clear()
+                executor = self.executor
+            return executor.submit(*args)
+
+    def event_queue(self):
+        """Queue a job's worker can put progress events on (see run_action)"""
+        if isinstance(self.executor, InlineExecutor):
+            return queue.Queue()
+        with self.executor_lock:
+            if self.manager is None:
+                # Proxied queues can be passed to pool workers
+                self.manager = multiprocessing.Manager()
+        return self.manager.Queue()
+
+    def enqueue(self, user_id, document, action, params, events=None):
+        job_id = uuid.uuid4().hex
+        job = {
+            '_id': job_id,
+            'user_id': user_id,
+            'document_id': str(document['_id']),
+            'document_name': document['original_filename'],
+            'action': action,
+            'params': params,
+            'status': JOB_QUEUED,
+            'owner': self.owner,
+            'result': None,
+            'error': None,
+            'created_at': datetime.utcnow(),
+            'finished_at': None
+        }
+        self.store.create(job)
+
+        text = document.get('extracted_text', '')
+        title = document['original_filename'].rsplit('.', 1)[0]
+
+        # Mindmaps and flowcharts embed the title, so it is part of their key;
+        # a summary ranking does not depend on the requested length
+        if action in ('create_mindmap', 'create_flowchart'):
+            key_params = dict(params, title=title)
+        elif action == 'summarize':
+            key_params = {}
+        else:
+            key_params = params
+        cache_key = make_cache_key(text, action, key_params) if self.cache else None
+
+        cached = self.cache.get(cache_key) if self.cache else None
+        if cached is not None:
+            logger.info(f"⚡ Job {job_id}: cache hit for {action}")
+            future = Future()
+            future.set_running_or_notify_cancel()
+            future.set_result((cached, None))
+            self._finish(job, future, cache_key=None, events=events)
+            return job_id
+
+        future = self.submit(run_job, action, text, title, params, events)
+        self.futures[job_id] = future
+        future.add_done_callback(lambda f: self._finish(job, f, cache_key, events))
+
+        logger.info(f"📥 Job {job_id} queued: {action} on {job['document_id']}")
+        return job_id
+
+    def _finish(self, job, future, cache_key=None, events=None):
+        job_id = job['_id']
+        self.futures.pop(job_id, None)
+        try:
+            data, stats = future.result()
+            if stats:
+                self.worker_stats[stats['pid']] = dict(stats, reported_at=datetime.utcnow().isoformat())
+            if cache_key:
+                self.cache.set(cache_key, data)
+            result = self.on_complete(job, data)
+            self.store.update(job_id, {
+                'status': JOB_COMPLETED,
+                'result': result,
+                'finished_at': datetime.utcnow()
+            })
+            logger.info(f"✅ Job {job_id} completed")
+        except Exception as e:
+            logger.error(f"❌ Job {job_id} failed: {e}")
+            self.store.update(job_id, {
+                'status': JOB_FAILED,
+                'error': str(e),
+                'finished_at': datetime.utcnow()
+            })
+        finally:
+            if events is not None:
+                events.put((JOB_FINISHED_EVENT, None))
+
+    def get(self, job_id, user_id):
+        """Return the job owned by user_id, or None"""
+        job = self.store.get(job_id)
+        if not job or job.get('user_id') != user_id:
+            return None
+
+        future = self.futures.get(job_id)
+        if job['status'] == JOB_QUEUED and future is not None and future.running():
+            job['status'] = JOB_RUNNING
+        return job
+
+    def reported_worker_stats(self):
+        """Model stats each worker sent with its latest finished job"""
+        return sorted(self.worker_stats.values(), key=lambda stats: stats['pid'])
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+        if self.manager is not None:
+            self.manager.shutdown()
@@ -0,0 +1,152 @@
+# services/keyphrase_engine.py - KeyBERT-style keyphrases over a shared embedding cache
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from config import KEYPHRASE_CACHE_SIZE
+from services.model_registry import get_keyword_model
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """LRU of unit-length phrase embeddings, keyed by phrase"""
+
+    def __init__(self, max_entries=KEYPHRASE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0}
+
+    def lookup(self, phrases):
+        """Cached vectors for phrases (None where missing)"""
+        vectors = []
+        with self.lock:
+            for phrase in phrases:
+                vector = self.entries.get(phrase)
+                if vector is None:
+                    self.counters['misses'] += 1
+                else:
+                    self.entries.move_to_end(phrase)
+                    self.counters['hits'] += 1
+                vectors.append(vector)
+        return vectors
+
+    def store(self, phrases, vectors):
+        with self.lock:
+            for phrase, vector in zip(phrases, vectors):
+                self.entries[phrase] = vector
+                self.entries.move_to_end(phrase)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, entries=len(self.entries))
+
+def normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+def mmr(doc_similarity, candidate_matrix, top_n, diversity):
+    """
+    Maximal Marginal Relevance as in KeyBERT, but the similarity of each
+    candidate to the chosen phrases is updated one row at a time instead of
+    building the full candidate x candidate matrix. Like KeyBERT, the chosen
+    indices are returned by (rounded) document similarity, not selection order.
+    """
+    n = len(doc_similarity)
+    top_n = min(top_n, n)
+    chosen = [int(np.argmax(doc_similarity))]
+    remaining = np.ones(n, dtype=bool)
+    remaining[chosen[0]] = False
+    max_to_chosen = candidate_matrix @ candidate_matrix[chosen[0]]
+
+    for _ in range(top_n - 1):
+        scores = (1 - diversity) * doc_similarity - diversity * max_to_chosen
+        scores[~remaining] = -np.inf
+        best = int(np.argmax(scores))
+        chosen.append(best)
+        remaining[best] = False
+        np.maximum(max_to_chosen, candidate_matrix @ candidate_matrix[best], out=max_to_chosen)
+
+    return sorted(chosen, key=lambda i: round(float(doc_similarity[i]), 4), reverse=True)
+
+class KeyphraseEngine:
+    """
+    Keyphrases for several texts from one embedding pass: candidate n-grams
+    of every text are embedded together (cached phrases are not re-embedded),
+    then each text is ranked by cosine similarity, or by MMR with diversity
+    """
+
+    def __init__(self, kw_model, cache=None):
+        self.backend = kw_model.model
+        self.cache = cache or EmbeddingCache()
+        self.analyzers = {}
+
+    def analyzer(self, ngram_range):
+        if ngram_range not in self.analyzers:
+            from sklearn.feature_extraction.text import CountVectorizer
+            # Same candidates KeyBERT's default CountVectorizer produces
+            self.analyzers[ngram_range] = CountVectorizer(ngram_range=ngram_range, stop_words='english').build_analyzer()
+        return self.analyzers[ngram_range]
+
+    def embed(self, texts):
+        return normalize(np.asarray(self.backend.embed(texts), dtype=np.float32))
+
+    def phrase_matrix(self, phrases, texts):
+        """Rows for phrases (cached or newly embedded) and for texts, in one model call"""
+        vectors = self.cache.lookup(phrases)
+        missing = [phrase for phrase, vector in zip(phrases, vectors) if vector is None]
+
+        embedded = self.embed(missing + texts)
+        if missing:
+            self.cache.store(missing, embedded[:len(missing)].copy())
+            new_vectors = dict(zip(missing, embedded[:len(missing)]))
+            vectors = [new_vectors[phrase] if vector is None else vector for phrase, vector in zip(phrases, vectors)]
+        logger.info(f"🔑 Keyphrase embeddings: {len(phrases) - len(missing)} cached, {len(missing)} new, {len(texts)} texts")
+
+        phrase_rows = np.stack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+        return phrase_rows, embedded[len(missing):]
+
+    def extract(self, texts, ngram_range=(2, 4), top_n=5, diversity=None):
+        """[(phrase, similarity), ...] for each text"""
+        if not texts:
+            return []
+        analyzer = self.analyzer(ngram_range)
+        candidates = [sorted(set(analyzer(text))) for text in texts]
+
+        vocabulary = sorted(set().union(*candidates))
+        rows = {phrase: i for i, phrase in enumerate(vocabulary)}
+        matrix, text_vectors = self.phrase_matrix(vocabulary, list(texts))
+
+        results = []
+        for text_phrases, text_vector in zip(candidates, text_vectors):
+            if not text_phrases:
+                results.append([])
+                continue
+            candidate_matrix = matrix[[rows[phrase] for phrase in text_phrases]]
+            similarity = candidate_matrix @ text_vector
+
+            if diversity:
+                chosen = mmr(similarity, candidate_matrix, top_n, diversity)
+            else:
+                chosen = np.argsort(-similarity, kind='stable')[:top_n]
+            results.append([(text_phrases[i], round(float(similarity[i]), 4)) for i in chosen])
+        return results
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_keyphrase_engine():
+    """Engine on the shared KeyBERT sentence model, or None when KeyBERT is unavailable"""
+    global _engine
+    if _engine is None:
+        kw_model = get_keyword_model()
+        if kw_model is None:
+            return None
+        with _engine_lock:
+            if _engine is None:
+                _engine = KeyphraseEngine(kw_model)
+    return _engine
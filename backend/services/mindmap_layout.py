@@ -0,0 +1,191 @@
+# services/mindmap_layout.py - Radial mindmap layout (any depth, no overlaps, content-sized canvas)
+import math
+from collections import defaultdict
+
+# Matches MindMapPage.js: font size per level, wrap width and shape padding
+FONT_SIZES = {0: 20, 1: 16}
+DEFAULT_FONT_SIZE = 14
+WRAP_WIDTH = 200
+CHAR_WIDTH = 0.55         # average glyph width as a fraction of the font size
+PADDING_X = 70
+PADDING_Y = 56
+
+NODE_MARGIN = 40          # minimum gap between two node boxes
+MIN_RING_GAP = 260        # minimum distance between consecutive rings
+CANVAS_MARGIN = 200
+COLLISION_PASSES = 8
+
+def estimate_node_size(node):
+    """(width, height) of a node as the frontend draws it"""
+    font_size = FONT_SIZES.get(node.get('level'), DEFAULT_FONT_SIZE)
+    text_width = 0
+    lines = 0
+    for line in str(node.get('label', '')).split('\n'):
+        width = len(line) * font_size * CHAR_WIDTH
+        text_width = max(text_width, min(width, WRAP_WIDTH))
+        lines += max(1, math.ceil(width / WRAP_WIDTH))
+    text_height = lines * font_size * 1.5
+    if node.get('shape') == 'circle':
+        diameter = max(text_width + 50, text_height + 50, node.get('size', 20) * 3)
+        return diameter, diameter
+    return text_width + PADDING_X, text_height + PADDING_Y
+
+def build_tree(nodes, edges):
+    """
+    Root id, children adjacency and depth of every node, in O(N + E).
+    Edges to unknown nodes are ignored; nodes the root cannot reach
+    (and the roots of other components) hang off the root.
+    """
+    ids = {node['id'] for node in nodes}
+    children = defaultdict(list)
+    has_parent = set()
+    for edge in edges:
+        source, target = edge.get('from'), edge.get('to')
+        if source in ids and target in ids and source != target and target not in has_parent:
+            children[source].append(target)
+            has_parent.add(target)
+
+    root = next((node['id'] for node in nodes if node.get('level') == 0), None)
+    if root is None:
+        root = next((node['id'] for node in nodes if node['id'] not in has_parent), nodes[0]['id'])
+
+    depth = {root: 0}
+    order = [root]
+
+    def walk(start):
+        # Breadth-first from order[start:], appending newly reached nodes
+        for i in range(start, len(order)):
+            node_id = order[i]
+            for child in children[node_id]:
+                if child not in depth:
+                    depth[child] = depth[node_id] + 1
+                    order.append(child)
+
+    walk(0)
+    # Unreached nodes (other components, cycles) are attached to the root
+    for node in nodes:
+        if node['id'] not in depth:
+            children[root].append(node['id'])
+            depth[node['id']] = 1
+            order.append(node['id'])
+            walk(len(order) - 1)
+
+    tree = {node_id: [child for child in children[node_id] if depth[child] == depth[node_id] + 1] for node_id in order}
+    return root, tree, depth, order
+
+def radial_positions(root, tree, depth, order, sizes):
+    """
+    Each node gets an angular wedge proportional to its subtree's leaf count;
+    ring radii grow until every node's wedge is wide enough for its box
+    """
+    # Leaf counts, children before parents
+    leaves = {}
+    for node_id in reversed(order):
+        leaves[node_id] = sum(leaves[child] for child in tree[node_id]) or 1
+
+    wedge = {root: (0.0, 2 * math.pi)}
+    for node_id in order:
+        start, end = wedge[node_id]
+        per_leaf = (end - start) / leaves[node_id]
+        for child in tree[node_id]:
+            span = per_leaf * leaves[child]
+            wedge[child] = (start, start + span)
+            start += span
+
+    # Ring radius per depth: clear of the previous ring, and wide enough for each wedge
+    max_depth = max(depth.values())
+    extent = [0.0] * (max_depth + 1)      # largest half-diagonal per ring
+    needed = [0.0] * (max_depth + 1)      # radius each ring needs for its arcs
+    for node_id in order:
+        d = depth[node_id]
+        width, height = sizes[node_id]
+        extent[d] = max(extent[d], math.hypot(width, height) / 2)
+        if d:
+            start, end = wedge[node_id]
+            span = min(end - start, math.pi)
+            angle = (start + end) / 2
+            # Neighbours on the ring sit one chord, 2r*sin(span/2), apart along the tangent;
+            # the boxes clear each other once that chord separates them in x or in y
+            sin_a, cos_a = abs(math.sin(angle)), abs(math.cos(angle))
+            chord = min(
+                (width + NODE_MARGIN) / sin_a if sin_a > 1e-9 else math.inf,
+                (height + NODE_MARGIN) / cos_a if cos_a > 1e-9 else math.inf
+            )
+            needed[d] = max(needed[d], chord / (2 * math.sin(span / 2)))
+
+    radius = [0.0] * (max_depth + 1)
+    for d in range(1, max_depth + 1):
+        radius[d] = max(needed[d], radius[d - 1] + max(MIN_RING_GAP, extent[d - 1] + extent[d] + NODE_MARGIN))
+
+    positions = {}
+    for node_id in order:
+        start, end = wedge[node_id]
+        angle = (start + end) / 2
+        r = radius[depth[node_id]]
+        positions[node_id] = [r * math.cos(angle), r * math.sin(angle)]
+    return positions
+
+def resolve_collisions(positions, sizes, depth, passes=COLLISION_PASSES):
+    """
+    Spatial-hash overlap check: boxes that still intersect push the deeper
+    node outward from the center. Each pass is O(N) on average.
+    """
+    cell = max(max(width, height) for width, height in sizes.values()) + NODE_MARGIN
+
+    for _ in range(passes):
+        grid = defaultdict(list)
+        for node_id, (x, y) in positions.items():
+            grid[(int(x // cell), int(y // cell))].append(node_id)
+
+        moved = False
+        for (cx, cy), members in grid.items():
+            for node_id in members:
+                x, y = positions[node_id]
+                width, height = sizes[node_id]
+                for dx in (-1, 0, 1):
+                    for dy in (-1, 0, 1):
+                        for other in grid.get((cx + dx, cy + dy), ()):
+                            if other == node_id or (depth[other], other) > (depth[node_id], node_id):
+                                continue
+                            ox, oy = positions[other]
+                            other_width, other_height = sizes[other]
+                            overlap_x = (width + other_width) / 2 + NODE_MARGIN - abs(x - ox)
+                            overlap_y = (height + other_height) / 2 + NODE_MARGIN - abs(y - oy)
+                            if overlap_x <= 0 or overlap_y <= 0:
+                                continue
+                            # Move this (deeper or later) node away from the center
+                            distance = math.hypot(x, y) or 1.0
+                            push = min(overlap_x, overlap_y) + 1
+                            x += x / distance * push
+                            y += y / distance * push
+                            moved = True
+                positions[node_id] = [x, y]
+        if not moved:
+            break
+
+def layout_mindmap(nodes, edges):
+    """
+    Set x / y on every node and return (nodes, canvas_width, canvas_height),
+    the canvas just large enough for the content plus a margin
+    """
+    if not nodes:
+        return nodes, 2 * CANVAS_MARGIN, 2 * CANVAS_MARGIN
+
+    sizes = {node['id']: estimate_node_size(node) for node in nodes}
+    root, tree, depth, order = build_tree(nodes, edges)
+    positions = radial_positions(root, tree, depth, order, sizes)
+    resolve_collisions(positions, sizes, depth)
+
+    min_x = min(x - sizes[node_id][0] / 2 for node_id, (x, y) in positions.items())
+    min_y = min(y - sizes[node_id][1] / 2 for node_id, (x, y) in positions.items())
+    max_x = max(x + sizes[node_id][0] / 2 for node_id, (x, y) in positions.items())
+    max_y = max(y + sizes[node_id][1] / 2 for node_id, (x, y) in positions.items())
+
+    for node in nodes:
+        x, y = positions[node['id']]
+        node['x'] = round(x - min_x + CANVAS_MARGIN, 1)
+        node['y'] = round(y - min_y + CANVAS_MARGIN, 1)
+
+    canvas_width = math.ceil(max_x - min_x + 2 * CANVAS_MARGIN)
+    canvas_height = math.ceil(max_y - min_y + 2 * CANVAS_MARGIN)
+    return nodes, canvas_width, canvas_height
@@ -1,12 +1,32 @@
 # services/mindmap_service.py - ACTUALLY FIXED LAYOUT
-import spacy
 import logging
 import random
 import re
-import math
 import textwrap
-from collections import Counter
+from collections import Counter, defaultdict
+
+import numpy as np
+from config import (
+    MINDMAP_MAX_DEPTH, MINDMAP_BRANCHING, MINDMAP_VISIBLE_DEPTH,
+    MINDMAP_MIN_CLUSTER, MINDMAP_MAX_SENTENCES
+)
 from services.gemini_preprocessor import preprocess_text, is_gemini_available, clean_preprocessing_markers
+from services.model_registry import get_nlp_md
+from services.chunking import split_into_chunks
+from services.keyphrase_engine import get_keyphrase_engine
+from services.mindmap_layout import layout_mindmap
+from services.nlp_profiles import parse, parse_many
+from services.topic_tree import build_topic_tree
+
+# Characters of the preprocessed text parsed for topic context
+MINDMAP_CONTEXT_CHARS = 10000
+
+TOPIC_COLORS = ['#ec4899', '#3b82f6', '#10b981', '#f59e0b', '#ef4444',
+                '#06b6d4', '#8b5cf6', '#a855f7', '#14b8a6', '#f43f5e']
+NODE_STYLES = {0: ('circle', 40), 1: ('box', 30), 2: ('ellipse', 22)}
+DEEP_NODE_STYLE = ('ellipse', 18)
+# Minimum cosine similarity for a Gemini outline label to name a sentence cluster
+OUTLINE_MATCH_MIN = 0.3
 
 logger = logging.getLogger(__name__)
 
@@ -14,21 +34,6 @@ def wrap_text(text, width=25):
     lines = textwrap.wrap(text, width=width, break_long_words=True, replace_whitespace=False)
     return '\n'.join(lines)
 
-try:
-    nlp = spacy.load("en_core_web_md")
-except:
-    try:
-        nlp = spacy.load("en_core_web_sm")
-    except:
-        nlp = None
-
-kw_model = None
-try:
-    from keybert import KeyBERT
-    kw_model = KeyBERT(model='all-MiniLM-L6-v2')
-except:
-    pass
-
 def validate_label(text, max_words=4, min_words=1):
     if not text:
         return None
@@ -127,74 +132,91 @@ def extract_hierarchical_structure(text):
     
     return hierarchy
 
-def calculate_node_positions(nodes, edges, canvas_width=5000, canvas_height=4000):
-    """
-    ORGANIC RADIAL LAYOUT - SPREADS PROPERLY
-    """
-    center_x = canvas_width / 2
-    center_y = canvas_height / 2
-    
-    # Separate by levels
-    level0 = [n for n in nodes if n['level'] == 0]
-    level1 = [n for n in nodes if n['level'] == 1]
-    level2 = [n for n in nodes if n['level'] == 2]
-    
-    # Place center
-    for node in level0:
-        node['x'] = center_x
-        node['y'] = center_y
-    
-    if not level1:
-        return nodes
-    
-    # LEVEL 1: Full circle around center
-    num_main = len(level1)
-    radius_main = 1000  # Large radius
-    
-    for i, node in enumerate(level1):
-        angle = (2 * math.pi * i / num_main)  # Full 360 degrees
-        node['x'] = center_x + radius_main * math.cos(angle)
-        node['y'] = center_y + radius_main * math.sin(angle)
-    
-    # LEVEL 2: Around each parent in its own arc
-    radius_sub = 800  # Distance from parent
-    
-    for parent in level1:
-        # Find children
-        children = []
-        for node in level2:
-            # Find edge connecting to this parent
-            for edge in edges:
-                if edge['to'] == node['id'] and edge['from'] == parent['id']:
-                    children.append(node)
-                    break
-        
-        if not children:
-            continue
-        
-        # Parent's angle from center
-        parent_angle = math.atan2(parent['y'] - center_y, parent['x'] - center_x)
+class SentenceIndex:
+    """Sentences of one parse, with an inverted index from word / lemma to sentence ids"""
+    
+    def __init__(self, doc):
+        self.sentences = []
+        self.words = []
+        self.lemmas = []
+        self.index = defaultdict(set)
         
-        num_children = len(children)
+        for sent_id, sent in enumerate(doc.sents):
+            words = [token.lower_ for token in sent]
+            lemmas = [token.lemma_.lower() for token in sent]
+            self.sentences.append(sent.text)
+            self.words.append(words)
+            self.lemmas.append(lemmas)
+            for term in words + lemmas:
+                self.index[term].add(sent_id)
+    
+    def lookup(self, phrase_doc):
+        """Texts of the sentences containing the phrase (as words or as lemmas), in order"""
+        words = [token.lower_ for token in phrase_doc]
+        lemmas = [token.lemma_.lower() for token in phrase_doc]
+        if not words:
+            return []
         
-        # Spread children in arc around parent
-        arc_spread = math.pi / 3  # 60 degrees total
+        matches = set()
+        for terms, sequences in ((words, self.words), (lemmas, self.lemmas)):
+            postings = sorted((self.index.get(term, set()) for term in terms), key=len)
+            for sent_id in postings[0].intersection(*postings[1:]):
+                if contains_sequence(sequences[sent_id], terms):
+                    matches.add(sent_id)
         
-        for i, child in enumerate(children):
-            if num_children == 1:
-                # Single child: straight out from parent
-                offset = 0
-            else:
-                # Multiple: spread evenly
-                offset = (i - (num_children - 1) / 2) * (arc_spread / (num_children - 1))
-            
-            child_angle = parent_angle + offset
-            child['x'] = parent['x'] + radius_sub * math.cos(child_angle)
-            child['y'] = parent['y'] + radius_sub * math.sin(child_angle)
+        return [self.sentences[sent_id] for sent_id in sorted(matches)]
+
+def contains_sequence(tokens, terms):
+    n = len(terms)
+    first = terms[0]
+    return any(
+        tokens[i] == first and tokens[i:i + n] == terms
+        for i in range(len(tokens) - n + 1)
+    )
+
+def build_sentence_index(text):
+    """Parse once (sentences + lemmas) and index it"""
+    return SentenceIndex(parse(text[:MINDMAP_CONTEXT_CHARS], 'sents_lemmas', model='md'))
+
+def extract_subtopics_batch(engine, topics, index):
+    """
+    Keyphrase subtopics for several topics in one call: each topic's context is
+    its first 3 sentences from the index, and all contexts are embedded together
+    """
+    subtopics = {topic: [] for topic in topics}
+    topic_docs = parse_many([topic.lower() for topic in topics], 'lemmas', model='md')
+    
+    contexts = {}
+    for topic, topic_doc in zip(topics, topic_docs):
+        topic_sentences = index.lookup(topic_doc)
+        if topic_sentences:
+            contexts[topic] = ' '.join(topic_sentences[:3])
+    
+    if not contexts:
+        return subtopics
+    
+    results = engine.extract(list(contexts.values()), ngram_range=(2, 4), top_n=6, diversity=0.7)
     
-    return nodes
+    for topic, sub_kw in zip(contexts, results):
+        for kw, score in sub_kw:
+            validated = validate_label(kw, max_words=4, min_words=2)
+            if validated and validated.lower() != topic.lower():
+                subtopics[topic].append(validated)
+            if len(subtopics[topic]) >= 6: break
+    
+    return subtopics
 
-def generate_mindmap(text, title="Mind Map", max_nodes=40):
+def generate_mindmap(text, title="Mind Map", max_nodes=40, max_depth=None, branching=None):
+    # Deeper or larger maps than the flat builder's 10 topics x 6 subtopics
+    if max_depth or max_nodes > 40:
+        return generate_topic_tree_mindmap(
+            text, title, max_nodes=max_nodes,
+            max_depth=max_depth or MINDMAP_MAX_DEPTH,
+            branching=branching or MINDMAP_BRANCHING
+        )
+    
+    nlp = get_nlp_md()
+    engine = get_keyphrase_engine()
     if not nlp:
         raise Exception("spaCy required")
     
@@ -212,35 +234,42 @@ def generate_mindmap(text, title="Mind Map", max_nodes=40):
     
     main_topics = hierarchy['main_topics']
     
-    if not main_topics and kw_model:
+    if not main_topics and engine:
         try:
             clean_text = clean_preprocessing_markers(preprocessed)
-            keywords = kw_model.extract_keywords(
-                clean_text, keyphrase_ngram_range=(2, 4),
-                stop_words='english', top_n=15, diversity=0.8
-            )
+            keywords = engine.extract([clean_text], ngram_range=(2, 4), top_n=15, diversity=0.8)[0]
             for kw, score in keywords:
                 validated = validate_label(kw, max_words=4, min_words=2)
                 if validated:
                     main_topics.append(validated)
                 if len(main_topics) >= 10: break
         except Exception as e:
-            logger.error(f"KeyBERT failed: {e}")
+            logger.error(f"Keyphrase extraction failed: {e}")
     
     if not main_topics:
-        doc = nlp(clean_preprocessing_markers(preprocessed)[:10000])
+        doc = parse(clean_preprocessing_markers(preprocessed)[:MINDMAP_CONTEXT_CHARS], 'chunks', model='md')
         for chunk in doc.noun_chunks:
             validated = validate_label(chunk.text, max_words=4, min_words=2)
             if validated and validated not in main_topics:
                 main_topics.append(validated)
             if len(main_topics) >= 8: break
     
-    colors = ['#ec4899', '#3b82f6', '#10b981', '#f59e0b', '#ef4444', 
-              '#06b6d4', '#8b5cf6', '#a855f7', '#14b8a6', '#f43f5e']
+    colors = TOPIC_COLORS
     
     node_id = 0
     max_main = min(len(main_topics), 10)
     
+    # Topics without headed subtopics get keyphrase ones: one parse, one batched call
+    # (candidates already embedded for the main topics come from the cache)
+    missing = [topic for topic in main_topics[:max_main] if not hierarchy['subtopics'].get(topic)]
+    extracted = {}
+    if missing and engine:
+        try:
+            index = build_sentence_index(clean_preprocessing_markers(preprocessed))
+            extracted = extract_subtopics_batch(engine, missing, index)
+        except Exception as e:
+            logger.error(f"Keyphrase subtopics failed: {e}")
+    
     for i, topic in enumerate(main_topics[:max_main]):
         node_id += 1
         topic_id = f'topic_{node_id}'
@@ -252,22 +281,7 @@ def generate_mindmap(text, title="Mind Map", max_nodes=40):
         })
         edges.append({'from': 'central', 'to': topic_id, 'width': 4, 'color': color})
         
-        subtopics = hierarchy['subtopics'].get(topic, [])
-        
-        if not subtopics and kw_model:
-            try:
-                doc = nlp(clean_preprocessing_markers(preprocessed)[:10000])
-                topic_sentences = [sent.text for sent in doc.sents if topic.lower() in sent.text.lower()]
-                if topic_sentences:
-                    context = ' '.join(topic_sentences[:3])
-                    sub_kw = kw_model.extract_keywords(context, keyphrase_ngram_range=(2, 4), stop_words='english', top_n=6, diversity=0.7)
-                    for kw, score in sub_kw:
-                        validated = validate_label(kw, max_words=4, min_words=2)
-                        if validated and validated.lower() != topic.lower():
-                            subtopics.append(validated)
-                        if len(subtopics) >= 6: break
-            except:
-                pass
+        subtopics = hierarchy['subtopics'].get(topic) or extracted.get(topic, [])
         
         for subtopic in subtopics[:6]:
             if node_id >= max_nodes - 1: break
@@ -282,11 +296,198 @@ def generate_mindmap(text, title="Mind Map", max_nodes=40):
         
         if node_id >= max_nodes - 1: break
     
-    nodes = calculate_node_positions(nodes, edges)
+    nodes, canvas_width, canvas_height = layout_mindmap(nodes, edges)
     
     return {
         'title': title, 'nodes': nodes, 'edges': edges,
-        'type': 'mindmap', 'canvas_width': 5000, 'canvas_height': 4000,
+        'type': 'mindmap', 'canvas_width': canvas_width, 'canvas_height': canvas_height,
+        'preprocessed_with_gemini': is_gemini_available()
+    }
+
+def extract_topic_sentences(text):
+    """Sentences of the whole text for clustering, evenly thinned to MINDMAP_MAX_SENTENCES"""
+    sentences = [
+        sent.text.strip()
+        for doc in parse_many(split_into_chunks(text, 100000), 'sents_only')
+        for sent in doc.sents
+        if 20 <= len(sent.text.strip()) <= 400
+    ]
+    if len(sentences) > MINDMAP_MAX_SENTENCES:
+        step = len(sentences) / MINDMAP_MAX_SENTENCES
+        sentences = [sentences[int(i * step)] for i in range(MINDMAP_MAX_SENTENCES)]
+    return sentences
+
+def match_outline_labels(engine, clusters, vectors, outline_labels):
+    """
+    {cluster: outline label} - each Gemini outline label goes to the cluster
+    whose sentence centroid it is most similar to, best pairs first
+    """
+    if not clusters or not outline_labels:
+        return {}
+    centroids = np.stack([vectors[cluster.indices].mean(axis=0) for cluster in clusters])
+    centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+    similarity = centroids @ engine.embed(outline_labels).T
+    
+    matches = {}
+    taken = set()
+    for flat in np.argsort(-similarity, axis=None, kind='stable'):
+        row, col = divmod(int(flat), len(outline_labels))
+        if similarity[row, col] < OUTLINE_MATCH_MIN:
+            break
+        if clusters[row] in matches or col in taken:
+            continue
+        matches[clusters[row]] = outline_labels[col]
+        taken.add(col)
+    return matches
+
+def label_topic_clusters(engine, clusters, sentences, used, preferred=None):
+    """
+    One label per cluster: its matched outline label (preferred) if any, else
+    from one batched keyphrase call over each cluster's most central sentences;
+    labels already in `used` (ancestors, siblings) are skipped
+    """
+    preferred = preferred or {}
+    contexts = [' '.join(sentences[i] for i in cluster.indices[:8]) for cluster in clusters]
+    results = engine.extract(contexts, ngram_range=(2, 4), top_n=8, diversity=0.5)
+    
+    labels = []
+    for cluster, keywords in zip(clusters, results):
+        candidates = [kw for kw, score in keywords] + [sentences[cluster.indices[0]]]
+        if cluster in preferred:
+            candidates.insert(0, preferred[cluster])
+        label = None
+        for candidate in candidates:
+            validated = validate_label(candidate, max_words=4, min_words=2)
+            if validated and validated.lower() not in used:
+                label = validated
+                break
+        label = label or f"Topic {len(used) + 1}"
+        used.add(label.lower())
+        labels.append(label)
+    return labels
+
+def collapse_subtrees(nodes, edges, visible_depth):
+    """
+    Split a laid-out tree into the visible levels and one subtree per node whose
+    children are deeper: {node_id: {'nodes': children, 'edges': edges to them}}
+    """
+    level = {node['id']: node['level'] for node in nodes}
+    by_id = {node['id']: node for node in nodes}
+    subtrees = {}
+    visible_edges = []
+    
+    for edge in edges:
+        if level[edge['to']] <= visible_depth:
+            visible_edges.append(edge)
+            continue
+        subtree = subtrees.setdefault(edge['from'], {'nodes': [], 'edges': []})
+        subtree['nodes'].append(by_id[edge['to']])
+        subtree['edges'].append(edge)
+    
+    for node_id in subtrees:
+        by_id[node_id]['collapsed'] = True
+    
+    visible_nodes = [node for node in nodes if node['level'] <= visible_depth]
+    return visible_nodes, visible_edges, subtrees
+
+def generate_topic_tree_mindmap(text, title="Mind Map", max_nodes=400, max_depth=MINDMAP_MAX_DEPTH,
+                                branching=MINDMAP_BRANCHING, visible_depth=MINDMAP_VISIBLE_DEPTH):
+    """
+    Mindmap of any depth: the document's sentence embeddings are clustered
+    recursively (services/topic_tree.py) and every cluster is labelled with
+    validate_label, preferring the closest label of Gemini's outline for the
+    top two levels. Levels up to visible_depth are returned as nodes/edges,
+    deeper levels as collapsed subtrees the viewer expands on demand.
+    """
+    engine = get_keyphrase_engine()
+    if not engine:
+        raise Exception("KeyBERT required")
+    
+    # Clusters come from the document itself; Gemini's outline (a few short
+    # labels) only names the central node and seeds the top-level labels
+    hierarchy = extract_hierarchical_structure(preprocess_text(text, 'mindmap'))
+    sentences = extract_topic_sentences(text)
+    if len(sentences) < 2 * MINDMAP_MIN_CLUSTER:
+        raise Exception("Not enough sentences for a mind map")
+    
+    logger.info(f"🌳 Topic tree: {len(sentences)} sentences, depth {max_depth}, branching {branching}")
+    vectors = engine.embed(sentences)
+    root = build_topic_tree(vectors, max_depth, branching, MINDMAP_MIN_CLUSTER, max_nodes - 1)
+    if not root.children:
+        raise Exception("Could not split the document into topics")
+    
+    central_label = hierarchy['central'] or validate_label(title, max_words=4, min_words=1) or "Main Topic"
+    shape, size = NODE_STYLES[0]
+    nodes = [{
+        'id': 'central', 'label': central_label, 'level': 0,
+        'color': '#8b5cf6', 'size': size, 'shape': shape
+    }]
+    edges = []
+    
+    # Level by level: one batched labelling call per level
+    used = {central_label.lower()}
+    node_ids = {root: 'central'}
+    colors = {root: '#8b5cf6'}
+    level = root.children
+    node_count = 0
+    outline = {root: None}  # outline main topic matched to each top-level cluster
+    
+    while level:
+        if level[0].depth == 1:
+            preferred = match_outline_labels(engine, level, vectors, hierarchy['main_topics'])
+            outline.update((cluster, preferred.get(cluster)) for cluster in level)
+        else:
+            # Children of a matched main topic may take that topic's outline subtopics
+            preferred = {}
+            siblings = defaultdict(list)
+            for cluster in level:
+                siblings[cluster.parent].append(cluster)
+            for parent, children in siblings.items():
+                subtopics = hierarchy['subtopics'].get(outline.get(parent)) if parent.depth == 1 else None
+                preferred.update(match_outline_labels(engine, children, vectors, subtopics))
+        labels = label_topic_clusters(engine, level, sentences, used, preferred)
+        next_level = []
+        
+        for i, (cluster, label) in enumerate(zip(level, labels)):
+            node_count += 1
+            depth = cluster.depth
+            node_id = f'topic_{node_count}' if depth == 1 else f'node_{node_count}'
+            parent_color = colors[cluster.parent]
+            if depth == 1:
+                color = TOPIC_COLORS[i % len(TOPIC_COLORS)]
+            else:
+                # Lighten once below the main topics; deeper levels keep their parent's color
+                color = lighten_color(parent_color) if depth == 2 else parent_color
+            shape, size = NODE_STYLES.get(depth, DEEP_NODE_STYLE)
+            
+            node = {
+                'id': node_id, 'label': label, 'level': depth,
+                'color': color, 'size': size, 'shape': shape
+            }
+            if cluster.children:
+                node['child_count'] = len(cluster.children)
+            nodes.append(node)
+            edges.append({
+                'from': node_ids[cluster.parent], 'to': node_id,
+                'width': 4 if depth == 1 else 2,
+                'color': color if depth == 1 else parent_color
+            })
+            
+            node_ids[cluster] = node_id
+            colors[cluster] = color
+            next_level.extend(cluster.children)
+        
+        level = next_level
+    
+    nodes, canvas_width, canvas_height = layout_mindmap(nodes, edges)
+    visible_nodes, visible_edges, subtrees = collapse_subtrees(nodes, edges, visible_depth)
+    logger.info(f"✅ Topic tree: {len(nodes)} nodes, {len(visible_nodes)} visible, {len(subtrees)} collapsed subtrees")
+    
+    return {
+        'title': title, 'nodes': visible_nodes, 'edges': visible_edges,
+        'subtrees': subtrees, 'node_count': len(nodes),
+        'max_depth': max(node['level'] for node in nodes),
+        'type': 'mindmap', 'canvas_width': canvas_width, 'canvas_height': canvas_height,
         'preprocessed_with_gemini': is_gemini_available()
     }
 
@@ -308,7 +509,7 @@ def extract_process_steps(text):
         return steps, decisions
     
     clean_text = clean_preprocessing_markers(text)
-    doc = nlp(clean_text[:15000])
+    doc = parse(clean_text[:15000], 'sents_pos', model='md')
     
     for sent in doc.sents:
         sentence = sent.text.strip()
@@ -374,7 +575,7 @@ def calculate_flowchart_positions(nodes, edges, canvas_width=1800, canvas_height
     return nodes, y_current + 200
 
 def generate_flowchart(text, title="Flowchart", max_steps=35):
-    if not nlp:
+    if not get_nlp_md():
         raise Exception("spaCy required")
     
     preprocessed = preprocess_text(text, 'flowchart')
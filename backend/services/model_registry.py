@@ -0,0 +1,212 @@
+# services/model_registry.py - Lazy, shared ML model registry
+import logging
+import os
+import threading
+import time
+
+from config import QUIZ_MODEL_BACKEND, ONNX_EXPORT_DIR
+
+logger = logging.getLogger(__name__)
+
+def current_rss_bytes():
+    """Resident set size of this process (Linux /proc, else peak RSS)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except Exception:
+        try:
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except Exception:
+            return 0
+
+class ModelRegistry:
+    """
+    Loads each model on first use, once per process, and records load time
+    and the resident memory it added. A failed load is remembered as None.
+    """
+
+    def __init__(self):
+        self.loaders = {}
+        self.models = {}
+        self.info = {}
+        self.lock = threading.RLock()
+
+    def register(self, name, loader):
+        self.loaders[name] = loader
+
+    def get(self, name):
+        if name in self.models:
+            return self.models[name]
+
+        with self.lock:
+            if name in self.models:
+                return self.models[name]
+
+            rss_before = current_rss_bytes()
+            start = time.perf_counter()
+            try:
+                model = self.loaders[name]()
+                error = None
+                logger.info(f"✅ Model loaded: {name} ({time.perf_counter() - start:.1f}s)")
+            except Exception as e:
+                model = None
+                error = str(e)
+                logger.error(f"❌ Model {name} failed to load: {e}")
+
+            self.info[name] = {
+                'loaded': model is not None,
+                'load_seconds': round(time.perf_counter() - start, 2),
+                'rss_delta_mb': round((current_rss_bytes() - rss_before) / (1024 * 1024), 1),
+                'error': error
+            }
+            self.models[name] = model
+            return model
+
+    def load(self, names):
+        for name in names:
+            if name in self.loaders:
+                self.get(name)
+            else:
+                logger.warning(f"⚠️ Unknown model for pre-warm: {name}")
+
+    def prewarm(self, names):
+        """Load models in a background thread so startup is not blocked"""
+        if not names:
+            return None
+        thread = threading.Thread(target=self.load, args=(list(names),), name='model-prewarm', daemon=True)
+        thread.start()
+        logger.info(f"🔥 Pre-warming models: {', '.join(names)}")
+        return thread
+
+    def stats(self):
+        with self.lock:
+            models = {
+                name: self.info.get(name, {'loaded': False, 'load_seconds': None, 'rss_delta_mb': None, 'error': None})
+                for name in self.loaders
+            }
+        return {
+            'pid': os.getpid(),
+            'rss_mb': round(current_rss_bytes() / (1024 * 1024), 1),
+            'models': models
+        }
+
+# ==================== MODELS ====================
+
+def _enable_senter(nlp):
+    """Turn on the trained sentence recognizer used by the 'sents_*' profiles (nlp_profiles)"""
+    if 'senter' in nlp.disabled:
+        nlp.enable_pipe('senter')
+    return nlp
+
+def _load_spacy_sm():
+    import spacy
+    return _enable_senter(spacy.load("en_core_web_sm"))
+
+def _load_spacy_md():
+    import spacy
+    try:
+        return _enable_senter(spacy.load("en_core_web_md"))
+    except Exception:
+        logger.warning("⚠️ en_core_web_md not available - sharing en_core_web_sm")
+        return registry.get('spacy_sm')
+
+QUIZ_MODELS = {
+    'question_generator': ('text2text-generation', 'valhalla/t5-small-qg-hl'),
+    'answer_extractor': ('question-answering', 'deepset/roberta-base-squad2'),
+}
+QUIZ_BACKENDS = ('pytorch', 'quantized', 'onnx')
+
+def _onnx_model(task, model_name):
+    """Export once to ONNX_EXPORT_DIR, then load the ONNX Runtime graph from disk"""
+    from optimum.onnxruntime import ORTModelForQuestionAnswering, ORTModelForSeq2SeqLM
+    model_class = ORTModelForSeq2SeqLM if task == 'text2text-generation' else ORTModelForQuestionAnswering
+    export_dir = os.path.join(ONNX_EXPORT_DIR, model_name.replace('/', '--'))
+    if os.path.isdir(export_dir):
+        return model_class.from_pretrained(export_dir), export_dir
+    model = model_class.from_pretrained(model_name, export=True)
+    model.save_pretrained(export_dir)
+    return model, export_dir
+
+def build_quiz_pipeline(name, backend='pytorch'):
+    """
+    Quiz pipeline on the requested CPU backend: 'pytorch' (fp32), 'quantized'
+    (int8 dynamic quantization of the Linear layers) or 'onnx' (ONNX Runtime).
+    Any backend that fails to load falls back to the fp32 pipeline.
+    Returns (pipeline, backend actually loaded).
+    """
+    from transformers import AutoTokenizer, pipeline
+    task, model_name = QUIZ_MODELS[name]
+
+    if backend == 'quantized':
+        try:
+            import torch
+            quantized = pipeline(task, model=model_name, device=-1)
+            quantized.model = torch.quantization.quantize_dynamic(quantized.model, {torch.nn.Linear}, dtype=torch.qint8)
+            logger.info(f"⚡ {name}: int8 dynamic quantization")
+            return quantized, 'quantized'
+        except Exception as e:
+            logger.warning(f"⚠️ {name}: quantized backend unavailable ({e}) - using pytorch")
+    elif backend == 'onnx':
+        try:
+            model, export_dir = _onnx_model(task, model_name)
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            logger.info(f"⚡ {name}: ONNX Runtime ({export_dir})")
+            return pipeline(task, model=model, tokenizer=tokenizer, device=-1), 'onnx'
+        except Exception as e:
+            logger.warning(f"⚠️ {name}: ONNX backend unavailable ({e}) - using pytorch")
+    elif backend != 'pytorch':
+        logger.warning(f"⚠️ Unknown quiz model backend '{backend}' - using pytorch")
+
+    return pipeline(task, model=model_name, device=-1), 'pytorch'
+
+# Backend each quiz model actually loaded with (reported by model_stats)
+quiz_backends = {}
+
+def _load_quiz_model(name):
+    quiz_pipeline, quiz_backends[name] = build_quiz_pipeline(name, QUIZ_MODEL_BACKEND)
+    return quiz_pipeline
+
+def _load_question_generator():
+    return _load_quiz_model('question_generator')
+
+def _load_answer_extractor():
+    return _load_quiz_model('answer_extractor')
+
+def _load_keybert():
+    from keybert import KeyBERT
+    return KeyBERT(model='all-MiniLM-L6-v2')
+
+registry = ModelRegistry()
+registry.register('spacy_sm', _load_spacy_sm)
+registry.register('spacy_md', _load_spacy_md)
+registry.register('question_generator', _load_question_generator)
+registry.register('answer_extractor', _load_answer_extractor)
+registry.register('keybert', _load_keybert)
+
+def get_nlp():
+    """Shared en_core_web_sm pipeline"""
+    return registry.get('spacy_sm')
+
+def get_nlp_md():
+    """en_core_web_md (vectors) - falls back to the shared en_core_web_sm"""
+    return registry.get('spacy_md')
+
+def get_qg_pipeline():
+    return registry.get('question_generator')
+
+def get_qa_pipeline():
+    return registry.get('answer_extractor')
+
+def get_keyword_model():
+    return registry.get('keybert')
+
+def prewarm_models(names):
+    """Start loading models in the background (also used as the job pool initializer)"""
+    return registry.prewarm(names)
+
+def model_stats():
+    stats = registry.stats()
+    for name, backend in quiz_backends.items():
+        stats['models'][name]['backend'] = backend
+    return stats
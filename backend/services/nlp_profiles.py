@@ -0,0 +1,65 @@
+# services/nlp_profiles.py - spaCy execution profiles (run only the pipes a caller needs)
+import logging
+
+from config import NLP_BATCH_SIZE, NLP_PROCESSES
+from services.model_registry import get_nlp, get_nlp_md
+
+logger = logging.getLogger(__name__)
+
+# Pipes each profile keeps; everything else is disabled for the call.
+# The registry enables `senter`, so sentence-only work skips tagger and parser.
+NLP_PROFILES = {
+    'sents_only': ('senter',),                                    # doc.sents
+    'sents_pos': ('senter', 'tok2vec', 'tagger', 'attribute_ruler'),  # doc.sents + token.pos_
+    'sents_ents': ('senter', 'tok2vec', 'ner'),                   # doc.sents + ents
+    'sents_lemmas': ('senter', 'tok2vec', 'tagger', 'attribute_ruler', 'lemmatizer'),  # doc.sents + token.lemma_
+    'lemmas': ('tok2vec', 'tagger', 'attribute_ruler', 'lemmatizer'),  # token.lemma_
+    'ents': ('tok2vec', 'ner'),                                   # doc.ents
+    'chunks': ('tok2vec', 'tagger', 'attribute_ruler', 'parser'), # doc.noun_chunks (+ sents)
+    'ents_chunks': ('tok2vec', 'tagger', 'attribute_ruler', 'parser', 'ner'),
+    'full': None,                                                 # every pipe except senter
+}
+
+MODELS = {'sm': get_nlp, 'md': get_nlp_md}
+
+_disabled_cache = {}
+
+def get_model(model='sm'):
+    """The shared spaCy pipeline for `model` ('sm' or 'md'), or None"""
+    return MODELS[model]()
+
+def disabled_pipes(nlp, profile):
+    """Names of the pipes to skip for `profile` on this pipeline"""
+    key = (id(nlp), profile)
+    if key in _disabled_cache:
+        return _disabled_cache[key]
+
+    keep = NLP_PROFILES[profile]
+    if keep is None:
+        keep = [name for name in nlp.pipe_names if name != 'senter']
+    elif 'parser' in keep:
+        # The parser sets sentence boundaries itself
+        keep = [name for name in keep if name != 'senter']
+    elif 'senter' in keep and 'senter' not in nlp.pipe_names:
+        # No trained senter in this pipeline - the parser has to split sentences
+        keep = [name for name in keep if name != 'senter'] + ['tok2vec', 'parser']
+
+    disabled = [name for name in nlp.pipe_names if name not in keep]
+    _disabled_cache[key] = disabled
+    return disabled
+
+def parse(text, profile='full', model='sm'):
+    """Run one text through the pipes of `profile`"""
+    nlp = get_model(model)
+    return nlp(text, disable=disabled_pipes(nlp, profile))
+
+def parse_many(texts, profile='full', model='sm', batch_size=NLP_BATCH_SIZE, n_process=NLP_PROCESSES):
+    """
+    nlp.pipe over many texts with the pipes of `profile`. Extra processes
+    are only used when there are enough texts to fill several batches.
+    """
+    nlp = get_model(model)
+    texts = list(texts)
+    if n_process > 1 and len(texts) < batch_size * 2:
+        n_process = 1
+    return list(nlp.pipe(texts, disable=disabled_pipes(nlp, profile), batch_size=batch_size, n_process=n_process))
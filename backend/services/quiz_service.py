@@ -1,27 +1,33 @@
 # services/quiz_service.py - FIXED: 10 questions + proper marker cleaning
-import spacy
 import random
 import re
+import time
 import logging
 from collections import defaultdict
-from services.gemini_preprocessor import preprocess_text, is_gemini_available, clean_preprocessing_markers, extract_marker_content
+from services.gemini_preprocessor import preprocess_text, is_gemini_available
+from services.text_normalization import MARKER_RE, clean_preprocessing_markers, extract_marker_content
+from services.chunking import split_into_chunks
+from services.model_registry import get_nlp, get_qg_pipeline, get_qa_pipeline
+from services.nlp_profiles import parse, parse_many
+from config import QG_BATCH_SIZE, QA_BATCH_SIZE, QUIZ_MODEL_BUDGET_SECONDS, QUIZ_DEFAULT_MODE
 
 logger = logging.getLogger(__name__)
 
-try:
-    nlp = spacy.load("en_core_web_sm")
-except:
-    nlp = None
+# Question generation decoding per quiz mode: greedy / small beam / full beam.
+# Shorter outputs and bigger batches trade question quality for latency.
+QUIZ_MODES = {
+    'fast': {'num_beams': 1, 'max_length': 48, 'qg_batch_size': QG_BATCH_SIZE * 2, 'qa_batch_size': QA_BATCH_SIZE * 2},
+    'balanced': {'num_beams': 3, 'max_length': 64, 'qg_batch_size': QG_BATCH_SIZE, 'qa_batch_size': QA_BATCH_SIZE},
+    'quality': {'num_beams': 6, 'max_length': 90, 'qg_batch_size': max(QG_BATCH_SIZE // 2, 1), 'qa_batch_size': QA_BATCH_SIZE},
+}
 
-qg_pipeline = None
-qa_pipeline = None
+# A mistyped QUIZ_DEFAULT_MODE would turn every default quiz request into a 400
+if QUIZ_DEFAULT_MODE not in QUIZ_MODES:
+    logger.error(f"❌ Unknown QUIZ_DEFAULT_MODE '{QUIZ_DEFAULT_MODE}' (choose from {', '.join(QUIZ_MODES)}) - using balanced")
+    QUIZ_DEFAULT_MODE = 'balanced'
 
-try:
-    from transformers import pipeline
-    qg_pipeline = pipeline("text2text-generation", model="valhalla/t5-small-qg-hl", device=-1)
-    qa_pipeline = pipeline("question-answering", model="deepset/roberta-base-squad2", device=-1)
-except:
-    pass
+def is_quiz_mode(mode):
+    return isinstance(mode, str) and mode in QUIZ_MODES
 
 def extract_structured_facts(text):
     """Extract facts from preprocessed text - WITH PROPER CLEANING"""
@@ -34,29 +40,20 @@ def extract_structured_facts(text):
     if def_matches or fact_matches or data_matches:
         # Definitions are BEST for quizzes
         for definition in def_matches:
-            # CRITICAL: Clean ALL markers from extracted content
-            cleaned = clean_preprocessing_markers(definition.strip())
-            # Remove any remaining marker patterns
-            cleaned = re.sub(r'\[(?:KEY|FACT|DEF|DATA|CAUSE|EFFECT|LIST|COMPARE):[^\]]*\]', '', cleaned)
-            cleaned = re.sub(r'##\s*(?:MAIN TOPIC|FACTUAL CONTENT|KEY DEFINITIONS)\s*\d*:', '', cleaned)
-            cleaned = cleaned.strip()
+            # CRITICAL: Clean ALL markers and section labels from extracted content
+            cleaned = clean_fact_text(definition.strip())
             
             if 20 < len(cleaned) < 300:
                 facts.append({'text': cleaned, 'score': 30, 'type': 'definition'})
         
         for fact in fact_matches:
-            cleaned = clean_preprocessing_markers(fact.strip())
-            cleaned = re.sub(r'\[(?:KEY|FACT|DEF|DATA|CAUSE|EFFECT|LIST|COMPARE):[^\]]*\]', '', cleaned)
-            cleaned = re.sub(r'##\s*(?:MAIN TOPIC|FACTUAL CONTENT|KEY DEFINITIONS)\s*\d*:', '', cleaned)
-            cleaned = cleaned.strip()
+            cleaned = clean_fact_text(fact.strip())
             
             if 20 < len(cleaned) < 300:
                 facts.append({'text': cleaned, 'score': 25, 'type': 'fact'})
         
         for data in data_matches:
-            cleaned = clean_preprocessing_markers(data.strip())
-            cleaned = re.sub(r'\[(?:KEY|FACT|DEF|DATA|CAUSE|EFFECT|LIST|COMPARE):[^\]]*\]', '', cleaned)
-            cleaned = cleaned.strip()
+            cleaned = clean_fact_text(data.strip())
             
             if 15 < len(cleaned) < 300:
                 facts.append({'text': cleaned, 'score': 22, 'type': 'data'})
@@ -67,14 +64,15 @@ def extract_structured_facts(text):
 
 def extract_factual_sentences_fallback(text):
     """Fallback extraction focusing on quality"""
+    nlp = get_nlp()
     if not nlp:
         raise Exception("spaCy required")
     
     text = clean_preprocessing_markers(text)
-    doc = nlp(text[:12000])
+    sents = [sent for doc in parse_many(split_into_chunks(text, 12000), 'sents_ents') for sent in doc.sents]
     facts = []
     
-    for sent in doc.sents:
+    for sent in sents:
         sentence = sent.text.strip()
         
         if len(sentence) < 30 or len(sentence) > 250:
@@ -132,37 +130,61 @@ def validate_question(question, sentence):
     
     return True
 
-def extract_answer_ml(sentence, question):
-    """Extract answer using ML"""
-    if not qa_pipeline:
-        return None
-    
-    try:
-        clean_sent = clean_preprocessing_markers(sentence)
-        result = qa_pipeline(question=question, context=clean_sent)
-        answer = result['answer'].strip()
-        
-        # CRITICAL: Clean markers from answer
-        answer = re.sub(r'\[(?:KEY|FACT|DEF|DATA):[^\]]*\]', '', answer)
-        answer = answer.strip()
+def iter_batches(indices, lengths, batch_size):
+    """
+    Group item indices into mini-batches of similar length so each padded
+    batch wastes little compute on padding tokens
+    """
+    ordered = sorted(indices, key=lambda i: lengths[i])
+    for start in range(0, len(ordered), batch_size):
+        yield ordered[start:start + batch_size]
+
+def extract_answers_ml(pairs, batch_size=QA_BATCH_SIZE, qa_pipeline=None):
+    """Extract answers using ML for (sentence, question) pairs, in batches"""
+    answers = [None] * len(pairs)
+    if qa_pipeline is None:
+        qa_pipeline = get_qa_pipeline()
+    if not qa_pipeline or not pairs:
+        return answers
+    
+    contexts = [clean_preprocessing_markers(sentence) for sentence, _ in pairs]
+    lengths = [len(context) + len(question) for context, (_, question) in zip(contexts, pairs)]
+    
+    for batch in iter_batches(range(len(pairs)), lengths, batch_size):
+        try:
+            results = qa_pipeline(
+                question=[pairs[i][1] for i in batch],
+                context=[contexts[i] for i in batch],
+                batch_size=len(batch)
+            )
+            if isinstance(results, dict):
+                results = [results]
+        except Exception as e:
+            logger.warning(f"⚠️ QA batch failed: {e}")
+            continue
         
-        if 4 < len(answer) < 100 and result['score'] > 0.3:
-            return answer
-    except:
-        pass
+        for i, result in zip(batch, results):
+            answer = result['answer'].strip()
+            
+            # CRITICAL: Clean markers from answer
+            answer = MARKER_RE.sub('', answer)
+            answer = answer.strip()
+            
+            if 4 < len(answer) < 100 and result['score'] > 0.3:
+                answers[i] = answer
     
-    return None
+    return answers
 
-def extract_answer_fallback(sentence):
-    """Enhanced answer extraction"""
-    sentence = clean_preprocessing_markers(sentence)
-    
-    # CRITICAL: Remove any remaining markers
-    sentence = re.sub(r'\[(?:KEY|FACT|DEF|DATA|CAUSE|EFFECT|LIST|COMPARE):[^\]]*\]', '', sentence)
-    sentence = re.sub(r'##\s*(?:MAIN TOPIC|FACTUAL CONTENT|KEY DEFINITIONS)\s*\d*:', '', sentence)
-    sentence = sentence.strip()
+def clean_fact_text(sentence):
+    """Strip preprocessing markers and section labels from a fact (one fused pass)"""
+    return clean_preprocessing_markers(sentence, fact_labels=True)
+
+def extract_answer_fallback(sentence, sent_doc=None):
+    """Enhanced answer extraction (sent_doc: the already-parsed cleaned sentence)"""
+    sentence = clean_fact_text(sentence)
     
-    sent_doc = nlp(sentence)
+    if sent_doc is None:
+        sent_doc = parse(sentence, 'ents_chunks')
     
     # Pattern 1: "X is/are Y"
     is_pattern = r'([A-Z][A-Za-z\s]+?)\s+(is|are|was|were)\s+(.+?)(?:\.|,|;|and|which|that|$)'
@@ -201,47 +223,58 @@ def extract_answer_fallback(sentence):
     
     return None
 
-def generate_question_ml(sentence):
-    """Generate question with T5"""
-    if not qg_pipeline:
-        return None
-    
-    try:
-        clean_sent = clean_preprocessing_markers(sentence)
-        # Remove markers
-        clean_sent = re.sub(r'\[(?:KEY|FACT|DEF|DATA):[^\]]*\]', '', clean_sent)
-        clean_sent = clean_sent.strip()
-        
-        input_text = f"generate question: {clean_sent}"
-        
-        result = qg_pipeline(
-            input_text,
-            max_length=90,
-            min_length=15,
-            num_beams=6,
-            early_stopping=True,
-            num_return_sequences=1,
-            temperature=0.6
-        )
-        
-        if result and len(result) > 0:
-            question = result[0]['generated_text'].strip()
+def generate_questions_ml(sentences, batch_size=QG_BATCH_SIZE, qg_pipeline=None, num_beams=6, max_length=90):
+    """Generate questions with T5 for many sentences, in padded mini-batches"""
+    questions = [None] * len(sentences)
+    if qg_pipeline is None:
+        qg_pipeline = get_qg_pipeline()
+    if not qg_pipeline or not sentences:
+        return questions
+    
+    inputs = []
+    for sentence in sentences:
+        inputs.append(f"generate question: {clean_preprocessing_markers(sentence)}")
+    
+    # Greedy when num_beams == 1; early stopping only applies to beam search
+    decoding = {'num_beams': num_beams, 'early_stopping': True} if num_beams > 1 else {'num_beams': 1, 'do_sample': False}
+    
+    for batch in iter_batches(range(len(inputs)), [len(t) for t in inputs], batch_size):
+        try:
+            results = qg_pipeline(
+                [inputs[i] for i in batch],
+                batch_size=len(batch),
+                max_length=max_length,
+                min_length=15,
+                num_return_sequences=1,
+                **decoding
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Question generation batch failed: {e}")
+            continue
+        
+        for i, result in zip(batch, results):
+            # One return sequence per input may come back flattened or as a list
+            if isinstance(result, list):
+                result = result[0] if result else None
+            if not result:
+                continue
+            
+            question = result['generated_text'].strip()
             question = re.sub(r'^question:\s*', '', question, flags=re.I)
+            if not question:
+                continue
             if not question.endswith('?'):
                 question += '?'
             question = question[0].upper() + question[1:]
             
-            if validate_question(question, sentence):
-                return question
-    except:
-        pass
+            if validate_question(question, sentences[i]):
+                questions[i] = question
     
-    return None
+    return questions
 
 def generate_question_fallback(sentence, answer):
     """Fallback question generation"""
     sentence = clean_preprocessing_markers(sentence)
-    sentence = re.sub(r'\[(?:KEY|FACT|DEF|DATA):[^\]]*\]', '', sentence)
     
     if '=' in sentence or ':' in sentence:
         term = sentence.split('=')[0].split(':')[0].strip()
@@ -277,58 +310,104 @@ def generate_question_fallback(sentence, answer):
     else:
         return f"According to the document, what is {answer}?"
 
-def generate_smart_distractors(answer, all_facts, text, answer_type=None):
+# ==================== DOCUMENT ANALYSIS ====================
+
+def _bucket_by_length(phrases):
+    """Index phrases by word count"""
+    buckets = defaultdict(list)
+    for phrase in phrases:
+        buckets[len(phrase.split())].append(phrase)
+    return buckets
+
+class QuizDocumentAnalysis:
+    """
+    One spaCy pass over the document (and one nlp.pipe over the facts),
+    indexed so each question's distractor pool is a few dict lookups
+    """
+
+    MAX_LENGTH_GAP = 4
+    DISTRACTOR_FACTS = 30
+
+    def __init__(self, clean_text, facts):
+        doc = parse(clean_text[:12000], 'ents_chunks')
+        
+        # Same-type entities: label -> word count -> texts
+        self.entities = defaultdict(lambda: defaultdict(list))
+        seen = set()
+        for ent in doc.ents:
+            text = ent.text.strip()
+            if 4 < len(ent.text) < 100 and (ent.label_, text) not in seen:
+                seen.add((ent.label_, text))
+                self.entities[ent.label_][len(ent.text.split())].append(text)
+        
+        # Noun phrases without a leading determiner
+        self.noun_phrases = _bucket_by_length(dict.fromkeys(
+            chunk.text.strip() for chunk in doc.noun_chunks
+            if 4 < len(chunk.text.strip()) < 100
+            and not re.match(r'^(the|a|an|this|that)\s', chunk.text.strip(), re.I)
+        ))
+        
+        self.numbers = list(dict.fromkeys(
+            match.group().strip()
+            for match in re.finditer(r'\d+(?:\.\d+)?(?:\s*(?:million|billion|thousand|%|percent))?', clean_text)
+        ))
+        
+        # Rule-based answer for every fact, parsed in one nlp.pipe batch
+        sentences = [clean_fact_text(fact['text']) for fact in facts]
+        self.fallback_answers = {}
+        self.entity_counts = {}
+        for fact, sentence, sent_doc in zip(facts, sentences, parse_many(sentences, 'ents_chunks')):
+            self.fallback_answers[fact['text']] = extract_answer_fallback(sentence, sent_doc)
+            self.entity_counts[fact['text']] = len(sent_doc.ents)
+        
+        self.fact_answers = list(dict.fromkeys(
+            answer for answer in (
+                self.fallback_answers[fact['text']] for fact in facts[:self.DISTRACTOR_FACTS]
+            )
+            if answer and 4 < len(answer) < 100
+        ))
+
+    def fallback_answer(self, sentence):
+        if sentence not in self.fallback_answers:
+            self.fallback_answers[sentence] = extract_answer_fallback(sentence)
+        return self.fallback_answers[sentence]
+
+    def _near_length(self, buckets, answer_length):
+        for length in range(answer_length - self.MAX_LENGTH_GAP, answer_length + self.MAX_LENGTH_GAP + 1):
+            yield from buckets.get(length, ())
+
+    def distractor_candidates(self, answer, answer_type=None):
+        answer_length = len(answer.split())
+        answer_lower = answer.lower()
+        candidates = set()
+        
+        # STRATEGY 1: Same-type entities
+        if answer_type and answer_type in self.entities:
+            candidates.update(self._near_length(self.entities[answer_type], answer_length))
+        
+        # STRATEGY 2: Similar noun phrases
+        candidates.update(self._near_length(self.noun_phrases, answer_length))
+        
+        # STRATEGY 3: Answers from other facts
+        candidates.update(self.fact_answers)
+        
+        # STRATEGY 4: Numbers
+        if re.search(r'\d+', answer):
+            candidates.update(num for num in self.numbers if num not in answer_lower)
+        
+        candidates.discard(answer)
+        return candidates
+
+def generate_smart_distractors(answer, analysis, answer_type=None):
     """Generate INTELLIGENT distractors - NO MARKERS"""
-    text = clean_preprocessing_markers(text)
-    text = re.sub(r'\[(?:KEY|FACT|DEF|DATA):[^\]]*\]', '', text)
+    if not answer_type:
+        answer_doc = parse(answer, 'ents')
+        if answer_doc.ents:
+            answer_type = answer_doc.ents[0].label_
     
-    doc = nlp(text[:12000])
-    answer_doc = nlp(answer)
-    
-    if not answer_type and answer_doc.ents:
-        answer_type = answer_doc.ents[0].label_
-    
-    answer_length = len(answer.split())
     answer_lower = answer.lower()
-    candidates = set()
-    
-    # STRATEGY 1: Same-type entities
-    for ent in doc.ents:
-        if (ent.text != answer and
-            4 < len(ent.text) < 100 and
-            abs(len(ent.text.split()) - answer_length) <= 4):
-            if answer_type and ent.label_ == answer_type:
-                candidates.add(ent.text.strip())
-    
-    # STRATEGY 2: Similar noun phrases
-    for chunk in doc.noun_chunks:
-        phrase = chunk.text.strip()
-        if (phrase != answer and
-            4 < len(phrase) < 100 and
-            abs(len(phrase.split()) - answer_length) <= 4 and
-            not re.match(r'^(the|a|an|this|that)\s', phrase, re.I)):
-            candidates.add(phrase)
-    
-    # STRATEGY 3: Answers from other facts - CLEAN THEM
-    for fact in all_facts[:30]:
-        fact_text = fact['text']
-        # Clean markers from fact
-        fact_text = clean_preprocessing_markers(fact_text)
-        fact_text = re.sub(r'\[(?:KEY|FACT|DEF|DATA):[^\]]*\]', '', fact_text)
-        fact_text = re.sub(r'##\s*(?:MAIN TOPIC|FACTUAL CONTENT)\s*\d*:', '', fact_text)
-        
-        fact_answer = extract_answer_fallback(fact_text)
-        if fact_answer and fact_answer != answer and 4 < len(fact_answer) < 100:
-            candidates.add(fact_answer)
-    
-    # STRATEGY 4: Numbers
-    if re.search(r'\d+', answer):
-        for match in re.finditer(r'\d+(?:\.\d+)?(?:\s*(?:million|billion|thousand|%|percent))?', text):
-            num = match.group().strip()
-            if num != answer and num not in answer_lower:
-                candidates.add(num)
-    
-    candidates = list(candidates)
+    
+    candidates = list(analysis.distractor_candidates(answer, answer_type))
     random.shuffle(candidates)
     distractors = candidates[:3]
     
@@ -354,17 +433,87 @@ def generate_smart_distractors(answer, all_facts, text, answer_type=None):
     
     return distractors[:3]
 
-def generate_quiz(text, num_questions=10, difficulty='medium'):
-    """Generate REFINED quiz - EXACTLY 10 QUESTIONS"""
+def rank_candidate_facts(facts, analysis):
+    """
+    Cheap scoring pass: order facts by how likely they are to yield an
+    accepted question (fact type and score, entities, a usable rule-based
+    answer, a sentence length T5 handles well). Ties keep document order.
+    """
+    type_bonus = {'definition': 15, 'fact': 8, 'data': 5, 'sentence': 0}
+    
+    def likelihood(fact):
+        text = fact['text']
+        score = fact.get('score', 0) + type_bonus.get(fact.get('type'), 0)
+        score += min(analysis.entity_counts.get(text, len(fact.get('entities', ()))) * 3, 12)
+        
+        answer = analysis.fallback_answer(text)
+        score += 20 if answer and 4 <= len(answer) <= 120 and '[' not in answer else -10
+        
+        if not 40 <= len(text) <= 220:
+            score -= 10
+        return score
+    
+    return sorted(facts, key=likelihood, reverse=True)
+
+def build_quiz_question(sentence, question_text, answer, analysis, used_answers):
+    """Answer checks, dedup and distractors for one question - None if rejected"""
+    if not answer or len(answer) < 4 or len(answer) > 120:
+        return None
     
-    if not nlp or not qg_pipeline or not qa_pipeline:
+    # FINAL CHECK: No markers in answer
+    if '[' in answer or 'FACTUAL CONTENT' in answer.upper():
+        return None
+    
+    if answer.lower() in used_answers:
+        return None
+    
+    # Detect answer type
+    answer_doc = parse(answer, 'ents')
+    answer_type = answer_doc.ents[0].label_ if answer_doc.ents else None
+    
+    # Generate smart distractors
+    distractors = generate_smart_distractors(answer, analysis, answer_type)
+    
+    if len(distractors) != 3 or answer in distractors:
+        return None
+    
+    # FINAL CHECK: No markers in distractors
+    clean_distractors = [
+        dist for dist in distractors
+        if '[' not in dist and 'FACTUAL CONTENT' not in dist.upper()
+    ]
+    if len(clean_distractors) != 3:
+        return None
+    
+    # Create options
+    options = [answer] + clean_distractors
+    random.shuffle(options)
+    
+    used_answers.add(answer.lower())
+    return {
+        'question': question_text,
+        'options': options,
+        'correct_answer': options.index(answer),
+        'explanation': sentence
+    }
+
+def generate_quiz(text, num_questions=10, difficulty='medium', mode=None):
+    """Generate REFINED quiz - EXACTLY 10 QUESTIONS (mode: fast / balanced / quality)"""
+    
+    mode = mode or QUIZ_DEFAULT_MODE
+    if not is_quiz_mode(mode):
+        raise ValueError(f"Unknown quiz mode: {mode}")
+    decoding = QUIZ_MODES[mode]
+    
+    nlp = get_nlp()
+    if not nlp or not get_qg_pipeline() or not get_qa_pipeline():
         raise Exception("ML models required")
     
     if len(text) < 200:
         raise ValueError("Text too short")
     
     logger.info("="*70)
-    logger.info("🎯 GENERATING GRAMMATICALLY PERFECT QUIZ")
+    logger.info(f"🎯 GENERATING GRAMMATICALLY PERFECT QUIZ ({mode} mode)")
     logger.info("="*70)
     
     # Preprocess
@@ -384,10 +533,7 @@ def generate_quiz(text, num_questions=10, difficulty='medium'):
     validated_facts = []
     for fact in facts:
         # Double-check: no markers in text
-        cleaned_text = clean_preprocessing_markers(fact['text'])
-        cleaned_text = re.sub(r'\[(?:KEY|FACT|DEF|DATA):[^\]]*\]', '', cleaned_text)
-        cleaned_text = re.sub(r'##\s*(?:MAIN TOPIC|FACTUAL CONTENT|KEY DEFINITIONS)\s*\d*:', '', cleaned_text)
-        cleaned_text = cleaned_text.strip()
+        cleaned_text = clean_fact_text(fact['text'])
         
         if len(cleaned_text) >= 20:
             fact['text'] = cleaned_text
@@ -402,94 +548,93 @@ def generate_quiz(text, num_questions=10, difficulty='medium'):
     
     # Clean for ML
     clean_text = clean_preprocessing_markers(preprocessed)
-    clean_text = re.sub(r'\[(?:KEY|FACT|DEF|DATA):[^\]]*\]', '', clean_text)
-    doc = nlp(clean_text[:12000])
     
     questions = []
     used_answers = set()
     
     # CRITICAL: Try up to 8x the target to ensure we get 10 good questions
     target_attempts = min(num_questions * 8, len(validated_facts))
+    candidates = [fact for fact in validated_facts[:target_attempts] if len(fact['text']) >= 25]
+    
+    # Parse the document and the facts once for every question
+    analysis = QuizDocumentAnalysis(clean_text, validated_facts[:max(target_attempts, QuizDocumentAnalysis.DISTRACTOR_FACTS)])
+    
+    # Stage 1: cheap ranking, so the model passes start with the most promising facts
+    ranked = rank_candidate_facts(candidates, analysis)
     
-    for idx, fact in enumerate(validated_facts[:target_attempts]):
+    # Stage 2: batched QG/QA over the ranked facts, one mini-batch at a time,
+    # until enough questions are accepted or the model time budget is spent
+    model_seconds = 0.0
+    use_models = True
+    batches = 0
+    
+    batch_size = decoding['qg_batch_size']
+    for start in range(0, len(ranked), batch_size):
         if len(questions) >= num_questions:
             break
         
-        try:
-            sentence = fact['text']
+        sentences = [fact['text'] for fact in ranked[start:start + batch_size]]
+        batches += 1
+        
+        started = time.perf_counter()
+        if use_models:
+            ml_questions = generate_questions_ml(
+                sentences,
+                batch_size=batch_size,
+                num_beams=decoding['num_beams'],
+                max_length=decoding['max_length']
+            )
+        else:
+            ml_questions = [None] * len(sentences)
+        model_seconds += time.perf_counter() - started
+        
+        question_texts = []
+        for sentence, question_text in zip(sentences, ml_questions):
+            if not question_text:
+                answer_temp = analysis.fallback_answer(sentence)
+                question_text = generate_question_fallback(sentence, answer_temp) if answer_temp else None
+            if question_text and not validate_question(question_text, sentence):
+                question_text = None
+            question_texts.append(question_text)
+        
+        ml_answers = {}
+        if use_models and model_seconds < QUIZ_MODEL_BUDGET_SECONDS:
+            started = time.perf_counter()
+            qa_indices = [i for i, q in enumerate(question_texts) if q]
+            qa_answers = extract_answers_ml(
+                [(sentences[i], question_texts[i]) for i in qa_indices],
+                batch_size=decoding['qa_batch_size']
+            )
+            ml_answers = dict(zip(qa_indices, qa_answers))
+            model_seconds += time.perf_counter() - started
+        
+        if use_models and model_seconds >= QUIZ_MODEL_BUDGET_SECONDS:
+            use_models = False
+            logger.warning(f"⏱️ Quiz model budget spent ({model_seconds:.1f}s) - continuing rule-based")
+        
+        # Validation, dedup and distractors run on the batch results, in rank order
+        for idx, sentence in enumerate(sentences):
+            if len(questions) >= num_questions:
+                break
             
-            if len(sentence) < 25:
+            question_text = question_texts[idx]
+            if not question_text:
                 continue
             
-            # Generate question
-            question_text = generate_question_ml(sentence)
-            
-            if not question_text or not validate_question(question_text, sentence):
-                answer_temp = extract_answer_fallback(sentence)
-                if answer_temp:
-                    question_text = generate_question_fallback(sentence, answer_temp)
-                else:
+            try:
+                answer = ml_answers.get(idx) or analysis.fallback_answer(sentence)
+                question = build_quiz_question(sentence, question_text, answer, analysis, used_answers)
+                if question is None:
                     continue
-            
-            if not validate_question(question_text, sentence):
-                continue
-            
-            # Extract answer
-            answer = extract_answer_ml(sentence, question_text)
-            
-            if not answer:
-                answer = extract_answer_fallback(sentence)
-            
-            if not answer or len(answer) < 4 or len(answer) > 120:
-                continue
-            
-            # FINAL CHECK: No markers in answer
-            if '[' in answer or 'FACTUAL CONTENT' in answer.upper():
-                continue
-            
-            if answer.lower() in used_answers:
-                continue
-            
-            # Detect answer type
-            answer_doc = nlp(answer)
-            answer_type = answer_doc.ents[0].label_ if answer_doc.ents else None
-            
-            # Generate smart distractors
-            distractors = generate_smart_distractors(answer, validated_facts, clean_text, answer_type)
-            
-            if len(distractors) != 3:
+                
+                questions.append(question)
+                logger.info(f"✅ Question {len(questions)}/{num_questions}: {question_text[:60]}...")
+                
+            except Exception as e:
+                logger.warning(f"⚠️ Skipped: {e}")
                 continue
-            
-            if answer in distractors:
-                continue
-            
-            # FINAL CHECK: No markers in distractors
-            clean_distractors = []
-            for dist in distractors:
-                if '[' not in dist and 'FACTUAL CONTENT' not in dist.upper():
-                    clean_distractors.append(dist)
-            
-            if len(clean_distractors) != 3:
-                continue
-            
-            # Create options
-            options = [answer] + clean_distractors
-            random.shuffle(options)
-            correct_index = options.index(answer)
-            
-            questions.append({
-                'question': question_text,
-                'options': options,
-                'correct_answer': correct_index,
-                'explanation': sentence
-            })
-            
-            used_answers.add(answer.lower())
-            logger.info(f"✅ Question {len(questions)}/{num_questions}: {question_text[:60]}...")
-            
-        except Exception as e:
-            logger.warning(f"⚠️ Skipped: {e}")
-            continue
+    
+    logger.info(f"🧠 QG/QA: {batches} batches over {len(ranked)} ranked facts, {model_seconds:.1f}s model time")
     
     if len(questions) == 0:
         raise Exception("Could not generate quality questions from document")
@@ -504,6 +649,7 @@ def generate_quiz(text, num_questions=10, difficulty='medium'):
         'questions': questions,
         'total_questions': len(questions),
         'difficulty': difficulty,
+        'mode': mode,
         'time_limit': time_limit,
         'preprocessed_with_gemini': is_gemini_available()
     }
\ No newline at end of file
@@ -0,0 +1,127 @@
+# services/result_cache.py - Content-addressed cache of generated artifacts
+import copy
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+def make_cache_key(text, action, params):
+    """SHA-256 of the text plus the action and its parameters"""
+    digest = hashlib.sha256(text.encode('utf-8'))
+    digest.update(json.dumps({'action': action, 'params': params}, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+class ResultCache:
+    """Two-tier cache: in-memory LRU in front of an optional Mongo collection"""
+
+    def __init__(self, collection=None, max_entries=256, max_stored=5000, ttl_seconds=7 * 24 * 3600):
+        self.collection = collection
+        self.max_entries = max_entries
+        self.max_stored = max_stored
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {
+            'memory_hits': 0,
+            'mongo_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions': 0
+        }
+
+        if self.collection is not None:
+            try:
+                # Mongo drops documents once expires_at has passed
+                self.collection.create_index('expires_at', expireAfterSeconds=0)
+                self.collection.create_index('last_used')
+            except Exception as e:
+                logger.warning(f"⚠️ Result cache indexes not created: {e}")
+
+    def get(self, key):
+        now = datetime.utcnow()
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires_at, data = entry
+                if expires_at > now:
+                    self.entries.move_to_end(key)
+                    self.counters['memory_hits'] += 1
+                    return copy.deepcopy(data)
+                del self.entries[key]
+
+        if self.collection is not None:
+            try:
+                record = self.collection.find_one_and_update(
+                    {'_id': key, 'expires_at': {'$gt': now}},
+                    {'$set': {'last_used': now}}
+                )
+                if record:
+                    self._remember(key, record['data'], record['expires_at'])
+                    with self.lock:
+                        self.counters['mongo_hits'] += 1
+                    return copy.deepcopy(record['data'])
+            except Exception as e:
+                logger.warning(f"⚠️ Result cache lookup failed: {e}")
+
+        with self.lock:
+            self.counters['misses'] += 1
+        return None
+
+    def set(self, key, data):
+        now = datetime.utcnow()
+        expires_at = now + self.ttl
+        self._remember(key, copy.deepcopy(data), expires_at)
+
+        with self.lock:
+            self.counters['stores'] += 1
+
+        if self.collection is None:
+            return
+
+        try:
+            self.collection.replace_one(
+                {'_id': key},
+                {'_id': key, 'data': data, 'created_at': now, 'last_used': now, 'expires_at': expires_at},
+                upsert=True
+            )
+            self._evict_stored()
+        except Exception as e:
+            logger.warning(f"⚠️ Result cache store failed: {e}")
+
+    def _remember(self, key, data, expires_at):
+        with self.lock:
+            self.entries[key] = (expires_at, data)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def _evict_stored(self):
+        """Drop least recently used Mongo entries beyond max_stored"""
+        excess = self.collection.estimated_document_count() - self.max_stored
+        if excess <= 0:
+            return
+
+        stale = self.collection.find({}, {'_id': 1}).sort('last_used', 1).limit(excess)
+        ids = [record['_id'] for record in stale]
+        if ids:
+            self.collection.delete_many({'_id': {'$in': ids}})
+            with self.lock:
+                self.counters['evictions'] += len(ids)
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+            stats['memory_entries'] = len(self.entries)
+
+        lookups = stats['memory_hits'] + stats['mongo_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['mongo_hits']) / lookups, 3) if lookups else 0.0
+        stats['max_entries'] = self.max_entries
+        stats['max_stored'] = self.max_stored
+        stats['ttl_seconds'] = int(self.ttl.total_seconds())
+        return stats
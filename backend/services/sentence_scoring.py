@@ -0,0 +1,74 @@
+# services/sentence_scoring.py - Extractive sentence scoring (no model or database)
+import re
+from collections import Counter
+
+WORD_PATTERN = re.compile(r'\b[a-z]{3,}\b')
+DIGITS_PATTERN = re.compile(r'\d+')
+CAPITALIZED_PATTERN = re.compile(r'\b[A-Z][a-z]+\b')
+
+# Cue categories with multi-word phrases: one combined alternation each
+CUE_PATTERNS = [
+    (re.compile(r'\b(is|are|means?|refers? to|defined as|consists? of)\b'), 30),
+    (re.compile(r'\b(include|such as|types? of|kinds? of|following|examples?)\b'), 25),
+]
+
+# Single-word cue categories: a \b(...)\b match is exactly a WORD_PATTERN
+# token, so they are looked up in the sentence's word set instead
+CUE_WORDS = [
+    (frozenset({'however', 'therefore', 'thus', 'importantly', 'significantly'}), 18),
+    (frozenset({'algorithm', 'method', 'process', 'system', 'model', 'theory', 'concept'}), 15),
+]
+
+SCORING_STOP_WORDS = {
+    'this', 'that', 'with', 'from', 'have', 'been', 'will', 'would',
+    'could', 'should', 'these', 'those', 'were', 'their', 'there',
+    'where', 'which', 'what', 'when', 'make', 'them', 'more', 'some'
+}
+
+def score_sentences_enhanced(sentences, text):
+    """Enhanced sentence scoring"""
+    if not sentences:
+        return []
+
+    word_freq = Counter(WORD_PATTERN.findall(text.lower()))
+
+    # Important words with their (capped) frequency bonus
+    important_words = {
+        w: min(word_freq[w], 10) for w, _ in word_freq.most_common(150)
+        if w not in SCORING_STOP_WORDS and len(w) > 3
+    }
+
+    scored = []
+    for i, sent in enumerate(sentences):
+        sent_lower = sent.lower()
+        sent_words = set(WORD_PATTERN.findall(sent_lower))
+
+        score = sum(important_words[word] for word in sent_words.intersection(important_words))
+
+        for pattern, bonus in CUE_PATTERNS:
+            if pattern.search(sent_lower):
+                score += bonus
+
+        for cue_words, bonus in CUE_WORDS:
+            if not cue_words.isdisjoint(sent_words):
+                score += bonus
+
+        score += min(len(DIGITS_PATTERN.findall(sent)) * 8, 30)
+        score += min(len(CAPITALIZED_PATTERN.findall(sent)) * 6, 30)
+
+        position_ratio = i / len(sentences)
+        if position_ratio < 0.15:
+            score += 25
+        elif position_ratio > 0.85:
+            score += 15
+
+        word_count = len(sent.split())
+        if 15 < word_count < 40:
+            score += 20
+        elif 40 <= word_count < 60:
+            score += 12
+
+        scored.append((sent, score, i))
+
+    scored.sort(key=lambda x: (x[1], -abs(len(sentences)/2 - x[2])), reverse=True)
+    return scored
@@ -2,11 +2,28 @@
 import fitz  # PyMuPDF
 from PIL import Image
 import logging
+import math
 import cv2
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from config import (
+    PDF_WORKERS, PDF_PARALLEL_MIN_PAGES, PDF_OCR_DPI, PDF_OCR_MIN_CHARS, OCR_CONFIDENCE_THRESHOLD
+)
 
 logger = logging.getLogger(__name__)
 
+pdf_pool = None
+
+# Image quality probe: low contrast or many mid-tones → preprocess before OCR
+OCR_MIN_CONTRAST = 40
+OCR_MAX_MIDTONE_RATIO = 0.35
+
+# Bounded-memory OCR: normalize size, filter and OCR in horizontal bands
+OCR_TARGET_DPI = 300
+OCR_MAX_SIDE = 3500       # ~A4 at 300 DPI
+OCR_BAND_HEIGHT = 1024
+FILTER_PAD = 10           # bilateral (d=9) + adaptive threshold (11x11) reach
+
 # Try to import pytesseract
 try:
     import pytesseract
@@ -16,22 +33,60 @@ except ImportError:
     TESSERACT_AVAILABLE = False
     logger.warning("⚠️ Tesseract OCR not available")
 
+def normalize_for_ocr(img):
+    """
+    Grayscale image at no more than ~300 DPI / OCR_MAX_SIDE pixels. JPEGs are
+    decoded directly at reduced scale (draft mode), so huge phone photos
+    never materialize at full resolution.
+    """
+    scale = 1.0
+    dpi = img.info.get('dpi')
+    if dpi and dpi[0] > OCR_TARGET_DPI:
+        scale = OCR_TARGET_DPI / float(dpi[0])
+    scale = min(scale, OCR_MAX_SIDE / float(max(img.size)))
+
+    if scale >= 1.0:
+        return img if img.mode == 'L' else img.convert('L')
+
+    target = (max(1, int(img.width * scale)), max(1, int(img.height * scale)))
+    img.draft('L', target)
+    gray = img.convert('L')
+    if gray.size != target:
+        gray = gray.resize(target, Image.LANCZOS)
+    logger.info(f"🖼️ Normalized for OCR: {gray.size[0]}x{gray.size[1]}")
+    return gray
+
 def preprocess_image_for_ocr(image):
-    """Preprocess image for better OCR results"""
+    """
+    Preprocess image for better OCR results. Filters run over horizontal
+    bands with FILTER_PAD rows of context into two reused buffers, so
+    working memory stays at a few bands regardless of image height.
+    """
     try:
-        img_array = np.array(image)
+        gray = np.asarray(image if image.mode == 'L' else image.convert('L'))
+        height, width = gray.shape
         
-        if len(img_array.shape) == 3:
-            gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
-        else:
-            gray = img_array
+        thresh = np.empty_like(gray)
+        band_rows = OCR_BAND_HEIGHT + 2 * FILTER_PAD
+        denoised_buf = np.empty((band_rows, width), dtype=np.uint8)
+        thresh_buf = np.empty((band_rows, width), dtype=np.uint8)
         
-        denoised = cv2.bilateralFilter(gray, 9, 75, 75)
-        thresh = cv2.adaptiveThreshold(
-            denoised, 255, 
-            cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-            cv2.THRESH_BINARY, 11, 2
-        )
+        for top in range(0, height, OCR_BAND_HEIGHT):
+            bottom = min(top + OCR_BAND_HEIGHT, height)
+            src_top = max(0, top - FILTER_PAD)
+            src_bottom = min(height, bottom + FILTER_PAD)
+            rows = src_bottom - src_top
+            
+            # Row slices of a C-contiguous buffer are contiguous, so OpenCV writes in place
+            cv2.bilateralFilter(gray[src_top:src_bottom], 9, 75, 75, dst=denoised_buf[:rows])
+            cv2.adaptiveThreshold(
+                denoised_buf[:rows], 255,
+                cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                cv2.THRESH_BINARY, 11, 2,
+                dst=thresh_buf[:rows]
+            )
+            offset = top - src_top
+            thresh[top:bottom] = thresh_buf[offset:offset + bottom - top]
         
         processed_image = Image.fromarray(thresh)
         return processed_image
@@ -39,26 +94,116 @@ def preprocess_image_for_ocr(image):
         logger.warning(f"Image preprocessing failed: {str(e)}, using original")
         return image
 
-def extract_text_from_pdf(pdf_path):
-    """Extract text from PDF file"""
+def iter_text_bands(gray):
+    """
+    Yield (top, bottom) row ranges of about OCR_BAND_HEIGHT, each cut at the
+    row with the least ink near the boundary so text lines are not split.
+    """
+    height = gray.shape[0]
+    top = 0
+    while height - top > OCR_BAND_HEIGHT * 1.5:
+        window_start = top + OCR_BAND_HEIGHT - OCR_BAND_HEIGHT // 4
+        window_end = top + OCR_BAND_HEIGHT
+        ink = np.count_nonzero(gray[window_start:window_end] < 128, axis=1)
+        cut = window_start + int(ink.argmin())
+        yield top, cut
+        top = cut
+    yield top, height
+
+def extract_page_range(pdf_path, start, end):
+    """
+    Worker: open a private fitz handle and extract pages [start, end).
+    Also returns the indexes of image-only pages that need OCR.
+    """
+    pages = []
+    needs_ocr = []
+    with fitz.open(pdf_path) as doc:
+        for i in range(start, end):
+            try:
+                page = doc[i]
+                page_text = page.get_text("text").strip()
+                if len(page_text) < PDF_OCR_MIN_CHARS and page.get_images(full=False):
+                    needs_ocr.append(i)
+                pages.append(page_text)
+            except Exception as e:
+                logger.warning(f"⚠️ Page {i+1} extraction failed: {e}")
+                pages.append("")
+    return start, pages, needs_ocr
+
+def ocr_pdf_page(pdf_path, index, dpi):
+    """Worker: rasterize one scanned page and OCR it"""
+    with fitz.open(pdf_path) as doc:
+        pix = doc[index].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+        img = Image.frombytes("L", [pix.width, pix.height], pix.samples)
+
+    processed_img = preprocess_image_for_ocr(normalize_for_ocr(img))
+    text, _ = ocr_with_confidence(processed_img)
+    return index, text.strip()
+
+def get_pdf_pool():
+    """Process pool shared by all PDF extractions in this process"""
+    global pdf_pool
+    if pdf_pool is None:
+        pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+    return pdf_pool
+
+def extract_text_from_pdf(pdf_path, progress=None):
+    """
+    Extract text from PDF file. Large PDFs are fanned out across a process
+    pool in page batches; image-only pages are rasterized and OCR'd in the
+    same pool. progress(pages_done, page_count) is called as pages finish.
+    """
     logger.info(f"🚀 Starting text extraction for PDF: {pdf_path}")
-    text_content = ""
 
     try:
-        # Open PDF and extract text WITHIN the with-block
         with fitz.open(pdf_path) as doc:
             page_count = doc.page_count
-            logger.info(f"📄 Processing PDF with {page_count} pages...")
+        logger.info(f"📄 Processing PDF with {page_count} pages...")
+
+        pages = [""] * page_count
+        needs_ocr = []
+        pages_done = 0
+
+        if page_count < PDF_PARALLEL_MIN_PAGES:
+            _, pages, needs_ocr = extract_page_range(pdf_path, 0, page_count)
+            pages_done = page_count - len(needs_ocr)
+            if progress:
+                progress(pages_done, page_count)
+        else:
+            # ~4 batches per worker keeps cores busy without per-page IPC overhead
+            batch_size = max(1, math.ceil(page_count / (PDF_WORKERS * 4)))
+            pool = get_pdf_pool()
+            futures = [
+                pool.submit(extract_page_range, pdf_path, start, min(start + batch_size, page_count))
+                for start in range(0, page_count, batch_size)
+            ]
+            for future in as_completed(futures):
+                start, batch, batch_ocr = future.result()
+                pages[start:start + len(batch)] = batch
+                needs_ocr.extend(batch_ocr)
+                pages_done += len(batch) - len(batch_ocr)
+                if progress:
+                    progress(pages_done, page_count)
+            logger.info(f"📄 Extracted {page_count} pages in {len(futures)} batches ({PDF_WORKERS} workers)")
+
+        if needs_ocr:
+            if TESSERACT_AVAILABLE:
+                logger.info(f"🖼️ OCR fallback for {len(needs_ocr)} image-only pages at {PDF_OCR_DPI} DPI")
+                for index, page_text in ocr_pages(pdf_path, sorted(needs_ocr)):
+                    pages[index] = page_text
+                    pages_done += 1
+                    if progress:
+                        progress(pages_done, page_count)
+            else:
+                logger.warning(f"⚠️ {len(needs_ocr)} image-only pages skipped: Tesseract OCR not available")
+                if progress:
+                    progress(page_count, page_count)
+
+        text_content = "".join(page + "\n\n" for page in pages)
 
-            for i, page in enumerate(doc):
-                page_text = page.get_text("text").strip()
-                logger.info(f"📄 Page {i+1}: Extracted {len(page_text)} chars")
-                text_content += page_text + "\n\n"
-        
-        # After with-block, doc is closed but text_content is safe
         if not text_content.strip():
             raise ValueError("No text extracted from PDF")
-        
+
         logger.info(f"✅ PDF extraction complete: {len(text_content)} chars")
         return text_content
 
@@ -66,6 +211,95 @@ def extract_text_from_pdf(pdf_path):
         logger.error(f"❌ PDF extraction error: {e}", exc_info=True)
         raise
 
+def ocr_pages(pdf_path, indexes):
+    """Yield (index, text) for each scanned page, OCR'd one page per task"""
+    if len(indexes) == 1:
+        try:
+            yield ocr_pdf_page(pdf_path, indexes[0], PDF_OCR_DPI)
+        except Exception as e:
+            logger.error(f"❌ Page OCR failed: {e}")
+        return
+
+    pool = get_pdf_pool()
+    futures = [pool.submit(ocr_pdf_page, pdf_path, index, PDF_OCR_DPI) for index in indexes]
+    for future in as_completed(futures):
+        try:
+            yield future.result()
+        except Exception as e:
+            logger.error(f"❌ Page OCR failed: {e}")
+
+def probe_image_quality(img):
+    """
+    Cheap quality probe on a downscaled grayscale copy: global contrast and
+    the share of mid-tone pixels. Clean scans/screenshots are bimodal; phone
+    photos with shadows or paper texture have many mid-tones.
+    """
+    probe = img.convert('L')
+    probe.thumbnail((512, 512))
+    gray = np.asarray(probe)
+    contrast = float(gray.std())
+    midtone_ratio = float(np.count_nonzero((gray > 64) & (gray < 192))) / gray.size
+    return contrast, midtone_ratio
+
+def ocr_with_confidence(image):
+    """One Tesseract pass, streamed band by band - returns (text, mean word confidence)"""
+    gray = np.asarray(image if image.mode == 'L' else image.convert('L'))
+
+    lines = {}
+    confidences = []
+    for band, (top, bottom) in enumerate(iter_text_bands(gray)):
+        data = pytesseract.image_to_data(
+            image.crop((0, top, image.width, bottom)),
+            lang='eng', config=r'--oem 3 --psm 6', output_type=pytesseract.Output.DICT
+        )
+        for i, word in enumerate(data['text']):
+            conf = float(data['conf'][i])
+            if conf < 0 or not word.strip():
+                continue
+            confidences.append(conf)
+            key = (band, data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            lines.setdefault(key, []).append(word)
+
+    text = '\n'.join(' '.join(words) for _, words in sorted(lines.items()))
+    mean_conf = sum(confidences) / len(confidences) if confidences else 0.0
+    return text, mean_conf
+
+def ocr_image(img):
+    """
+    Adaptive OCR: probe the image, run the likelier path first, and only run
+    the other path when Tesseract confidence is below OCR_CONFIDENCE_THRESHOLD.
+    Returns (text, passes).
+    """
+    contrast, midtone_ratio = probe_image_quality(img)
+    preprocess_first = contrast < OCR_MIN_CONTRAST or midtone_ratio > OCR_MAX_MIDTONE_RATIO
+    logger.info(f"🔎 OCR probe: contrast={contrast:.1f}, midtones={midtone_ratio:.2f} → "
+                f"{'preprocessed' if preprocess_first else 'direct'} first")
+
+    paths = [
+        lambda: ocr_with_confidence(preprocess_image_for_ocr(img)),
+        lambda: ocr_with_confidence(img)
+    ]
+    if not preprocess_first:
+        paths.reverse()
+
+    best_text, best_conf = "", -1.0
+    passes = 0
+    for path in paths:
+        try:
+            text, conf = path()
+        except Exception as e:
+            logger.error(f"OCR pass failed: {e}")
+            continue
+        passes += 1
+        logger.info(f"OCR pass {passes}: {len(text)} chars, confidence {conf:.1f}")
+
+        if (conf, len(text)) > (best_conf, len(best_text)):
+            best_text, best_conf = text, conf
+        if best_conf >= OCR_CONFIDENCE_THRESHOLD:
+            break
+
+    return best_text, passes
+
 def extract_text_from_image(file_path):
     """Extract text from image file"""
     if not TESSERACT_AVAILABLE:
@@ -75,32 +309,12 @@ def extract_text_from_image(file_path):
         logger.info(f"🖼️ Processing image: {file_path}")
         
         img = Image.open(file_path)
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
-        
         logger.info(f"Image size: {img.size}")
         
-        # Try multiple OCR approaches
-        results = []
-        
-        try:
-            text1 = pytesseract.image_to_string(img, lang='eng', config=r'--oem 3 --psm 6')
-            results.append(text1)
-            logger.info(f"Direct OCR: {len(text1)} chars")
-        except Exception as e:
-            logger.error(f"Direct OCR failed: {e}")
-        
-        try:
-            processed_img = preprocess_image_for_ocr(img)
-            text2 = pytesseract.image_to_string(processed_img, lang='eng', config=r'--oem 3 --psm 6')
-            results.append(text2)
-            logger.info(f"Preprocessed OCR: {len(text2)} chars")
-        except Exception as e:
-            logger.error(f"Preprocessed OCR failed: {e}")
+        text, passes = ocr_image(normalize_for_ocr(img))
         
-        if results:
-            text = max(results, key=len)
-            logger.info(f"✅ Best OCR result: {len(text)} chars")
+        if passes:
+            logger.info(f"✅ Best OCR result: {len(text)} chars ({passes} pass{'es' if passes > 1 else ''})")
             
             if len(text.strip()) < 50:
                 return f"Low quality OCR: only {len(text)} chars extracted"
@@ -113,13 +327,13 @@ def extract_text_from_image(file_path):
         logger.error(f"❌ Image extraction error: {e}", exc_info=True)
         raise
 
-def extract_text(file_path, file_type):
+def extract_text(file_path, file_type, progress=None):
     """Main extraction function"""
     try:
         logger.info(f"🚀 Starting extraction for {file_type}: {file_path}")
         
         if file_type.lower() == 'pdf':
-            text = extract_text_from_pdf(file_path)
+            text = extract_text_from_pdf(file_path, progress=progress)
         elif file_type.lower() in ['jpg', 'jpeg', 'png']:
             text = extract_text_from_image(file_path)
         else:
@@ -0,0 +1,127 @@
+# services/text_normalization.py - Precompiled marker cleanup and sentence checks
+import re
+
+MARKER_TYPES = ('KEY', 'FACT', 'DEF', 'DATA', 'CAUSE', 'EFFECT', 'LIST', 'COMPARE')
+
+# [KEY: ...], [FACT: ...] etc. - any preprocessing marker with its content
+MARKER_RE = re.compile(r'\[(?:' + '|'.join(MARKER_TYPES) + r'):[^\]]*\]')
+MARKER_OPEN_RE = re.compile(r'\[(?:KEY|FACT|DEF|DATA):')
+MARKER_CONTENT_RE = {
+    marker_type: re.compile(rf'\[{marker_type}:([^\]]+)\]') for marker_type in MARKER_TYPES
+}
+
+# What clean_preprocessing_markers deletes, in order. Each pass can join
+# fragments into a match for a later one (e.g. "?[KEY: x]??" becomes "???"),
+# so they stay sequential; the literal lets a pass be skipped when it cannot match.
+LABEL_PASSES = [
+    (f'[{marker_type}:', re.compile(rf'\[{marker_type}:[^\]]*\]')) for marker_type in MARKER_TYPES
+] + [
+    ('#', re.compile(r'##\s*MAIN TOPIC\s*\d+:')),
+    ('#', re.compile(r'###\s*Subtopic\s*[\d.]+:')),
+    ('#', re.compile(r'#\s*CENTRAL CONCEPT:')),
+    ('#', re.compile(r'##\s*STEP\s*\d+:')),
+    ('#', re.compile(r'##\s*DECISION:')),
+    ('???', re.compile(r'\?\?\?+')),
+]
+# Quiz facts also drop the quiz prompt's section headers
+FACT_HEADER_RE = re.compile(r'##\s*(?:MAIN TOPIC|FACTUAL CONTENT|KEY DEFINITIONS)\s*\d*:')
+
+BLANK_LINES_RE = re.compile(r'\n{3,}')
+MULTI_SPACE_RE = re.compile(r' {2,}')
+RULE_LINE_RE = re.compile(r'^\s*[-=*]+\s*$', re.MULTILINE)
+
+# clean_broken_pdf_text
+WHITESPACE_RE = re.compile(r'\s+')
+DANGLING_VERB_COMMA_RE = re.compile(r'\b(is|are|was|were)(?:(\s+a)\s*,\s*|\s*,\s*)')
+SPACE_BEFORE_PUNCT_RE = re.compile(r'\s+([,;.!?])')
+LEADING_HEADER_RE = re.compile(r'^##\s+')
+REPEATED_DOTS_RE = re.compile(r'\.{2,}')
+MISSING_SPACE_RE = re.compile(r'([.!?])([A-Z])')
+
+# Sentence checks
+DANGLING_DEFINITION_RE = re.compile(r'\b(?:is|are|was|were)\s+a\s*[,.]?\s*$')
+# One end-anchored scan: optional verb, final article, optional punctuation
+SENTENCE_TAIL_RE = re.compile(r'(\b(?:is|are|was|were)\s+)?\b(a|an|the)\s*([,.]?)\s*$', re.I)
+# One scan for orphan commas; the lookahead reports what follows each one
+SPACED_COMMA_RE = re.compile(r'\s+,(?=(\s+)(?:(and|or|but)|(\w))?)')
+SENTENCE_SPLIT_RE = re.compile(r'[.!?]+')
+
+# Flags that make a sentence unusable in a summary
+INCOMPLETE_FLAGS = frozenset({'dangling_definition', 'article_ending', 'lowercase_start', 'orphan_comma'})
+
+def clean_preprocessing_markers(text, fact_labels=False):
+    """Remove ALL Gemini preprocessing markers (fact_labels: quiz section headers too)"""
+    for literal, pattern in LABEL_PASSES:
+        if literal in text:
+            text = pattern.sub('', text)
+    text = BLANK_LINES_RE.sub('\n\n', text)
+    text = MULTI_SPACE_RE.sub(' ', text)
+    text = RULE_LINE_RE.sub('', text)
+    text = text.strip()
+    if fact_labels:
+        text = MARKER_RE.sub('', text)
+        text = FACT_HEADER_RE.sub('', text).strip()
+    return text
+
+def extract_marker_content(text, marker_type):
+    """Extract content from specific markers"""
+    pattern = MARKER_CONTENT_RE.get(marker_type) or re.compile(rf'\[{marker_type}:([^\]]+)\]')
+    return [m.strip() for m in pattern.findall(text)]
+
+def _fix_dangling_verb(match):
+    if match.group(2):
+        return f'{match.group(1)} a distributed ledger technology, '
+    return f'{match.group(1)} '
+
+def clean_broken_pdf_text(text):
+    """Fix common PDF extraction issues - ENHANCED"""
+    text = WHITESPACE_RE.sub(' ', text)
+    text = DANGLING_VERB_COMMA_RE.sub(_fix_dangling_verb, text)
+    # Whitespace is single spaces now, so " , " / " . " only need the space before removed
+    text = SPACE_BEFORE_PUNCT_RE.sub(r'\1', text)
+    text = LEADING_HEADER_RE.sub('', text)
+    text = REPEATED_DOTS_RE.sub('.', text)
+    text = MISSING_SPACE_RE.sub(r'\1 \2', text)
+    return text.strip()
+
+def sentence_flags(sentence):
+    """
+    Every completeness problem of one sentence, from two scans:
+    dangling_definition ("X is a ,"), article_ending, lowercase_start,
+    orphan_comma (" , " not before and/or/but) and spaced_comma (" , " before a word)
+    """
+    flags = set()
+    if not sentence:
+        return flags
+
+    if sentence[0].islower():
+        flags.add('lowercase_start')
+
+    tail = SENTENCE_TAIL_RE.search(sentence)
+    if tail:
+        verb, article, punct = tail.groups()
+        if verb and verb.split()[0] in ('is', 'are', 'was', 'were') and article == 'a':
+            flags.add('dangling_definition')
+        # The article needs text before it on the same line, and no punctuation after
+        start = tail.start(2)
+        if not punct and start > 0 and '\n' not in sentence[:start]:
+            flags.add('article_ending')
+
+    for comma in SPACED_COMMA_RE.finditer(sentence):
+        spaces, conjunction, word = comma.groups()
+        if spaces is None:
+            continue
+        if len(spaces) > 1 or not conjunction:
+            flags.add('orphan_comma')
+        if conjunction or word:
+            flags.add('spaced_comma')
+
+    return flags
+
+def clean_and_validate(text, fact_labels=False):
+    """Clean markers and check completeness in one call - returns (cleaned, flags)"""
+    cleaned = clean_preprocessing_markers(text, fact_labels=fact_labels)
+    return cleaned, sentence_flags(cleaned)
+
+def is_complete_sentence(sentence):
+    return not (sentence_flags(sentence) & INCOMPLETE_FLAGS)
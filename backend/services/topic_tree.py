@@ -0,0 +1,82 @@
+# services/topic_tree.py - Recursive clustering of sentence embeddings into a topic tree
+import numpy as np
+
+class TopicCluster:
+    """Sentence indices of one topic and its sub-topics"""
+
+    def __init__(self, indices, depth, parent=None):
+        self.indices = indices
+        self.depth = depth
+        self.parent = parent
+        self.children = []
+
+def spherical_kmeans(vectors, k, iterations=25, seed=0):
+    """Cosine k-means over unit vectors with k-means++ seeding; returns labels"""
+    n = len(vectors)
+    rng = np.random.default_rng(seed)
+
+    chosen = [int(rng.integers(n))]
+    distance = 1 - vectors @ vectors[chosen[0]]
+    for _ in range(1, k):
+        weights = np.clip(distance, 0, None)
+        total = weights.sum()
+        index = int(rng.choice(n, p=weights / total)) if total > 0 else int(rng.integers(n))
+        chosen.append(index)
+        np.minimum(distance, 1 - vectors @ vectors[index], out=distance)
+    centers = vectors[chosen].copy()
+
+    labels = None
+    for _ in range(iterations):
+        new_labels = np.argmax(vectors @ centers.T, axis=1)
+        if labels is not None and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, vectors)
+        norms = np.linalg.norm(sums, axis=1)
+        # An emptied cluster keeps its previous center
+        filled = norms > 0
+        centers[filled] = sums[filled] / norms[filled, None]
+
+    return labels
+
+def centroid_order(vectors, indices):
+    """indices sorted by similarity to their normalized mean, closest first"""
+    members = vectors[indices]
+    centroid = members.sum(axis=0)
+    centroid /= max(np.linalg.norm(centroid), 1e-12)
+    return indices[np.argsort(-(members @ centroid), kind='stable')]
+
+def build_topic_tree(vectors, max_depth=4, branching=6, min_cluster_size=3, max_clusters=400):
+    """
+    Split the sentences breadth-first: every cluster with at least two
+    min_cluster_size groups' worth of sentences, above max_depth, is split into
+    up to `branching` sub-clusters, fewer when only that many clusters remain
+    of max_clusters. Each level is finished before the next one starts, so
+    the shallower levels are the ones that get complete.
+    """
+    root = TopicCluster(np.arange(len(vectors)), 0)
+    queue = [root]
+    count = 0
+
+    for cluster in queue:
+        if cluster.depth >= max_depth or len(cluster.indices) < 2 * min_cluster_size:
+            continue
+
+        k = min(branching, len(cluster.indices) // min_cluster_size, max_clusters - count)
+        if k < 2:
+            continue
+        labels = spherical_kmeans(vectors[cluster.indices], k, seed=cluster.depth)
+        groups = [cluster.indices[labels == label] for label in range(k)]
+        groups = sorted((group for group in groups if len(group)), key=len, reverse=True)
+        if len(groups) < 2:
+            continue
+
+        for group in groups:
+            child = TopicCluster(centroid_order(vectors, group), cluster.depth + 1, cluster)
+            cluster.children.append(child)
+            queue.append(child)
+        count += len(groups)
+
+    return root
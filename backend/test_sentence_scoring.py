@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+SENTENCE SCORING REGRESSION TEST - current scorer vs the previous regex loop
+Usage: python -m pytest test_sentence_scoring.py
+       (no database, models or network needed)
+"""
+
+import re
+import random
+import unittest
+from collections import Counter
+
+from services.sentence_scoring import score_sentences_enhanced
+
+SAMPLE_SENTENCES = [
+    "Photosynthesis is the process by which green plants convert light energy into chemical energy.",
+    "The mitochondria is the powerhouse of the cell and produces ATP.",
+    "Examples of renewable energy include solar, wind and hydroelectric power.",
+    "However, the results were significantly different in 2019 than in 2018.",
+    "Newton's second law states that force equals mass times acceleration.",
+    "The algorithm runs in O(n log n) time on 1000000 records.",
+    "Types of rocks include igneous, sedimentary and metamorphic rocks formed over millions of years.",
+    "Therefore the model must be validated against the test set before deployment to production systems.",
+    "Marie Curie won the Nobel Prize in Physics in 1903 and in Chemistry in 1911.",
+    "The following steps describe how the system processes an incoming request from a client application in a distributed environment with many services.",
+    "Blockchain refers to a distributed ledger that records transactions.",
+    "İstanbul was known as Constantinople until 1930.",
+    "This concept consists of three parts: input, processing and output.",
+]
+
+# Word boundaries, phrases split across lines, case folding that changes length
+EDGE_SENTENCES = [
+    "It refers\nto nothing and kinds of_things are not kinds of things.",
+    "Thesis isn't is; ARE are. MEANS means? defined  as defined as.",
+    "x2 and 12ab34 and ２０２４ and Über Café ÉCOLE Ab_Cd.",
+    "İİİ İstanbul is twice as long lowercased as the Thesystem.",
+    "",
+    "\n",
+    "Types ofSystem of type of process.",
+]
+
+def legacy_score_sentences(sentences, text):
+    """The previous per-sentence regex loop, kept as the reference output"""
+    if not sentences:
+        return []
+
+    words = re.findall(r'\b[a-z]{3,}\b', text.lower())
+    word_freq = Counter(words)
+
+    stop_words = {
+        'this', 'that', 'with', 'from', 'have', 'been', 'will', 'would',
+        'could', 'should', 'these', 'those', 'were', 'their', 'there',
+        'where', 'which', 'what', 'when', 'make', 'them', 'more', 'some'
+    }
+
+    important_words = {
+        w for w, _ in word_freq.most_common(150)
+        if w not in stop_words and len(w) > 3
+    }
+
+    scored = []
+    for i, sent in enumerate(sentences):
+        score = 0
+        sent_lower = sent.lower()
+        sent_words = set(re.findall(r'\b[a-z]{3,}\b', sent_lower))
+
+        overlap = sent_words & important_words
+        for word in overlap:
+            score += min(word_freq[word], 10)
+
+        if re.search(r'\b(is|are|means?|refers? to|defined as|consists? of)\b', sent_lower):
+            score += 30
+
+        if re.search(r'\b(include|such as|types? of|kinds? of|following|examples?)\b', sent_lower):
+            score += 25
+
+        if re.search(r'\b(however|therefore|thus|importantly|significantly)\b', sent_lower):
+            score += 18
+
+        score += min(len(re.findall(r'\d+', sent)) * 8, 30)
+        score += min(len(re.findall(r'\b[A-Z][a-z]+\b', sent)) * 6, 30)
+
+        if re.search(r'\b(algorithm|method|process|system|model|theory|concept)\b', sent_lower):
+            score += 15
+
+        position_ratio = i / len(sentences)
+        if position_ratio < 0.15:
+            score += 25
+        elif position_ratio > 0.85:
+            score += 15
+
+        word_count = len(sent.split())
+        if 15 < word_count < 40:
+            score += 20
+        elif 40 <= word_count < 60:
+            score += 12
+
+        scored.append((sent, score, i))
+
+    scored.sort(key=lambda x: (x[1], -abs(len(sentences)/2 - x[2])), reverse=True)
+    return scored
+
+def synthetic_sentences(count, rng=random):
+    """Sample sentences with random extra words so frequencies vary"""
+    pool = SAMPLE_SENTENCES + EDGE_SENTENCES
+    vocabulary = re.findall(r'\w+', ' '.join(pool)) + ['data', 'cells', 'energy', 'v2', 'café', 'refers to', '\n']
+    sentences = []
+    for _ in range(count):
+        extra = ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(0, 12)))
+        sentences.append(f"{rng.choice(pool)} {extra}".strip(' '))
+    return sentences
+
+class SentenceScoringTest(unittest.TestCase):
+    def assert_same_scores(self, sentences, text=None):
+        text = ' '.join(sentences) if text is None else text
+        self.assertEqual(score_sentences_enhanced(sentences, text), legacy_score_sentences(sentences, text))
+
+    def test_empty(self):
+        self.assertEqual(score_sentences_enhanced([], 'anything'), [])
+
+    def test_sample_sentences(self):
+        self.assert_same_scores(SAMPLE_SENTENCES)
+
+    def test_edge_sentences(self):
+        self.assert_same_scores(EDGE_SENTENCES)
+        self.assert_same_scores(EDGE_SENTENCES, text='')
+
+    def test_random_documents(self):
+        rng = random.Random(0)
+        for size in (1, 2, 7, 50, 500, 2000):
+            with self.subTest(size=size):
+                self.assert_same_scores(synthetic_sentences(size, rng))
+
+if __name__ == '__main__':
+    unittest.main()
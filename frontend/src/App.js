@@ -2,6 +2,7 @@
 
 import { useState, useEffect } from "react"
 import axios from "axios"
+import { waitForJobResult } from "./jobPolling"
 import {
   Upload,
   Brain,
@@ -224,6 +225,13 @@ const App = () => {
 
       showToast(actionType, "processing")
 
+      // Summaries stream into the summary page as they are generated
+      if (action === "summarize") {
+        setDocumentSelectorMode(null)
+        setViewingContent({ type: "summary", documentId: document._id, documentName: document.original_filename })
+        return
+      }
+
       const response = await fetch(`/api/uploads/action/${document._id}/${action}`, {
         method: "POST",
         headers: {
@@ -239,7 +247,7 @@ const App = () => {
         throw new Error(errorData.error || "Failed to process document")
       }
 
-      const data = await response.json()
+      const data = await waitForJobResult(await response.json(), token)
 
       if (data.success) {
         let contentId = null
@@ -306,7 +314,19 @@ const App = () => {
 
     if (viewingContent) {
       if (viewingContent.type === "summary") {
-        return <SummaryPage summaryId={viewingContent.id} onBack={goBack} />
+        return (
+          <SummaryPage
+            summaryId={viewingContent.id}
+            documentId={viewingContent.documentId}
+            documentName={viewingContent.documentName}
+            onStreamComplete={(summaryId) => showToast("summary", "completed", summaryId)}
+            onStreamError={(error) => {
+              showToast("summary", "error")
+              alert(error.message || "Failed to process document")
+            }}
+            onBack={goBack}
+          />
+        )
       } else if (viewingContent.type === "mindmap") {
         return <MindMapPage mindmapId={viewingContent.id} onBack={goBack} />
       } else if (viewingContent.type === "quiz") {
@@ -309,11 +309,11 @@ const DownloadsPage = ({ onViewSummary, onViewMindmap }) => {
                   <div className="card-footer">
                     <div className="stat">
                       <span className="stat-label">Nodes</span>
-                      <span className="stat-value">{mindmap.nodes?.length || 0}</span>
+                      <span className="stat-value">{mindmap.node_count || 0}</span>
                     </div>
                     <div className="stat">
                       <span className="stat-label">Connections</span>
-                      <span className="stat-value">{mindmap.edges?.length || 0}</span>
+                      <span className="stat-value">{mindmap.edge_count || 0}</span>
                     </div>
                   </div>
                 </div>
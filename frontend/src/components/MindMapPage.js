@@ -3,12 +3,19 @@ import React, { useState, useEffect, useRef } from 'react';
 import { Download, ZoomIn, ZoomOut, Maximize2 } from 'lucide-react';
 import './MindMapPage.css';
 
+// Mindmap canvases are sized to their content, so large maps need deep zoom-out
+const MIN_ZOOM = 0.02;
+const MAX_EXPORT_SIDE = 8000;
+
 const MindMapPage = ({ mindmapId, onBack }) => {
   const [mindmap, setMindmap] = useState(null);
   const [loading, setLoading] = useState(true);
   const [transform, setTransform] = useState({ x: 0, y: 0, k: 0.5 });
   const [isDragging, setIsDragging] = useState(false);
   const [dragStart, setDragStart] = useState({ x: 0, y: 0 });
+  const [expanded, setExpanded] = useState(new Set());
+  const [subtrees, setSubtrees] = useState({});
+  const pointerDownRef = useRef(null);
   
   const canvasRef = useRef(null);
   const containerRef = useRef(null);
@@ -24,7 +31,22 @@ const MindMapPage = ({ mindmapId, onBack }) => {
 
   useEffect(() => {
     if (mindmap && canvasRef.current) renderVisualization();
-  }, [mindmap, transform]);
+  }, [mindmap, transform, expanded, subtrees]);
+
+  // Nodes and edges on screen: the stored levels plus every expanded (and
+  // fetched) subtree whose parent is itself on screen
+  const getVisibleGraph = () => {
+    const nodes = [...(mindmap.nodes || [])];
+    const edges = [...(mindmap.edges || [])];
+    for (let i = 0; i < nodes.length; i++) {
+      const subtree = subtrees[nodes[i].id];
+      if (subtree && expanded.has(nodes[i].id)) {
+        nodes.push(...subtree.nodes);
+        edges.push(...subtree.edges);
+      }
+    }
+    return { nodes, edges };
+  };
 
   useEffect(() => {
     const resizeCanvas = () => {
@@ -49,10 +71,13 @@ const MindMapPage = ({ mindmapId, onBack }) => {
       if (response.ok) {
         const data = await response.json();
         setMindmap(data.mindmap);
+        setExpanded(new Set());
+        setSubtrees({});
         
         const isFlowchart = data.mindmap.type === 'flowchart';
         const virtualWidth = data.mindmap.canvas_width || (isFlowchart ? 1800 : 5000);
-        const initialZoom = 0.5;
+        // Large maps start zoomed out far enough to show their full width
+        const initialZoom = Math.min(0.5, containerRef.current.clientWidth / virtualWidth);
         const initialPanX = (containerRef.current.clientWidth / 2) - (virtualWidth / 2) * initialZoom;
         const initialPanY = 100 * initialZoom;
         
@@ -65,6 +90,23 @@ const MindMapPage = ({ mindmapId, onBack }) => {
     }
   };
 
+  // Children of a collapsed node, positioned by the server; fetched once per node
+  const fetchSubtree = async (nodeId) => {
+    try {
+      const token = localStorage.getItem('token');
+      const response = await fetch(`/api/uploads/mindmap/${mindmapId}/subtree/${encodeURIComponent(nodeId)}`, {
+        headers: { 'Authorization': `Bearer ${token}` }
+      });
+      if (!response.ok) throw new Error(`Subtree request failed with status: ${response.status}`);
+      const data = await response.json();
+      setSubtrees(prev => ({ ...prev, [nodeId]: data.subtree }));
+      return true;
+    } catch (error) {
+      console.error('Error:', error);
+      return false;
+    }
+  };
+
   const wrapText = (ctx, text, maxWidth) => {
     const lines = [];
     const preSplitLines = text.split('\n');
@@ -117,13 +159,13 @@ const MindMapPage = ({ mindmapId, onBack }) => {
     ctx.translate(transform.x, transform.y);
     ctx.scale(transform.k, transform.k);
 
-    const nodes = mindmap.nodes || [];
-    const edges = mindmap.edges || [];
+    const { nodes, edges } = getVisibleGraph();
+    const nodeById = new Map(nodes.map(n => [n.id, n]));
 
     // Draw edges FIRST
     edges.forEach(edge => {
-      const fromNode = nodes.find(n => n.id === edge.from);
-      const toNode = nodes.find(n => n.id === edge.to);
+      const fromNode = nodeById.get(edge.from);
+      const toNode = nodeById.get(edge.to);
       if (!fromNode || !toNode) return;
 
       const edgeColor = edge.color || '#8b5cf6';
@@ -261,12 +303,30 @@ const MindMapPage = ({ mindmapId, onBack }) => {
       });
       
       ctx.restore();
+
+      // Collapsed subtree: a "+N" badge under the node, click to expand
+      if (node.collapsed) {
+        const isOpen = expanded.has(node.id);
+        const badgeY = node.y + shapeHeight / (node.shape === 'box' ? 2 : 1) + 16;
+        ctx.save();
+        ctx.fillStyle = darkenColor(nodeColor, 20);
+        ctx.beginPath();
+        ctx.roundRect(node.x - 26, badgeY - 13, 52, 26, 13);
+        ctx.fill();
+        ctx.fillStyle = '#FFFFFF';
+        ctx.font = 'bold 13px Arial, sans-serif';
+        ctx.textAlign = 'center';
+        ctx.textBaseline = 'middle';
+        ctx.fillText(isOpen ? '−' : `+${node.child_count || ''}`, node.x, badgeY);
+        ctx.restore();
+      }
     });
 
     ctx.restore();
   };
 
   const handleMouseDown = (e) => {
+    pointerDownRef.current = { x: e.nativeEvent.offsetX, y: e.nativeEvent.offsetY };
     setIsDragging(true);
     setDragStart({ x: e.nativeEvent.offsetX - transformRef.current.x, y: e.nativeEvent.offsetY - transformRef.current.y });
   };
@@ -281,8 +341,39 @@ const MindMapPage = ({ mindmapId, onBack }) => {
     }
   };
   
-  const handleMouseUp = () => setIsDragging(false);
-  const handleMouseLeave = () => setIsDragging(false);
+  const handleMouseUp = async (e) => {
+    setIsDragging(false);
+    const down = pointerDownRef.current;
+    pointerDownRef.current = null;
+    if (!down || !mindmap) return;
+
+    // A click (not a drag) on a collapsed node toggles its subtree
+    const { offsetX, offsetY } = e.nativeEvent;
+    if (Math.abs(offsetX - down.x) > 4 || Math.abs(offsetY - down.y) > 4) return;
+
+    const { x, y, k } = transformRef.current;
+    const wx = (offsetX - x) / k;
+    const wy = (offsetY - y) / k;
+    const hit = getVisibleGraph().nodes.find(n =>
+      n.collapsed && Math.abs(n.x - wx) < 130 && Math.abs(n.y - wy) < 70
+    );
+    if (!hit) return;
+
+    if (expanded.has(hit.id)) {
+      setExpanded(prev => {
+        const next = new Set(prev);
+        next.delete(hit.id);
+        return next;
+      });
+      return;
+    }
+    if (!subtrees[hit.id] && !(await fetchSubtree(hit.id))) return;
+    setExpanded(prev => new Set(prev).add(hit.id));
+  };
+  const handleMouseLeave = () => {
+    setIsDragging(false);
+    pointerDownRef.current = null;
+  };
   
   const handleWheel = (e) => {
     e.preventDefault();
@@ -290,7 +381,7 @@ const MindMapPage = ({ mindmapId, onBack }) => {
     const { offsetX, offsetY } = e.nativeEvent;
     const currentTransform = transformRef.current;
     const delta = e.deltaY > 0 ? -zoomIntensity : zoomIntensity;
-    const newZoom = Math.max(0.1, Math.min(currentTransform.k + delta, 3));
+    const newZoom = Math.max(MIN_ZOOM, Math.min(currentTransform.k + delta, 3));
     const wx = (offsetX - currentTransform.x) / currentTransform.k;
     const wy = (offsetY - currentTransform.y) / currentTransform.k;
     const newX = offsetX - wx * newZoom;
@@ -299,11 +390,11 @@ const MindMapPage = ({ mindmapId, onBack }) => {
   };
   
   const handleZoomIn = () => setTransform(prev => ({ ...prev, k: Math.min(prev.k * 1.5, 3) }));
-  const handleZoomOut = () => setTransform(prev => ({ ...prev, k: Math.max(prev.k / 1.5, 0.1) }));
+  const handleZoomOut = () => setTransform(prev => ({ ...prev, k: Math.max(prev.k / 1.5, MIN_ZOOM) }));
   const handleReset = () => { 
     const isFlowchart = mindmap.type === 'flowchart';
     const virtualWidth = mindmap.canvas_width || (isFlowchart ? 1800 : 5000);
-    const initialZoom = 0.5;
+    const initialZoom = Math.min(0.5, containerRef.current.clientWidth / virtualWidth);
     const initialPanX = (containerRef.current.clientWidth / 2) - (virtualWidth / 2) * initialZoom;
     const initialPanY = 100 * initialZoom;
     setTransform({ x: initialPanX, y: initialPanY, k: initialZoom });
@@ -317,18 +408,21 @@ const MindMapPage = ({ mindmapId, onBack }) => {
     const virtualWidth = mindmap.canvas_width || (isFlowchart ? 1800 : 5000);
     const virtualHeight = mindmap.canvas_height || (isFlowchart ? 1400 : 4000);
     
-    tempCanvas.width = virtualWidth;
-    tempCanvas.height = virtualHeight;
+    // Browsers refuse very large canvases, so big maps are exported scaled down
+    const exportScale = Math.min(1, MAX_EXPORT_SIDE / Math.max(virtualWidth, virtualHeight));
+    tempCanvas.width = Math.ceil(virtualWidth * exportScale);
+    tempCanvas.height = Math.ceil(virtualHeight * exportScale);
     tempCtx.fillStyle = '#ffffff';
-    tempCtx.fillRect(0, 0, virtualWidth, virtualHeight);
+    tempCtx.fillRect(0, 0, tempCanvas.width, tempCanvas.height);
+    tempCtx.scale(exportScale, exportScale);
 
     // Reuse the same rendering logic...
-    const nodes = mindmap.nodes || [];
-    const edges = mindmap.edges || [];
+    const { nodes, edges } = getVisibleGraph();
+    const nodeById = new Map(nodes.map(n => [n.id, n]));
     
     edges.forEach(edge => {
-      const from = nodes.find(n => n.id === edge.from);
-      const to = nodes.find(n => n.id === edge.to);
+      const from = nodeById.get(edge.from);
+      const to = nodeById.get(edge.to);
       if (!from || !to) return;
       const color = edge.color || '#8b5cf6';
       if (isFlowchart) {
@@ -453,7 +547,7 @@ const MindMapPage = ({ mindmapId, onBack }) => {
               </>
             )}
           </div>
-          <p style={{marginTop: '0.75rem', color: '#64748b', fontSize: '0.85rem'}}>💡 Drag to pan • Scroll to zoom</p>
+          <p style={{marginTop: '0.75rem', color: '#64748b', fontSize: '0.85rem'}}>💡 Drag to pan • Scroll to zoom{mindmap.subtree_count > 0 ? ' • Click +N to expand' : ''}</p>
         </div>
       </div>
     </div>
@@ -3,18 +3,27 @@
 // ============================================
 import React, { useState, useEffect } from 'react';
 import { FileText, Download, Calendar, TrendingUp, ArrowLeft, CheckCircle, ZoomIn, ZoomOut, Maximize2 } from 'lucide-react';
+import { streamSummary } from '../summaryStream';
 import './SummaryPage.css';
 
-const SummaryPage = ({ summaryId, onBack }) => {
+// With summaryId the saved summary is loaded; with documentId (and no summaryId)
+// a new summary is streamed in: a quick draft first, then the improved summary
+// and key points. onStreamComplete receives the id of the saved summary.
+const SummaryPage = ({ summaryId, documentId, documentName, summaryType, onBack, onStreamComplete, onStreamError }) => {
   const [summary, setSummary] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [streamStage, setStreamStage] = useState(null);
   const [fontSize, setFontSize] = useState(18);
 
   useEffect(() => {
     if (summaryId) {
       fetchSummary();
+    } else if (documentId) {
+      const controller = new AbortController();
+      runSummaryStream(controller.signal);
+      return () => controller.abort();
     }
-  }, [summaryId]);
+  }, [summaryId, documentId]);
 
   const fetchSummary = async () => {
     try {
@@ -38,6 +47,48 @@ const SummaryPage = ({ summaryId, onBack }) => {
     }
   };
 
+  const runSummaryStream = async (signal) => {
+    setLoading(true);
+    setStreamStage('starting');
+    setSummary(null);
+
+    const base = {
+      document_name: documentName || 'Document',
+      summary_type: summaryType || 'medium',
+      created_at: new Date().toISOString(),
+      summary: '',
+      key_points: []
+    };
+
+    try {
+      const token = localStorage.getItem('token');
+      const options = summaryType ? { summary_type: summaryType } : {};
+
+      const result = await streamSummary(documentId, token, options, (event, data) => {
+        // The first event ends the loading state
+        setLoading(false);
+        setStreamStage(event);
+        setSummary((prev) => ({ ...base, ...prev, ...data }));
+      }, signal);
+
+      setSummary((prev) => ({
+        ...base,
+        ...prev,
+        ...result.data,
+        ...result.data.stats
+      }));
+      setStreamStage(null);
+      if (onStreamComplete) onStreamComplete(result.summary_id);
+    } catch (error) {
+      if (signal.aborted) return;
+      console.error('Error streaming summary:', error);
+      setStreamStage(null);
+      if (onStreamError) onStreamError(error);
+    } finally {
+      setLoading(false);
+    }
+  };
+
   // NEW: Format summary into structured paragraphs
   const formatSummaryIntoParagraphs = (text) => {
     if (!text) return [];
@@ -110,7 +161,7 @@ const SummaryPage = ({ summaryId, onBack }) => {
       <div className="summary-page-container">
         <div className="loading-state">
           <div className="spinner"></div>
-          <p>Loading summary...</p>
+          <p>{streamStage ? 'Summarizing document...' : 'Loading summary...'}</p>
         </div>
       </div>
     );
@@ -145,7 +196,13 @@ const SummaryPage = ({ summaryId, onBack }) => {
 
           <div className="summary-title-section">
             <h2>{summary.document_name}</h2>
-            <p>AI-Generated Summary</p>
+            <p>
+              {streamStage === 'draft'
+                ? 'Quick draft - improving with AI...'
+                : streamStage === 'summary'
+                  ? 'AI-Generated Summary - extracting key points...'
+                  : 'AI-Generated Summary'}
+            </p>
           </div>
 
           <div className="summary-controls">
@@ -158,7 +215,7 @@ const SummaryPage = ({ summaryId, onBack }) => {
             <button className="control-btn" onClick={handleZoomIn} title="Zoom In">
               <ZoomIn size={18} />
             </button>
-            <button className="download-btn" onClick={handleDownload}>
+            <button className="download-btn" onClick={handleDownload} disabled={!!streamStage}>
               <Download size={20} />
               Download
             </button>
@@ -180,7 +237,9 @@ const SummaryPage = ({ summaryId, onBack }) => {
             <FileText size={20} />
             <div>
               <span className="stat-label">Original</span>
-              <span className="stat-value">{summary.original_length} chars</span>
+              <span className="stat-value">
+                {summary.original_length ? `${summary.original_length} chars` : '—'}
+              </span>
             </div>
           </div>
 
@@ -189,7 +248,9 @@ const SummaryPage = ({ summaryId, onBack }) => {
             <div>
               <span className="stat-label">Reduction</span>
               <span className="stat-value">
-                {Math.round((1 - summary.summary_length / summary.original_length) * 100)}%
+                {summary.original_length
+                  ? `${Math.round((1 - summary.summary_length / summary.original_length) * 100)}%`
+                  : '—'}
               </span>
             </div>
           </div>
@@ -206,7 +267,7 @@ const SummaryPage = ({ summaryId, onBack }) => {
         <div className="summary-main">
           <div className="summary-section">
             <h3>📄 Full Summary</h3>
-            <div className="summary-text-scrollable">
+            <div className={`summary-text-scrollable${streamStage === 'draft' ? ' draft' : ''}`}>
               {/* UPDATED: Render as structured paragraphs */}
               {paragraphs.map((paragraph, index) => (
                 <p 
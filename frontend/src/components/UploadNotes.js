@@ -2,6 +2,7 @@
 import React, { useState } from 'react';
 import { Upload, CheckCircle, Loader2 } from 'lucide-react';
 import './UploadNotes.css';
+import { waitForJobResult } from '../jobPolling';
 
 const UploadNotes = ({ onActionComplete }) => {
   const [file, setFile] = useState(null);
@@ -96,7 +97,7 @@ const UploadNotes = ({ onActionComplete }) => {
         throw new Error(errorData.error || `Action failed with status: ${res.status}`);
       }
 
-      const data = await res.json();
+      const data = await waitForJobResult(await res.json(), token);
       
       // Get content ID based on action type
       let contentId = null;
@@ -0,0 +1,30 @@
+// jobPolling.js - Wait for a queued document action to finish
+const POLL_INTERVAL_MS = 1500;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Takes the parsed response of POST /api/uploads/action/... and resolves
+// with the action result once the background job has completed.
+export const waitForJobResult = async (queued, token) => {
+  if (!queued.job_id) {
+    return queued;
+  }
+
+  const resultUrl = queued.result_url || `/api/uploads/jobs/${queued.job_id}/result`;
+
+  while (true) {
+    const res = await fetch(resultUrl, {
+      headers: { 'Authorization': `Bearer ${token}` }
+    });
+    const data = await res.json();
+
+    if (res.status === 200) {
+      return data;
+    }
+    if (res.status !== 202) {
+      throw new Error(data.error || `Job failed with status: ${res.status}`);
+    }
+
+    await sleep(POLL_INTERVAL_MS);
+  }
+};
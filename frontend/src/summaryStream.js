@@ -0,0 +1,52 @@
+// summaryStream.js - Read the server-sent events of POST /api/uploads/summary/stream/...
+
+// Calls onEvent(event, data) for every draft / summary / key_points event and
+// resolves with the data of the final "done" event (same shape as a job result).
+export const streamSummary = async (documentId, token, options = {}, onEvent = () => {}, signal) => {
+  const response = await fetch(`/api/uploads/summary/stream/${documentId}`, {
+    method: 'POST',
+    headers: {
+      'Authorization': `Bearer ${token}`,
+      'Content-Type': 'application/json'
+    },
+    body: JSON.stringify(options),
+    signal
+  });
+
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({}));
+    throw new Error(errorData.error || `Summary failed with status: ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // Events are separated by a blank line
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = 'message';
+      let data = '';
+      block.split('\n').forEach((line) => {
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) data += line.slice(5).trim();
+      });
+      if (!data) continue;
+
+      const payload = JSON.parse(data);
+      if (event === 'error') throw new Error(payload.error || 'Failed to summarize');
+      if (event === 'done') return payload;
+      onEvent(event, payload);
+    }
+  }
+
+  throw new Error('Summary stream ended unexpectedly');
+};